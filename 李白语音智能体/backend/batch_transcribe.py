@@ -0,0 +1,234 @@
+# backend/batch_transcribe.py
+"""
+批量转写目录中的录音
+
+主进程遍历目录，逐个文件解码为 16kHz PCM 并按静音切分，把各段分发给多个 worker 进程识别；
+结果逐段以 JSONL 流式写入输出文件。中断后用同一输出文件重新运行即可续跑：已完成的文件整体跳过，
+未完成文件中已识别的段也不再重复识别。
+
+模型共享：在支持 fork 的平台上，ASR 模型在主进程中加载一次，worker 以写时复制方式共享模型内存；
+否则每个 worker 各自加载。
+
+输出记录:
+    {"file": ..., "segment": 0, "start": 0.0, "end": 3.2, "text": ..., "asr_seconds": 0.41, "worker": 1234}
+    {"file": ..., "done": true, "segments": 12, "duration": 95.3}
+
+用法:
+    python -m backend.batch_transcribe <录音目录> --output transcripts.jsonl [--workers 4]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.speech.asr import ASR, decode_audio
+from backend.speech.asr_engines import SAMPLE_RATE
+from backend.speech.audio_processing import find_speech_segments
+
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3", ".ogg", ".opus", ".m4a", ".webm", ".aac"}
+
+# worker 进程内的 ASR 实例；fork 模式下在主进程中创建后由子进程继承
+_asr: Optional[ASR] = None
+
+
+def _init_worker(threads: int) -> None:
+    global _asr
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    if _asr is None:
+        _asr = ASR()
+
+
+def _transcribe_segment(task: Tuple[str, int, int, int, np.ndarray]) -> Dict[str, object]:
+    file, index, start, end, pcm = task
+    t0 = time.perf_counter()
+    text = _asr.transcribe(pcm, is_raw_pcm=True)
+    if text is None:
+        # ASR 内部出错时返回 None：抛出异常交给 error_callback，该段不写入结果，续跑时会重新识别
+        raise RuntimeError(f"{file} 第 {index} 段识别失败")
+    return {
+        "file": file,
+        "segment": index,
+        "start": round(start / SAMPLE_RATE, 3),
+        "end": round(end / SAMPLE_RATE, 3),
+        "text": text,
+        "asr_seconds": round(time.perf_counter() - t0, 3),
+        "worker": os.getpid(),
+    }
+
+
+def find_audio_files(directory: str) -> List[str]:
+    """递归查找目录中的音频文件，返回相对路径（排序，保证多次运行顺序一致）"""
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                files.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(files)
+
+
+def _terminate_partial_line(output: str) -> None:
+    """中断时可能留下没有换行的半行，续写前补一个换行，避免与新记录拼在一起"""
+    if not os.path.exists(output) or os.path.getsize(output) == 0:
+        return
+    with open(output, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def load_progress(output: str) -> Tuple[Set[str], Set[Tuple[str, int]]]:
+    """读取已有输出，返回（已完成的文件, 已识别的段）；忽略中断时写了一半的最后一行"""
+    done_files, done_segments = set(), set()
+    if not os.path.exists(output):
+        return done_files, done_segments
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("done"):
+                done_files.add(record["file"])
+            elif "segment" in record:
+                done_segments.add((record["file"], record["segment"]))
+    return done_files, done_segments
+
+
+class BatchTranscriber:
+    def __init__(self, directory: str, output: str, workers: Optional[int] = None,
+                 min_silence_len: int = 500, silence_thresh: int = -40, max_in_flight: Optional[int] = None):
+        """
+        Args:
+            directory: 录音目录
+            output: JSONL 输出文件（同时作为续跑进度）
+            workers: worker 进程数，默认 CPU 核数
+            min_silence_len: 切分用的最小静音长度（毫秒）
+            silence_thresh: 切分用的静音阈值（dBFS）
+            max_in_flight: 已分发但未完成的最大段数，限制主进程缓存的音频量，默认 workers * 4
+        """
+        self.directory = directory
+        self.output = output
+        self.workers = workers or os.cpu_count() or 1
+        self.min_silence_len = min_silence_len
+        self.silence_thresh = silence_thresh
+        self.max_in_flight = max_in_flight or self.workers * 4
+        self._write_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self.audio_seconds = 0.0
+        self.segments_done = 0
+        self.errors = 0
+
+    def _segments(self, rel_path: str) -> Tuple[float, List[Tuple[int, int]], np.ndarray]:
+        with open(os.path.join(self.directory, rel_path), "rb") as f:
+            audio = decode_audio(f.read())
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+        bounds = find_speech_segments(pcm, SAMPLE_RATE, self.min_silence_len, self.silence_thresh)
+        return len(pcm) / SAMPLE_RATE, bounds, pcm
+
+    def _write(self, out, record: Dict[str, object]) -> None:
+        with self._write_lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+    def _pool(self):
+        """fork 可用时先在主进程加载模型，再创建进程池，使各 worker 共享模型内存"""
+        global _asr
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        if "fork" in multiprocessing.get_all_start_methods():
+            print("主进程加载ASR模型...")
+            _asr = ASR()
+            ctx = multiprocessing.get_context("fork")
+        else:
+            ctx = multiprocessing.get_context("spawn")
+        return ctx.Pool(self.workers, initializer=_init_worker, initargs=(threads,))
+
+    def _tasks(self, files: List[str], done_segments: Set[Tuple[str, int]], pending: Dict[str, List[int]],
+               pending_lock: threading.Lock, out) -> Iterator[Tuple[str, int, int, int, np.ndarray]]:
+        for rel_path in files:
+            try:
+                duration, bounds, pcm = self._segments(rel_path)
+            except Exception as e:
+                with pending_lock:
+                    self.errors += 1
+                print(f"解码失败，跳过: {rel_path}: {e}")
+                continue
+            todo = [i for i in range(len(bounds)) if (rel_path, i) not in done_segments]
+            # [剩余段数, 总段数, 时长（毫秒）]，全部完成时写入文件完成记录；结果线程的回调同样读写 pending
+            with pending_lock:
+                pending[rel_path] = [len(todo), len(bounds), int(duration * 1000)]
+                if not todo:
+                    self._finish_file(rel_path, pending, out)
+            for i in todo:
+                start, end = bounds[i]
+                yield rel_path, i, start, end, pcm[start:end].copy()
+
+    def _finish_file(self, rel_path: str, pending: Dict[str, List[int]], out) -> None:
+        _, total, duration_ms = pending.pop(rel_path)
+        self._write(out, {"file": rel_path, "done": True, "segments": total, "duration": duration_ms / 1000})
+
+    def run(self) -> None:
+        files = find_audio_files(self.directory)
+        done_files, done_segments = load_progress(self.output)
+        todo_files = [f for f in files if f not in done_files]
+        print(f"共 {len(files)} 个文件，已完成 {len(files) - len(todo_files)} 个，待处理 {len(todo_files)} 个")
+        if not todo_files:
+            return
+
+        _terminate_partial_line(self.output)
+        pending: Dict[str, List[int]] = {}
+        pending_lock = threading.Lock()
+        start = time.perf_counter()
+        with open(self.output, "a", encoding="utf-8") as out, self._pool() as pool:
+
+            def on_result(record):
+                self._write(out, record)
+                with pending_lock:
+                    self.segments_done += 1
+                    self.audio_seconds += record["end"] - record["start"]
+                    entry = pending[record["file"]]
+                    entry[0] -= 1
+                    if entry[0] == 0:
+                        self._finish_file(record["file"], pending, out)
+                self._slots.release()
+
+            def on_error(e):
+                # 失败的段不计入完成数，所在文件不会写入完成记录，续跑时重新识别
+                with pending_lock:
+                    self.errors += 1
+                print(f"识别失败: {e}")
+                self._slots.release()
+
+            for task in self._tasks(todo_files, done_segments, pending, pending_lock, out):
+                # 限制在途的段数，主进程不会一次性解码并缓存整个目录
+                self._slots.acquire()
+                pool.apply_async(_transcribe_segment, (task,), callback=on_result, error_callback=on_error)
+            pool.close()
+            pool.join()
+
+        wall = time.perf_counter() - start
+        print(f"完成 {self.segments_done} 段，音频 {self.audio_seconds / 3600:.2f} 小时，耗时 {wall:.1f} 秒，"
+              f"吞吐 {self.audio_seconds / max(wall, 1e-9):.1f} 音频小时/墙钟小时，失败 {self.errors} 个")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="批量转写目录中的录音（可中断续跑）")
+    parser.add_argument("directory", help="录音目录")
+    parser.add_argument("--output", "-o", default="transcripts.jsonl", help="JSONL 输出文件")
+    parser.add_argument("--workers", type=int, default=None, help="worker 进程数，默认 CPU 核数")
+    parser.add_argument("--min-silence-len", type=int, default=500, help="切分用的最小静音长度（毫秒）")
+    parser.add_argument("--silence-thresh", type=int, default=-40, help="切分用的静音阈值（dBFS）")
+    args = parser.parse_args(argv)
+    BatchTranscriber(args.directory, args.output, args.workers,
+                     args.min_silence_len, args.silence_thresh).run()
+
+
+if __name__ == "__main__":
+    main()
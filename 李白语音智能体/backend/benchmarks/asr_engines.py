@@ -0,0 +1,101 @@
+# backend/benchmarks/asr_engines.py
+"""
+ASR 引擎对比基准：实时率（RTF）与内存占用
+
+每个引擎在独立子进程中加载和运行，避免模型权重相互影响内存统计。
+
+用法:
+    python -m backend.benchmarks.asr_engines <音频文件> [--engines whisper faster-whisper] [--repeat 3]
+"""
+import argparse
+import multiprocessing as mp
+import sys
+import time
+from typing import Any, Dict
+
+from backend.speech.asr import decode_audio
+from backend.speech.asr_engines import ASR_ENGINES, SAMPLE_RATE, create_asr_engine
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB），不支持的平台返回 nan"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024 / 1024
+        except Exception:
+            return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _run_engine(engine_name: str, audio_path: str, repeat: int, queue) -> None:
+    """子进程入口：加载引擎、重复识别并回传统计"""
+    try:
+        with open(audio_path, "rb") as f:
+            audio = decode_audio(f.read())
+        duration = len(audio) / SAMPLE_RATE
+        rss_before = peak_rss_mb()
+
+        start = time.perf_counter()
+        engine = create_asr_engine(engine_name)
+        load_time = time.perf_counter() - start
+        rss_loaded = peak_rss_mb()
+
+        # 第一次识别作为预热，不计入统计
+        engine.transcribe(audio, language="zh")
+
+        times = []
+        text = ""
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = engine.transcribe(audio, language="zh")["text"].strip()
+            times.append(time.perf_counter() - start)
+
+        queue.put({
+            "engine": engine_name,
+            "duration": duration,
+            "load_time": load_time,
+            "best": min(times),
+            "mean": sum(times) / len(times),
+            "rss_model": rss_loaded - rss_before,
+            "rss_peak": peak_rss_mb(),
+            "text": text,
+        })
+    except Exception as e:
+        queue.put({"engine": engine_name, "error": str(e)})
+
+
+def benchmark_engine(engine_name: str, audio_path: str, repeat: int = 3) -> Dict[str, Any]:
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_engine, args=(engine_name, audio_path, repeat, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASR 引擎实时率与内存对比")
+    parser.add_argument("audio", help="测试音频文件路径")
+    parser.add_argument("--engines", nargs="+", default=list(ASR_ENGINES), help="参与对比的引擎")
+    parser.add_argument("--repeat", type=int, default=3, help="每个引擎的重复识别次数")
+    args = parser.parse_args()
+
+    print(f"{'引擎':<16}{'加载(s)':>10}{'RTF(best)':>12}{'RTF(mean)':>12}{'模型内存(MB)':>14}{'峰值内存(MB)':>14}")
+    for name in args.engines:
+        r = benchmark_engine(name, args.audio, args.repeat)
+        if "error" in r:
+            print(f"{name:<16}失败: {r['error']}")
+            continue
+        print(f"{name:<16}{r['load_time']:>10.2f}{r['best'] / r['duration']:>12.3f}"
+              f"{r['mean'] / r['duration']:>12.3f}{r['rss_model']:>14.1f}{r['rss_peak']:>14.1f}")
+        print(f"{'':<16}识别结果: {r['text']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# backend/benchmarks/hotpath.py
+"""
+音频热路径微基准：每块 / 每轮都会调用的工具函数的吞吐量与内存分配，并与基线比较
+
+覆盖的函数（按真实的块大小）:
+    - is_speaking              上行每块一次（20ms / 64ms / 浏览器 4096 采样 / 8192 采样）
+    - _pad_audio               上行每块一次（偶数与奇数字节）
+    - pcm_to_wav_bytes         每段回复一次（1s / 5s / 15s）
+    - wav_to_pcm_bytes         读取录音文件（1s / 5s / 15s）
+    - PacedSender.send         下行按 AUDIO_CHUNK_MS 分块加 WAV 头（取代原 split_wav_bytes_into_chunks），整段回复
+    - TTSGenerator.generate_pcm_chunks_async  把引擎返回的每句 PCM 切成 3200 字节的块
+下行两项用不挂起的存根（发送函数 / TTS 引擎）驱动真实代码，不经过事件循环和网络。
+
+计时时所有用例与一个固定的校准循环交替运行 --rounds 遍，每个用例取最快一轮的单次耗时，
+减少机器瞬时负载的影响；内存分配用 tracemalloc 单独统计一次调用的峰值（计时时不开启）。
+
+默认只按分配峰值判定：分配量与机器负载无关，增幅超过 --alloc-threshold 时以退出码 1 结束。
+耗时按同一次运行中校准循环的耗时归一化后与基线比较，只打印不判定——绝对耗时随机器和负载变化，
+不同用例受影响的程度也不同，即使归一化也不适合作为跨机器的门禁。
+在同一台机器上做 A/B 对比时，先在改动前用 --save 写一份本地基线，改动后加 --threshold 比较，
+归一化耗时增幅超过该值也判为退化。
+
+用法:
+    python -m backend.benchmarks.hotpath [--save] [--baseline 路径] [--alloc-threshold 0.1] [--threshold 0.25]
+        [--filter is_speaking]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.speech.audio_processing import is_speaking, pcm_to_wav_bytes, wav_to_pcm_bytes
+from backend.speech.paced_sender import PacedSender
+from backend.speech.tts import TTSGenerator
+from backend.websocket_server import RealTimeWebSocketServer
+
+SAMPLE_RATE = 16000
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hotpath_baseline.json")
+# 分配峰值的绝对容差（字节），避免很小的分配量因解释器内部的几十字节波动被判为退化
+ALLOC_SLACK = 1024
+
+
+def _speech(seconds: float, seed: int = 0) -> bytes:
+    """带噪声的 200Hz 正弦波，16kHz int16"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 200 * t) * 6000 + rng.standard_normal(len(t)) * 500).astype("<i2").tobytes()
+
+
+def _drive(coro) -> Any:
+    """驱动不会挂起的协程（存根不做 I/O），省去事件循环的开销"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("基准中的协程意外挂起")
+
+
+class _StubEngine:
+    """每句返回固定 PCM 的 TTS 引擎存根"""
+
+    def __init__(self, pcm: bytes):
+        self.pcm = pcm
+
+    async def stream(self, sentences):
+        for _ in sentences:
+            yield self.pcm
+
+
+async def _noop_send(_data) -> None:
+    return None
+
+
+def build_cases(workdir: str) -> List[Tuple[str, int, Callable[[], Any]]]:
+    """返回 (名称, 每次调用处理的字节数, 调用函数) 列表"""
+    cases = []
+    # 上行：16kHz 20ms / 64ms 块，浏览器 ScriptProcessor 常见的 4096 / 8192 采样块
+    for size in (640, 2048, 8192, 16384):
+        chunk = _speech(size / 2 / SAMPLE_RATE)
+        cases.append((f"is_speaking[{size}B]", size, lambda c=chunk: is_speaking(c)))
+    for size in (8192, 8191):
+        chunk = _speech(1)[:size]
+        cases.append((f"_pad_audio[{size}B]", size,
+                      lambda c=chunk: RealTimeWebSocketServer._pad_audio(None, c)))
+
+    # 每轮：整段回复
+    for seconds in (1, 5, 15):
+        pcm = _speech(seconds)
+        cases.append((f"pcm_to_wav_bytes[{seconds}s]", len(pcm), lambda p=pcm: pcm_to_wav_bytes(p)))
+        path = os.path.join(workdir, f"reply_{seconds}s.wav")
+        with open(path, "wb") as f:
+            f.write(pcm_to_wav_bytes(pcm))
+        cases.append((f"wav_to_pcm_bytes[{seconds}s]", len(pcm), lambda p=path: wav_to_pcm_bytes(p)))
+
+    # 下行：按 AUDIO_CHUNK_MS 分块发送整段回复；领先量设为无限大，发送不等待
+    chunk_size = settings.AUDIO_CHUNK_MS * SAMPLE_RATE // 1000 * 2
+    for seconds in (5, 15):
+        pcm = _speech(seconds)
+        sender = PacedSender(_noop_send, _noop_send, lead_ms=10 ** 12)
+
+        async def send_reply(p=pcm, s=sender):
+            for i in range(0, len(p), chunk_size):
+                await s.send(p[i:i + chunk_size])
+
+        cases.append((f"paced_send[{seconds}s]", len(pcm), lambda f=send_reply: _drive(f())))
+
+    # 流式 TTS：每句 PCM 切块
+    for seconds in (1, 5):
+        pcm = _speech(seconds)
+        tts = TTSGenerator.__new__(TTSGenerator)
+        tts.engine = _StubEngine(pcm)
+
+        async def consume(t=tts):
+            total = 0
+            async for chunk in t.generate_pcm_chunks_async("床前明月光。"):
+                total += len(chunk)
+            return total
+
+        cases.append((f"generate_pcm_chunks[{seconds}s]", len(pcm), lambda f=consume: _drive(f())))
+    return cases
+
+
+def measure_time(fn: Callable[[], Any], repeat: int = 5, min_seconds: float = 0.02) -> float:
+    """单次调用耗时（秒）：先校准每轮调用次数，再取多轮中最快一轮的平均值"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_seconds / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _calibration() -> int:
+    """校准循环：固定的纯 Python 运算加小数组 numpy 运算，与热路径函数的开销构成相近"""
+    samples = np.arange(1024, dtype=np.int16)
+    total = 0
+    for i in range(200):
+        total += i * i % 7
+    return total + int(np.abs(samples.astype(np.float32)).mean())
+
+
+def measure_alloc(fn: Callable[[], Any]) -> int:
+    """单次调用期间新增内存分配的峰值（字节），包括调用中途释放的临时对象"""
+    fn()  # 首次调用可能触发缓存、导入等一次性分配
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base)
+
+
+def run(cases, repeat: int, rounds: int) -> Tuple[float, Dict[str, Dict[str, float]]]:
+    """返回 (校准循环单次耗时 us, 各用例结果)"""
+    best = {name: float("inf") for name, _, _ in cases}
+    calibration = float("inf")
+    for _ in range(rounds):
+        calibration = min(calibration, measure_time(_calibration, repeat))
+        for name, _, fn in cases:
+            best[name] = min(best[name], measure_time(fn, repeat))
+
+    results = {}
+    print(f"{'用例':<28} | {'us/次':>10} | {'MB/s':>9} | {'分配峰值 KB':>11} | {'分配/输入':>9}")
+    for name, nbytes, fn in cases:
+        seconds = best[name]
+        alloc = measure_alloc(fn)
+        results[name] = {
+            "us_per_call": round(seconds * 1e6, 3),
+            "mb_per_s": round(nbytes / seconds / 1024 / 1024, 1),
+            "alloc_bytes": alloc,
+            "alloc_per_input": round(alloc / nbytes, 2),
+        }
+        r = results[name]
+        print(f"{name:<28} | {r['us_per_call']:>10.2f} | {r['mb_per_s']:>9.1f} | "
+              f"{alloc / 1024:>11.1f} | {r['alloc_per_input']:>9.2f}")
+    calibration_us = round(calibration * 1e6, 3)
+    print(f"校准循环 {calibration_us:.2f} us/次")
+    return calibration_us, results
+
+
+def compare(results, calibration_us: float, baseline, alloc_threshold: float, threshold: Optional[float] = None,
+            verbose: bool = True) -> Dict[str, str]:
+    """
+    返回退化的用例及说明；基线中没有的用例只提示不判定
+
+    耗时比 = (本次耗时 / 本次校准耗时) / (基线耗时 / 基线校准耗时)，threshold 为 None 时只打印不判定
+    """
+    speed = calibration_us / baseline["calibration_us"]
+    regressions = {}
+    for name, r in results.items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            if verbose:
+                print(f"  {name}: 基线中没有该用例")
+            continue
+        time_ratio = r["us_per_call"] / base["us_per_call"] / speed
+        alloc_limit = base["alloc_bytes"] * (1 + alloc_threshold) + ALLOC_SLACK
+        problems = []
+        if threshold is not None and time_ratio > 1 + threshold:
+            problems.append(f"归一化耗时 {time_ratio:.2f}x（{base['us_per_call']:.2f} -> {r['us_per_call']:.2f} us）")
+        if r["alloc_bytes"] > alloc_limit:
+            problems.append(f"分配 {base['alloc_bytes']} -> {r['alloc_bytes']} 字节")
+        if problems:
+            regressions[name] = "，".join(problems)
+        elif verbose:
+            print(f"  {name}: 归一化耗时 {time_ratio:.2f}x，分配 {base['alloc_bytes']} -> {r['alloc_bytes']} 字节")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频热路径微基准")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save", action="store_true", help="把本次结果写为基线（不做比较）")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="允许的归一化耗时增幅；默认不按耗时判定，只用于同一台机器上与本地基线的 A/B 对比")
+    parser.add_argument("--alloc-threshold", type=float, default=0.1, help="允许的分配峰值增幅")
+    parser.add_argument("--repeat", type=int, default=5, help="每遍中每个用例的计时轮数")
+    parser.add_argument("--rounds", type=int, default=3, help="所有用例交替运行的遍数")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="按耗时判定时，疑似退化的用例重新计时的次数，仍退化才判定失败")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的用例")
+    args = parser.parse_args()
+
+    baseline = None
+    if not args.save:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"基线文件不存在: {args.baseline}，用 --save 生成")
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if "calibration_us" not in baseline:
+            sys.exit(f"基线文件缺少校准耗时（旧格式）: {args.baseline}，用 --save 重新生成")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = [c for c in build_cases(workdir) if args.filter in c[0]]
+        calibration_us, results = run(cases, args.repeat, args.rounds)
+        if baseline is not None and args.threshold is not None:
+            # 单次计时可能碰上机器的瞬时负载：疑似退化的用例重新计时，取各次中最快的结果
+            for _ in range(args.retries):
+                suspects = compare(results, calibration_us, baseline, args.alloc_threshold, args.threshold,
+                                   verbose=False)
+                if not suspects:
+                    break
+                print(f"重新计时疑似退化的用例: {', '.join(suspects)}")
+                for name, nbytes, fn in cases:
+                    if name in suspects:
+                        seconds = min(results[name]["us_per_call"] / 1e6, measure_time(fn, args.repeat))
+                        results[name]["us_per_call"] = round(seconds * 1e6, 3)
+                        results[name]["mb_per_s"] = round(nbytes / seconds / 1024 / 1024, 1)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "machine": f"{platform.platform()} {platform.processor() or platform.machine()}",
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "calibration_us": calibration_us,
+                "cases": results,
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"基线已写入 {args.baseline}")
+        return
+
+    print(f"与基线比较（{baseline.get('machine')}, Python {baseline.get('python')}，"
+          f"校准循环 {baseline['calibration_us']:.2f} -> {calibration_us:.2f} us）:")
+    regressions = compare(results, calibration_us, baseline, args.alloc_threshold, args.threshold)
+    if regressions:
+        print("性能退化:")
+        for name, problem in regressions.items():
+            print(f"  {name}: {problem}")
+        sys.exit(1)
+    print("未发现退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# backend/benchmarks/neural_vad.py
+"""
+批量 VAD 基准：不同并发会话数下，每个 tick 的推理耗时与单会话成本
+
+对每个会话数 N，注册 N 个会话，每个 tick 给每个会话追加一帧音频后调用 BatchedVAD.tick()，
+对比逐会话单独推理（batch=1，调用 N 次）的耗时。
+
+需要 onnxruntime 和 Silero VAD 模型文件（silero_vad.onnx）。
+
+用法:
+    python -m backend.benchmarks.neural_vad --model models/silero_vad.onnx [--sessions 1,10,100] [--ticks 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.speech.neural_vad import CONTEXT, FRAME, STATE_SIZE, BatchedVAD, SileroVADModel, VADStream
+
+
+def bench_batched(model: SileroVADModel, sessions: int, ticks: int, audio: np.ndarray) -> float:
+    """返回每个 tick 的平均耗时（秒）"""
+    vad = BatchedVAD(model)
+    # 不经 register()（它会启动后台调度线程），直接放入会话表，由基准手动调用 tick()
+    streams = [VADStream(vad.threshold, vad.min_silence) for _ in range(sessions)]
+    vad.streams = {f"s{i}": stream for i, stream in enumerate(streams)}
+    elapsed = 0.0
+    for t in range(ticks):
+        for i, stream in enumerate(streams):
+            offset = ((t + i) * FRAME) % (len(audio) - FRAME)
+            stream.push(audio[offset:offset + FRAME].tobytes())
+        start = time.perf_counter()
+        vad.tick()
+        elapsed += time.perf_counter() - start
+    return elapsed / ticks
+
+
+def bench_unbatched(model: SileroVADModel, sessions: int, ticks: int) -> float:
+    """逐会话单独推理，返回每个 tick（N 次推理）的平均耗时（秒）"""
+    frame = np.zeros((1, CONTEXT + FRAME), dtype=np.float32)
+    states = [np.zeros((2, 1, STATE_SIZE), dtype=np.float32) for _ in range(sessions)]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for i in range(sessions):
+            _, states[i] = model(frame, states[i])
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量 VAD 单会话成本基准")
+    parser.add_argument("--model", required=True, help="silero_vad.onnx 路径")
+    parser.add_argument("--sessions", default="1,10,100", help="并发会话数，逗号分隔")
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1, help="onnxruntime 线程数")
+    args = parser.parse_args()
+
+    model = SileroVADModel(args.model, args.threads)
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(16000 * 10) * 3000).astype("<i2")
+    # 预热
+    bench_batched(model, 4, 20, audio)
+
+    print(f"{'会话数':>6} | {'批量 ms/tick':>12} | {'批量 us/会话':>12} | {'逐个 ms/tick':>12} | {'逐个 us/会话':>12} | 加速")
+    for n in (int(x) for x in args.sessions.split(",")):
+        batched = bench_batched(model, n, args.ticks, audio)
+        single = bench_unbatched(model, n, args.ticks)
+        print(f"{n:>6} | {batched * 1e3:>12.3f} | {batched / n * 1e6:>12.1f} | "
+              f"{single * 1e3:>12.3f} | {single / n * 1e6:>12.1f} | {single / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
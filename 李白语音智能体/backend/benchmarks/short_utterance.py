@@ -0,0 +1,64 @@
+# backend/benchmarks/short_utterance.py
+"""
+短句模式基准：单句识别延迟随音频时长的变化
+
+从一段测试音频中截取（不足时循环拼接）不同时长的片段，分别用完整识别
+（30 秒窗口 + 温度回退）和短句模式识别，对比每句延迟。
+
+用法:
+    python -m backend.benchmarks.short_utterance <音频文件> [--lengths 1 2 3 5 8] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.config import settings
+from backend.speech.asr import decode_audio
+from backend.speech.asr_engines import SAMPLE_RATE, create_asr_engine, pick_bucket
+
+
+def make_clip(audio: np.ndarray, seconds: float) -> np.ndarray:
+    n = int(seconds * SAMPLE_RATE)
+    if len(audio) >= n:
+        return audio[:n]
+    return np.resize(audio, n)  # 循环拼接到目标长度
+
+
+def time_call(fn, clip: np.ndarray, repeat: int) -> float:
+    fn(clip)  # 预热
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(clip)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="短句模式延迟随时长变化")
+    parser.add_argument("audio", help="测试音频文件路径")
+    parser.add_argument("--engine", default=settings.ASR_ENGINE, help="ASR 引擎名称")
+    parser.add_argument("--lengths", nargs="+", type=float, default=[1, 2, 3, 5, 8], help="片段时长（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个时长的重复次数")
+    args = parser.parse_args()
+
+    with open(args.audio, "rb") as f:
+        audio = decode_audio(f.read())
+    engine = create_asr_engine(args.engine)
+
+    full = lambda clip: engine.transcribe(clip, language=settings.ASR_LANGUAGE)
+    short = lambda clip: engine.transcribe_short(clip)
+
+    print(f"引擎: {args.engine}")
+    print(f"{'时长(s)':>8}{'档位(s)':>8}{'完整识别(ms)':>14}{'短句模式(ms)':>14}{'加速比':>8}")
+    for seconds in args.lengths:
+        clip = make_clip(audio, seconds)
+        t_full = time_call(full, clip, args.repeat)
+        t_short = time_call(short, clip, args.repeat)
+        print(f"{seconds:>8.1f}{pick_bucket(seconds):>8d}{t_full * 1000:>14.1f}"
+              f"{t_short * 1000:>14.1f}{t_full / t_short:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
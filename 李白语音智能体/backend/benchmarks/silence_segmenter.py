@@ -0,0 +1,89 @@
+# backend/benchmarks/silence_segmenter.py
+"""
+静音切分基准：pydub split_on_silence（原实现）与向量化实现的耗时对比
+
+不指定音频文件时合成一段测试录音：若干 0.5~4 秒的“语音”（调幅噪声）与 0.2~1.5 秒的静音交替。
+
+用法:
+    python -m backend.benchmarks.silence_segmenter [音频文件] [--minutes 5] [--repeat 3]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.silence import split_on_silence
+
+from backend.speech.audio_processing import pcm_to_wav_bytes, split_audio_on_silence
+
+SAMPLE_RATE = 16000
+
+
+def make_recording(minutes: float, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = 0
+    target = int(minutes * 60 * SAMPLE_RATE)
+    while total < target:
+        n = int(rng.uniform(0.5, 4) * SAMPLE_RATE)
+        envelope = 0.5 + 0.5 * np.sin(np.arange(n) / SAMPLE_RATE * 2 * np.pi * rng.uniform(2, 6))
+        parts.append(rng.normal(0, 4000, n) * envelope)
+        n_silence = int(rng.uniform(0.2, 1.5) * SAMPLE_RATE)
+        parts.append(rng.normal(0, 30, n_silence))
+        total += n + n_silence
+    pcm = np.clip(np.concatenate(parts), -32768, 32767).astype("<i2")
+    return pcm_to_wav_bytes(pcm.tobytes())
+
+
+def pydub_split(audio_file_path: str, min_silence_len: int = 500, silence_thresh: int = -40) -> list:
+    """原 split_audio_on_silence 实现"""
+    audio = AudioSegment.from_file(audio_file_path)
+    segments = split_on_silence(audio, min_silence_len=min_silence_len, silence_thresh=silence_thresh,
+                                keep_silence=500)
+    return [segment.export(io.BytesIO(), format="wav").getvalue() for segment in segments]
+
+
+def time_call(fn, repeat: int):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="静音切分耗时对比")
+    parser.add_argument("audio", nargs="?", help="测试音频文件，默认合成")
+    parser.add_argument("--minutes", type=float, default=5, help="合成录音的时长（分钟）")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-pydub", action="store_true", help="录音很长时跳过 pydub（耗时过长）")
+    args = parser.parse_args()
+
+    path = args.audio
+    tmp = None
+    if path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+        tmp.write(make_recording(args.minutes))
+        tmp.close()
+        path = tmp.name
+    try:
+        views_time, views = time_call(lambda: split_audio_on_silence(path, as_wav=False), args.repeat)
+        wav_time, wavs = time_call(lambda: split_audio_on_silence(path), args.repeat)
+        print(f"向量化（数组视图）: {views_time * 1000:8.1f} ms，{len(views)} 段")
+        print(f"向量化（WAV 编码）: {wav_time * 1000:8.1f} ms，{len(wavs)} 段")
+        if not args.skip_pydub:
+            pydub_time, segments = time_call(lambda: pydub_split(path), 1)
+            print(f"pydub split_on_silence: {pydub_time * 1000:8.1f} ms，{len(segments)} 段"
+                  f"（{pydub_time / views_time:.0f}x）")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
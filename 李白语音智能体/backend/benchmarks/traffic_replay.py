@@ -0,0 +1,203 @@
+# backend/benchmarks/traffic_replay.py
+"""
+流量回放：用录制的真实会话 trace（TRACE_ENABLED=true 时由实时服务录制）驱动 /ws 端点
+
+每个 trace 开一个 websocket 连接，按录制时的到达间隔（除以 --speed）发送上行消息，
+多个 trace（以及 --repeat 复制出的副本）并行回放。客户端回报播放进度的 "played" 消息不回放，
+服务端此时只按时钟模型限速发送。
+
+轮次延迟：一句话最后一帧有声音频发出，到收到服务端下一段回复（含垫话、忙碌回复）的第一块音频的时间。
+回复总是对应最近一句已说完的话；用户正在说的下一句不参与匹配，服务端合并的多句只计一轮。
+加速回放会同比例压缩停顿，服务端按静音切句的结果可能与 1 倍速不同，回归对比时应使用相同倍速。
+
+用法:
+    python -m backend.benchmarks.traffic_replay <trace 文件或目录...> [--url ws://127.0.0.1:8000/ws]
+        [--speed 1] [--repeat 1] [--concurrency 0] [--json 结果.json] [--baseline 基线.json --tolerance 0.2]
+与基线相比 p95 轮次延迟超出容差时以退出码 1 结束，可用于性能回归测试。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from websockets.asyncio.client import connect
+
+from backend.speech.audio_processing import is_speaking
+from backend.speech.traffic_trace import AUDIO, TRACE_EXT, read_trace
+
+# 下行音频间隔超过该时长（秒）视为新一段回复；同一段回复的音频块按播放进度连续到达
+REPLY_GAP = 0.5
+
+
+def find_traces(paths: List[str]) -> List[str]:
+    """展开参数中的目录（递归查找 .lbtr 文件）"""
+    traces = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                traces.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(TRACE_EXT))
+        else:
+            traces.append(path)
+    return traces
+
+
+class ReplaySession:
+    """一次回放会话的统计"""
+
+    def __init__(self, trace: str):
+        self.trace = trace
+        self.latencies: List[float] = []
+        self.speech_end: Optional[float] = None   # 正在说的这句话最后一帧有声音频的发送时刻
+        self.awaiting: Optional[float] = None     # 已说完、等待回复的一句话的结束时刻，收到回复后清空
+        self.last_downlink = float("-inf")
+        self.barge_ins = 0
+        self.downlink_bytes = 0
+        self.trace_seconds = 0.0
+        self.error: Optional[str] = None
+
+    def on_sent(self, voiced: bool) -> None:
+        """发出一帧上行音频后调用：有声帧之后的第一帧静音标志一句话说完"""
+        if voiced:
+            self.speech_end = time.perf_counter()
+        elif self.speech_end is not None:
+            self.awaiting, self.speech_end = self.speech_end, None
+
+    def on_message(self, message) -> None:
+        now = time.perf_counter()
+        if isinstance(message, bytes):
+            self.downlink_bytes += len(message)
+            new_reply = now - self.last_downlink > REPLY_GAP
+            self.last_downlink = now
+            # 用户说话时上一段回复仍在发送（尚未被打断）的音频不算作新回复
+            if new_reply and self.awaiting is not None:
+                self.latencies.append(now - self.awaiting)
+                self.awaiting = None
+            return
+        try:
+            if json.loads(message).get("type") == "stop_audio":
+                self.barge_ins += 1
+                self.last_downlink = float("-inf")
+        except (json.JSONDecodeError, AttributeError):
+            pass
+
+
+async def replay(trace: str, url: str, speed: float, tail: float, delay: float) -> ReplaySession:
+    session = ReplaySession(trace)
+    await asyncio.sleep(delay)
+    try:
+        _, records = read_trace(trace)
+        async with connect(url, max_size=None) as ws:
+            async def receive():
+                async for message in ws:
+                    session.on_message(message)
+
+            receiver = asyncio.create_task(receive())
+            start = time.perf_counter()
+            try:
+                for at, kind, payload in records:
+                    wait = start + at / speed - time.perf_counter()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    if kind == AUDIO:
+                        await ws.send(payload)
+                        session.on_sent(is_speaking(payload))
+                    else:
+                        text = payload.decode("utf-8")
+                        if '"played"' not in text:
+                            await ws.send(text)
+                    session.trace_seconds = at
+                # trace 以有声音频结尾时也视为说完；等待最后一句的回复
+                session.on_sent(False)
+                deadline = time.perf_counter() + tail
+                while session.awaiting is not None and time.perf_counter() < deadline:
+                    await asyncio.sleep(0.05)
+            finally:
+                receiver.cancel()
+    except Exception as e:
+        session.error = f"{type(e).__name__}: {e}"
+    return session
+
+
+async def run_all(traces: List[str], args) -> List[ReplaySession]:
+    limit = asyncio.Semaphore(args.concurrency or len(traces) * args.repeat)
+    rng = random.Random(0)
+
+    async def one(trace: str, delay: float) -> ReplaySession:
+        async with limit:
+            return await replay(trace, args.url, args.speed, args.tail, delay)
+
+    jobs = [one(trace, rng.uniform(0, args.stagger)) for _ in range(args.repeat) for trace in traces]
+    return await asyncio.gather(*jobs)
+
+
+def summarize(sessions: List[ReplaySession], wall: float, speed: float) -> Dict[str, Any]:
+    latencies = [x for s in sessions for x in s.latencies]
+    ok = [s for s in sessions if s.error is None]
+    result = {
+        "sessions": len(sessions),
+        "failed": len(sessions) - len(ok),
+        "speed": speed,
+        "trace_seconds": round(sum(s.trace_seconds for s in ok), 1),
+        "wall_seconds": round(wall, 1),
+        "turns": len(latencies),
+        "unanswered": sum(s.awaiting is not None for s in ok),
+        "barge_ins": sum(s.barge_ins for s in sessions),
+        "downlink_mb": round(sum(s.downlink_bytes for s in sessions) / 1024 / 1024, 2),
+    }
+    if latencies:
+        result.update({f"{name}_ms": round(float(np.percentile(latencies, q)) * 1000)
+                       for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按录制的真实会话回放 /ws 流量并统计轮次延迟")
+    parser.add_argument("traces", nargs="+", help="trace 文件或目录")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速")
+    parser.add_argument("--repeat", type=int, default=1, help="每个 trace 并行回放的份数")
+    parser.add_argument("--concurrency", type=int, default=0, help="同时回放的会话上限，0 表示不限")
+    parser.add_argument("--stagger", type=float, default=1.0, help="各会话开始时间在该范围（秒）内随机错开")
+    parser.add_argument("--tail", type=float, default=10.0, help="trace 结束后等待最后一句回复的时长（秒）")
+    parser.add_argument("--json", help="把结果写入该 JSON 文件（可作为之后的基线）")
+    parser.add_argument("--baseline", help="基线结果 JSON，p95 轮次延迟超出容差时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="相对基线允许的 p95 增幅")
+    args = parser.parse_args()
+
+    traces = find_traces(args.traces)
+    if not traces:
+        sys.exit("没有找到 trace 文件")
+    print(f"回放 {len(traces)} 个 trace × {args.repeat}，{args.speed:g} 倍速 -> {args.url}")
+    start = time.perf_counter()
+    sessions = asyncio.run(run_all(traces, args))
+    result = summarize(sessions, time.perf_counter() - start, args.speed)
+
+    for s in sessions:
+        if s.error:
+            print(f"回放失败 {s.trace}: {s.error}")
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("speed") != args.speed:
+            print(f"⚠️基线倍速为 {baseline.get('speed')}，与本次 {args.speed:g} 不同，结果不可直接比较")
+        if "p95_ms" not in result or "p95_ms" not in baseline:
+            sys.exit("缺少轮次延迟数据，无法与基线比较")
+        limit = baseline["p95_ms"] * (1 + args.tolerance)
+        verdict = "通过" if result["p95_ms"] <= limit else "退化"
+        print(f"p95 轮次延迟 {result['p95_ms']} ms，基线 {baseline['p95_ms']} ms，上限 {limit:.0f} ms：{verdict}")
+        if verdict != "通过":
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
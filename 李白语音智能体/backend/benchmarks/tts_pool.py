@@ -0,0 +1,70 @@
+# backend/benchmarks/tts_pool.py
+"""
+TTS 连接池基准：对比每句新建连接串行合成、连接池串行合成、连接池并行合成
+
+默认在进程内启动本地替身服务（tts_stub_server），无需外网。
+
+用法:
+    python -m backend.benchmarks.tts_pool [--connect-delay 0.15] [--parallel 4]
+"""
+import argparse
+import asyncio
+import time
+
+from backend.benchmarks.tts_stub_server import TTSStubServer
+from backend.speech.tts_pool import TTSConnectionPool
+from backend.utils.text_utils import split_sentences
+
+VOICE = "zh-CN-YunjianNeural"
+RATE = "+0%"
+REPLY = ("君不见黄河之水天上来，奔流到海不复回。君不见高堂明镜悲白发，朝如青丝暮成雪。"
+         "人生得意须尽欢，莫使金樽空对月。天生我材必有用，千金散尽还复来。")
+
+
+async def run(args):
+    server = TTSStubServer(port=args.port, connect_delay=args.connect_delay)
+    await server.start()
+    sentences = split_sentences(REPLY)
+    print(f"{len(sentences)} 句，模拟建连耗时 {args.connect_delay * 1000:.0f}ms")
+
+    try:
+        # 1. 每句新建连接并串行合成（等价于每次创建 edge_tts.Communicate）
+        start = time.perf_counter()
+        for s in sentences:
+            pool = TTSConnectionPool(size=1, url=server.url)
+            await pool.synthesize(s, VOICE, RATE)
+            await pool.close()
+        cold = time.perf_counter() - start
+
+        # 2/3. 预热连接池后串行、并行合成
+        pool = TTSConnectionPool(size=args.parallel, url=server.url, max_parallel=args.parallel)
+        await pool.warm_up()
+        start = time.perf_counter()
+        for s in sentences:
+            await pool.synthesize(s, VOICE, RATE)
+        warm_serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await pool.synthesize_many(sentences, VOICE, RATE)
+        warm_parallel = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await pool.synthesize(max(sentences, key=len), VOICE, RATE)
+        longest = time.perf_counter() - start
+        await pool.close()
+    finally:
+        await server.stop()
+
+    print(f"{'每句新建连接，串行':<20}{cold * 1000:>10.1f} ms")
+    print(f"{'连接池，串行':<20}{warm_serial * 1000:>10.1f} ms")
+    print(f"{'连接池，并行':<20}{warm_parallel * 1000:>10.1f} ms")
+    print(f"{'最长单句':<20}{longest * 1000:>10.1f} ms")
+    print(f"替身服务共建立 {server.connections} 条连接，处理 {server.requests} 个请求")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TTS 连接池与并行合成基准")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connect-delay", type=float, default=0.15, help="模拟建连耗时（秒）")
+    parser.add_argument("--parallel", type=int, default=4, help="连接池大小/并行度")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,104 @@
+# backend/benchmarks/tts_stub_server.py
+"""
+edge-tts 协议的本地替身服务，用于测试和基准，不依赖外网
+
+收到 SSML 请求后按文本长度模拟合成耗时，返回 16kHz 16bit 单声道正弦波 PCM。
+握手延迟（模拟 TLS + websocket 建连）和每字合成耗时均可配置。
+
+用法:
+    python -m backend.benchmarks.tts_stub_server [--port 8765] [--connect-delay 0.15]
+然后设置环境变量 TTS_WS_URL=ws://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import re
+
+import numpy as np
+from websockets.asyncio.server import serve
+
+SAMPLE_RATE = 16000
+
+
+def _tone(seconds: float) -> bytes:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype("<i2").tobytes()
+
+
+def _audio_message(request_id: str, data: bytes) -> bytes:
+    header = f"X-RequestId:{request_id}\r\nContent-Type:audio/x-wav\r\nPath:audio".encode("utf-8")
+    return len(header).to_bytes(2, "big") + header + data
+
+
+class TTSStubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, connect_delay: float = 0.15,
+                 first_byte_delay: float = 0.05, seconds_per_char: float = 0.02,
+                 audio_per_char: float = 0.2, frame_bytes: int = 4096):
+        """
+        Args:
+            connect_delay: 每次建连的额外耗时（秒）
+            first_byte_delay: 收到请求到第一块音频的耗时（秒）
+            seconds_per_char: 每个字的合成耗时（秒）
+            audio_per_char: 每个字对应的音频时长（秒）
+            frame_bytes: 每条音频消息的字节数
+        """
+        self.host = host
+        self.port = port
+        self.connect_delay = connect_delay
+        self.first_byte_delay = first_byte_delay
+        self.seconds_per_char = seconds_per_char
+        self.audio_per_char = audio_per_char
+        self.frame_bytes = frame_bytes
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def _process_request(self, connection, request):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)
+
+    async def _handler(self, websocket):
+        async for message in websocket:
+            if not isinstance(message, str) or "Path:ssml" not in message:
+                continue
+            self.requests += 1
+            request_id = re.search(r"X-RequestId:(\w+)", message).group(1)
+            text = re.sub(r"<[^>]+>", "", message.split("\r\n\r\n", 1)[1])
+
+            await websocket.send(f"X-RequestId:{request_id}\r\nPath:turn.start\r\n\r\n{{}}")
+            await asyncio.sleep(self.first_byte_delay)
+            pcm = _tone(len(text) * self.audio_per_char)
+            frames = range(0, len(pcm), self.frame_bytes)
+            delay = len(text) * self.seconds_per_char / max(len(frames), 1)
+            for i in frames:
+                await asyncio.sleep(delay)
+                await websocket.send(_audio_message(request_id, pcm[i:i + self.frame_bytes]))
+            await websocket.send(f"X-RequestId:{request_id}\r\nPath:turn.end\r\n\r\n{{}}")
+
+    async def start(self) -> None:
+        self._server = await serve(self._handler, self.host, self.port,
+                                   process_request=self._process_request)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def _serve_forever(args):
+    server = TTSStubServer(args.host, args.port, args.connect_delay)
+    await server.start()
+    print(f"TTS替身服务已启动: {server.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="edge-tts 协议本地替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connect-delay", type=float, default=0.15, help="模拟建连耗时（秒）")
+    asyncio.run(_serve_forever(parser.parse_args()))
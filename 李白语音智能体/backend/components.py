@@ -0,0 +1,194 @@
+# backend/components.py
+"""
+ASR / TTS / LLM / 垫话库 / 神经网络 VAD 等组件的延迟加载注册表
+
+导入任何模块都不会加载模型：组件在第一次 get() 时才构造，或在启动时通过
+startup() / preload() 显式预加载。注册表记录每个组件的加载与预热耗时，
+用于启动耗时报告和就绪检查（/ready）。
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.config import settings
+from backend.utils.thread_utils import io_executor
+
+# 进程内第一次导入本模块的时刻，作为启动耗时的起点
+_PROCESS_START = time.perf_counter()
+
+
+class LazyComponent:
+    """首次使用时才构造的组件；构造过程线程安全，只执行一次"""
+
+    def __init__(self, name: str, factory: Callable[[], Any], warm_up: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            name: 组件名称
+            factory: 构造函数（同步，可在线程池中执行）
+            warm_up: 预热函数，参数为组件实例，可以是协程函数
+        """
+        self.name = name
+        self.factory = factory
+        self.warm_up_fn = warm_up
+        self._instance = None
+        self._lock = threading.Lock()
+        self.load_time: Optional[float] = None
+        self.warm_time: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def warm(self) -> bool:
+        return self.ready_at is not None
+
+    def get(self) -> Any:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    self._instance = self.factory()
+                    self.load_time = time.perf_counter() - start
+                    print(f"组件 {self.name} 加载完成，耗时 {self.load_time:.2f} 秒")
+        return self._instance
+
+    async def warm_up(self) -> None:
+        """在线程池中加载并执行预热（同步的预热同样在线程池中执行，不阻塞事件循环）"""
+        if self.warm:
+            return
+        try:
+            instance = await io_executor.run(self.get)
+            start = time.perf_counter()
+            if asyncio.iscoroutinefunction(self.warm_up_fn):
+                await self.warm_up_fn(instance)
+            elif self.warm_up_fn is not None:
+                result = await io_executor.run(self.warm_up_fn, instance)
+                if asyncio.iscoroutine(result):
+                    await result
+            self.warm_time = time.perf_counter() - start
+            self.ready_at = time.perf_counter()
+        except Exception as e:
+            self.error = str(e)
+            print(f"组件 {self.name} 预热失败: {e}")
+
+
+class ComponentRegistry:
+    def __init__(self):
+        self._components: Dict[str, LazyComponent] = {}
+        self.required: List[str] = []
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 warm_up: Optional[Callable[[Any], Any]] = None) -> LazyComponent:
+        component = LazyComponent(name, factory, warm_up)
+        self._components[name] = component
+        return component
+
+    def get(self, name: str) -> Any:
+        return self._components[name].get()
+
+    async def aget(self, name: str) -> Any:
+        """在协程中获取组件：尚未加载时在线程池中加载，不阻塞事件循环"""
+        component = self._components[name]
+        if component.loaded:
+            return component.get()
+        return await io_executor.run(component.get)
+
+    def get_loaded(self, name: str) -> Optional[Any]:
+        """已加载时返回组件实例，否则返回 None（不触发加载）"""
+        component = self._components[name]
+        return component.get() if component.loaded else None
+
+    def _select(self, names: Optional[List[str]]) -> List[LazyComponent]:
+        names = settings.PRELOAD_COMPONENTS if names is None else names
+        return [self._components[n] for n in names if n in self._components]
+
+    def preload(self, names: Optional[List[str]] = None) -> None:
+        """同步加载组件（不预热），如多 worker 部署时在 fork 前的主进程中调用"""
+        for component in self._select(names):
+            component.get()
+
+    async def startup(self, names: Optional[List[str]] = None) -> None:
+        """并发加载并预热组件，完成后打印启动耗时报告；这些组件全部预热后 /ready 才返回就绪"""
+        components = self._select(names)
+        self.required = [c.name for c in components]
+        await asyncio.gather(*(c.warm_up() for c in components))
+        self.print_report()
+
+    def is_ready(self) -> bool:
+        return all(self._components[n].warm for n in self.required)
+
+    def report(self) -> Dict[str, Any]:
+        """启动耗时明细：各组件加载/预热耗时，以及从进程启动到就绪的时间"""
+        components = {}
+        for name, c in self._components.items():
+            components[name] = {
+                "loaded": c.loaded,
+                "warm": c.warm,
+                "load_seconds": round(c.load_time, 3) if c.load_time is not None else None,
+                "warm_up_seconds": round(c.warm_time, 3) if c.warm_time is not None else None,
+                "ready_after_seconds": round(c.ready_at - _PROCESS_START, 3) if c.ready_at else None,
+                "error": c.error,
+            }
+        return {"ready": self.is_ready(), "required": self.required, "components": components}
+
+    def print_report(self) -> None:
+        report = self.report()
+        print("===== 启动耗时报告 =====")
+        for name, r in report["components"].items():
+            if not r["loaded"]:
+                print(f"  - {name}: 未加载（首次使用时加载）")
+                continue
+            print(f"  - {name}: 加载 {r['load_seconds']}s，预热 {r['warm_up_seconds']}s，"
+                  f"进程启动后 {r['ready_after_seconds']}s 就绪" + (f"，错误: {r['error']}" if r["error"] else ""))
+        print(f"  就绪: {report['ready']}")
+
+
+def _create_asr():
+    from backend.speech.asr import ASR
+    return ASR()
+
+
+def _warm_up_asr(asr):
+    asr.warm_up()
+
+
+def _create_tts():
+    from backend.speech.tts import TTSGenerator
+    tts = TTSGenerator()
+    tts.preload()
+    return tts
+
+
+def _create_filler():
+    from backend.speech.filler import FillerBank
+    return FillerBank()
+
+
+async def _warm_up_filler(bank):
+    if not settings.FILLER_ENABLED:
+        return
+    # TTS 可能尚未加载，在线程池中获取，不阻塞事件循环
+    tts = await components.aget("tts")
+    await bank.prepare(tts)
+
+
+def _create_llm():
+    from backend.models.load_model import QwenModel
+    return QwenModel()
+
+
+def _create_vad():
+    from backend.speech.neural_vad import create_batched_vad
+    return create_batched_vad()
+
+
+components = ComponentRegistry()
+components.register("asr", _create_asr, _warm_up_asr)
+components.register("tts", _create_tts, lambda tts: tts.warm_up())
+components.register("llm", _create_llm)
+components.register("filler", _create_filler, _warm_up_filler)
+components.register("vad", _create_vad)
@@ -10,18 +10,138 @@ QWEN_API_KEY = os.getenv("QWEN_API_KEY")
 QWEN_API_URL = os.getenv("QWEN_API_URL")
 QWEN_MODEL_NAME = os.getenv("QWEN_MODEL_NAME")
 
+# 备用端点/模型：对冲请求发往这里，未配置时沿用主端点的对应项
+QWEN_FALLBACK_API_URL = os.getenv("QWEN_FALLBACK_API_URL") or QWEN_API_URL
+QWEN_FALLBACK_API_KEY = os.getenv("QWEN_FALLBACK_API_KEY") or QWEN_API_KEY
+QWEN_FALLBACK_MODEL_NAME = os.getenv("QWEN_FALLBACK_MODEL_NAME") or QWEN_MODEL_NAME
+
+# LLM请求策略：单次调用总截止时间；主请求超过近期延迟的 LLM_HEDGE_PERCENTILE 分位数
+# （不低于 LLM_HEDGE_MIN_DELAY 秒）未返回时向备用端点发对冲请求；失败按抖动退避重试，
+# 对冲与重试合计不超过请求量的 LLM_RETRY_BUDGET 比例
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 20))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 2.0))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", 3))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", 0.2))
+LLM_RETRY_BUDGET = float(os.getenv("LLM_RETRY_BUDGET", 0.1))
+
 # 语音配置
 ASR_MODEL = os.getenv("ASR_MODEL")
 TTS_MODEL = os.getenv("TTS_MODEL")
 
+# ASR引擎配置（whisper / faster-whisper）
+ASR_ENGINE = os.getenv("ASR_ENGINE", "whisper")
+ASR_COMPUTE_TYPE = os.getenv("ASR_COMPUTE_TYPE", "int8")
+ASR_CPU_THREADS = int(os.getenv("ASR_CPU_THREADS", 0))
+ASR_NUM_WORKERS = int(os.getenv("ASR_NUM_WORKERS", 1))
+# ASR 推理设备（cpu / cuda）；为空时 whisper 在 GPU 可用时用 cuda，faster-whisper 用 cpu
+ASR_DEVICE = os.getenv("ASR_DEVICE", "")
+
+# 级联识别：ASR_CASCADE_MODEL 非空时先用该小模型识别，各段 avg_logprob 不低于 ASR_CASCADE_LOGPROB
+# 且 no_speech_prob 不高于 ASR_CASCADE_NO_SPEECH 时直接采用，否则用 ASR_MODEL 重新识别
+ASR_CASCADE_MODEL = os.getenv("ASR_CASCADE_MODEL", "")
+ASR_CASCADE_LOGPROB = float(os.getenv("ASR_CASCADE_LOGPROB", -0.5))
+ASR_CASCADE_NO_SPEECH = float(os.getenv("ASR_CASCADE_NO_SPEECH", 0.4))
+
+# 短句识别模式：按实际时长截断编码器输入，固定语种，置信度足够时不做温度回退
+ASR_LANGUAGE = os.getenv("ASR_LANGUAGE", "zh")
+ASR_SHORT_MODE = os.getenv("ASR_SHORT_MODE", "true").lower() in ("1", "true", "yes")
+ASR_SHORT_MAX_SECONDS = float(os.getenv("ASR_SHORT_MAX_SECONDS", 8))
+ASR_SHORT_BUCKETS = [int(b) for b in os.getenv("ASR_SHORT_BUCKETS", "2,4,8,15,30").split(",")]
+
+# TTS引擎配置（edge：edge-tts 在线服务；local：coqui-tts 本地离线合成，模型名取 TTS_MODEL）
+TTS_ENGINE = os.getenv("TTS_ENGINE", "edge")
+
+# TTS连接池配置（TTS_WS_URL 为空时连接 edge-tts 官方服务，测试时可指向本地替身服务）
+TTS_WS_URL = os.getenv("TTS_WS_URL", "")
+TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "raw-16khz-16bit-mono-pcm")
+TTS_POOL_SIZE = int(os.getenv("TTS_POOL_SIZE", 4))
+TTS_MAX_PARALLEL = int(os.getenv("TTS_MAX_PARALLEL", 4))
+TTS_IDLE_TIMEOUT = float(os.getenv("TTS_IDLE_TIMEOUT", 60))
+
 # 音频文件配置
 AUDIO_DIR = os.getenv("AUDIO_DIR")
 USER_AUDIO_PREFIX = os.getenv("USER_AUDIO_PREFIX")
 AI_AUDIO_PREFIX = os.getenv("AI_AUDIO_PREFIX")
 AUDIO_FORMAT = os.getenv("AUDIO_FORMAT")
+# 音频目录保留策略：最长保留时间（秒）、总大小上限（字节）、淘汰间隔（秒）、每轮最多删除的文件数
+AUDIO_MAX_AGE = float(os.getenv("AUDIO_MAX_AGE", 3600))
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", 1024 * 1024 * 1024))
+AUDIO_SWEEP_INTERVAL = float(os.getenv("AUDIO_SWEEP_INTERVAL", 30))
+AUDIO_EVICT_BATCH = int(os.getenv("AUDIO_EVICT_BATCH", 100))
+
+# 通话录音归档（默认关闭）：格式 flac / opus，批量写入间隔（秒），待写队列上限（帧数）
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() in ("1", "true", "yes")
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR") or os.path.join(AUDIO_DIR or "audio_files", "archive")
+ARCHIVE_FORMAT = os.getenv("ARCHIVE_FORMAT", "flac")
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", 2.0))
+ARCHIVE_QUEUE_SIZE = int(os.getenv("ARCHIVE_QUEUE_SIZE", 2000))
+# 会话流量录制（可选）：客户端原始上行消息及到达时刻写入 TRACE_DIR 下的二进制 trace，
+# 供 backend.benchmarks.traffic_replay 回放压测；批量写入间隔沿用 ARCHIVE_FLUSH_INTERVAL
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_DIR = os.getenv("TRACE_DIR") or os.path.join(AUDIO_DIR or "audio_files", "traces")
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", 2000))
+
+# 实时会话配置：每个会话预分配的话语缓冲区时长（秒）
+SESSION_BUFFER_SECONDS = float(os.getenv("SESSION_BUFFER_SECONDS", 30))
+# 单句最长时长（秒）：持续不静音时，在最近 UTTERANCE_SPLIT_SEARCH_SECONDS 秒内最安静的一帧处强制切分
+MAX_UTTERANCE_SECONDS = float(os.getenv("MAX_UTTERANCE_SECONDS", 15))
+UTTERANCE_SPLIT_SEARCH_SECONDS = float(os.getenv("UTTERANCE_SPLIT_SEARCH_SECONDS", 2))
+# 下行音频：每块时长（毫秒）；最多领先客户端播放进度 AUDIO_SEND_LEAD_MS 毫秒；
+# 客户端播放累计落后实时超过 AUDIO_SLOW_CONSUMER_MS 毫秒时记为慢消费者
+AUDIO_CHUNK_MS = int(os.getenv("AUDIO_CHUNK_MS", 64))
+AUDIO_SEND_LEAD_MS = int(os.getenv("AUDIO_SEND_LEAD_MS", 300))
+AUDIO_SLOW_CONSUMER_MS = int(os.getenv("AUDIO_SLOW_CONSUMER_MS", 1000))
+# 单个会话的内存上限（MB）：话语缓冲区 + 待处理音频队列 + 待发送的TTS音频，超出时丢弃上行音频、截断回复
+SESSION_MEMORY_LIMIT_MB = float(os.getenv("SESSION_MEMORY_LIMIT_MB", 32))
+
+# 说话检测（energy：-40dBFS 能量门限；neural：所有会话共享的批量 Silero VAD，需要 onnxruntime 和模型文件，
+# 加载失败时回退到能量门限）。每 VAD_TICK_MS 毫秒批量推理一次；概率超过 VAD_THRESHOLD 判为说话，
+# 低于阈值持续 VAD_MIN_SILENCE_MS 毫秒判为停止
+VAD_ENGINE = os.getenv("VAD_ENGINE", "energy")
+VAD_MODEL_PATH = os.getenv("VAD_MODEL_PATH", "models/silero_vad.onnx")
+VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", 0.5))
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", 300))
+VAD_TICK_MS = int(os.getenv("VAD_TICK_MS", 32))
+VAD_THREADS = int(os.getenv("VAD_THREADS", 1))
+
+# 准入控制：并发上限与排队时间预算（秒），超出预算的请求被拒绝并以预先合成的“忙碌”回复降级
+ASR_MAX_CONCURRENCY = int(os.getenv("ASR_MAX_CONCURRENCY", 2))
+ASR_QUEUE_BUDGET = float(os.getenv("ASR_QUEUE_BUDGET", 2.0))
+# ASR 调度：等待超过该时长（秒）的任务不论优先级和时长都优先执行，避免长任务被饿死
+ASR_AGING_SECONDS = float(os.getenv("ASR_AGING_SECONDS", 5.0))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_QUEUE_BUDGET = float(os.getenv("LLM_QUEUE_BUDGET", 3.0))
+# 专用线程池：LLM 调用线程数（默认为并发上限的两倍，留出准入排队的线程）、读盘线程数、每个线程池的在途任务上限
+EXECUTOR_LLM_WORKERS = int(os.getenv("EXECUTOR_LLM_WORKERS", LLM_MAX_CONCURRENCY * 2))
+EXECUTOR_IO_WORKERS = int(os.getenv("EXECUTOR_IO_WORKERS", 4))
+EXECUTOR_MAX_PENDING = int(os.getenv("EXECUTOR_MAX_PENDING", 64))
+# 事件循环监控：每 LOOP_MONITOR_INTERVAL 秒探测一次调度延迟；单个回调阻塞超过 LOOP_BLOCK_THRESHOLD 秒时打印其调用栈
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() in ("1", "true", "yes")
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.05))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", 0.1))
+BUSY_REPLY_TEXT = os.getenv("BUSY_REPLY_TEXT", "今日来访者众，容我稍歇片刻，请君稍后再叙。")
+
+# 垫话：LLM 超过 FILLER_DELAY 秒仍未返回时，先播放一句预先合成的垫话；FILLER_PHRASES 用 | 分隔，留空使用内置垫话
+FILLER_ENABLED = os.getenv("FILLER_ENABLED", "true").lower() in ("1", "true", "yes")
+FILLER_DELAY = float(os.getenv("FILLER_DELAY", 0.8))
+FILLER_PHRASES = [p for p in os.getenv("FILLER_PHRASES", "").split("|") if p.strip()]
+
+# 启动配置：服务启动时预加载并预热的组件（逗号分隔，可选 asr/tts/llm/filler/vad），全部预热后 /ready 才返回就绪；
+# 未列出的组件在首次使用时加载
+PRELOAD_COMPONENTS = [c.strip() for c in os.getenv("PRELOAD_COMPONENTS", "asr,tts,llm,filler").split(",") if c.strip()]
 
 # 对话配置
 MAX_HISTORY_LENGTH = int(os.getenv("MAX_HISTORY_LENGTH", 10))
+
+# 语音回复长度控制：流式生成，预计朗读时长达到 VOICE_REPLY_TARGET_SECONDS 后在下一个句末处停止；
+# max_tokens 按近期回复长度自适应，介于 VOICE_MIN_TOKENS 与 VOICE_MAX_TOKENS 之间；
+# VOICE_CHARS_PER_SECOND 为朗读语速（字/秒），用于把时长换算成字数
+VOICE_REPLY_CONTROL = os.getenv("VOICE_REPLY_CONTROL", "true").lower() in ("1", "true", "yes")
+VOICE_REPLY_TARGET_SECONDS = float(os.getenv("VOICE_REPLY_TARGET_SECONDS", 15))
+VOICE_CHARS_PER_SECOND = float(os.getenv("VOICE_CHARS_PER_SECOND", 4.5))
+VOICE_MIN_TOKENS = int(os.getenv("VOICE_MIN_TOKENS", 64))
+VOICE_MAX_TOKENS = int(os.getenv("VOICE_MAX_TOKENS", 2048))
 TEMPERATURE = float(os.getenv("TEMPERATURE", 0.7))    
 
 # 创建settings对象
@@ -29,12 +149,85 @@ settings = SimpleNamespace(
     QWEN_API_KEY=QWEN_API_KEY,
     QWEN_API_URL=QWEN_API_URL,
     QWEN_MODEL_NAME=QWEN_MODEL_NAME,
+    QWEN_FALLBACK_API_URL=QWEN_FALLBACK_API_URL,
+    QWEN_FALLBACK_API_KEY=QWEN_FALLBACK_API_KEY,
+    QWEN_FALLBACK_MODEL_NAME=QWEN_FALLBACK_MODEL_NAME,
+    LLM_TIMEOUT=LLM_TIMEOUT,
+    LLM_HEDGE_PERCENTILE=LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_DELAY=LLM_HEDGE_MIN_DELAY,
+    LLM_MAX_ATTEMPTS=LLM_MAX_ATTEMPTS,
+    LLM_RETRY_BACKOFF=LLM_RETRY_BACKOFF,
+    LLM_RETRY_BUDGET=LLM_RETRY_BUDGET,
     ASR_MODEL=ASR_MODEL,
     TTS_MODEL=TTS_MODEL,
+    ASR_ENGINE=ASR_ENGINE,
+    ASR_COMPUTE_TYPE=ASR_COMPUTE_TYPE,
+    ASR_CPU_THREADS=ASR_CPU_THREADS,
+    ASR_NUM_WORKERS=ASR_NUM_WORKERS,
+    ASR_DEVICE=ASR_DEVICE,
+    ASR_CASCADE_MODEL=ASR_CASCADE_MODEL,
+    ASR_CASCADE_LOGPROB=ASR_CASCADE_LOGPROB,
+    ASR_CASCADE_NO_SPEECH=ASR_CASCADE_NO_SPEECH,
+    ASR_LANGUAGE=ASR_LANGUAGE,
+    ASR_SHORT_MODE=ASR_SHORT_MODE,
+    ASR_SHORT_MAX_SECONDS=ASR_SHORT_MAX_SECONDS,
+    ASR_SHORT_BUCKETS=ASR_SHORT_BUCKETS,
+    TTS_ENGINE=TTS_ENGINE,
+    TTS_WS_URL=TTS_WS_URL,
+    TTS_OUTPUT_FORMAT=TTS_OUTPUT_FORMAT,
+    TTS_POOL_SIZE=TTS_POOL_SIZE,
+    TTS_MAX_PARALLEL=TTS_MAX_PARALLEL,
+    TTS_IDLE_TIMEOUT=TTS_IDLE_TIMEOUT,
     AUDIO_DIR=AUDIO_DIR,
     USER_AUDIO_PREFIX=USER_AUDIO_PREFIX,
     AI_AUDIO_PREFIX=AI_AUDIO_PREFIX,
     AUDIO_FORMAT=AUDIO_FORMAT,
+    AUDIO_MAX_AGE=AUDIO_MAX_AGE,
+    AUDIO_MAX_BYTES=AUDIO_MAX_BYTES,
+    AUDIO_SWEEP_INTERVAL=AUDIO_SWEEP_INTERVAL,
+    AUDIO_EVICT_BATCH=AUDIO_EVICT_BATCH,
+    ARCHIVE_ENABLED=ARCHIVE_ENABLED,
+    ARCHIVE_DIR=ARCHIVE_DIR,
+    ARCHIVE_FORMAT=ARCHIVE_FORMAT,
+    ARCHIVE_FLUSH_INTERVAL=ARCHIVE_FLUSH_INTERVAL,
+    ARCHIVE_QUEUE_SIZE=ARCHIVE_QUEUE_SIZE,
+    TRACE_ENABLED=TRACE_ENABLED,
+    TRACE_DIR=TRACE_DIR,
+    TRACE_QUEUE_SIZE=TRACE_QUEUE_SIZE,
+    SESSION_BUFFER_SECONDS=SESSION_BUFFER_SECONDS,
+    MAX_UTTERANCE_SECONDS=MAX_UTTERANCE_SECONDS,
+    UTTERANCE_SPLIT_SEARCH_SECONDS=UTTERANCE_SPLIT_SEARCH_SECONDS,
+    AUDIO_CHUNK_MS=AUDIO_CHUNK_MS,
+    AUDIO_SEND_LEAD_MS=AUDIO_SEND_LEAD_MS,
+    AUDIO_SLOW_CONSUMER_MS=AUDIO_SLOW_CONSUMER_MS,
+    SESSION_MEMORY_LIMIT_MB=SESSION_MEMORY_LIMIT_MB,
+    ASR_MAX_CONCURRENCY=ASR_MAX_CONCURRENCY,
+    ASR_QUEUE_BUDGET=ASR_QUEUE_BUDGET,
+    ASR_AGING_SECONDS=ASR_AGING_SECONDS,
+    LLM_MAX_CONCURRENCY=LLM_MAX_CONCURRENCY,
+    LLM_QUEUE_BUDGET=LLM_QUEUE_BUDGET,
+    VAD_ENGINE=VAD_ENGINE,
+    VAD_MODEL_PATH=VAD_MODEL_PATH,
+    VAD_THRESHOLD=VAD_THRESHOLD,
+    VAD_MIN_SILENCE_MS=VAD_MIN_SILENCE_MS,
+    VAD_TICK_MS=VAD_TICK_MS,
+    VAD_THREADS=VAD_THREADS,
+    EXECUTOR_LLM_WORKERS=EXECUTOR_LLM_WORKERS,
+    EXECUTOR_IO_WORKERS=EXECUTOR_IO_WORKERS,
+    EXECUTOR_MAX_PENDING=EXECUTOR_MAX_PENDING,
+    LOOP_MONITOR_ENABLED=LOOP_MONITOR_ENABLED,
+    LOOP_MONITOR_INTERVAL=LOOP_MONITOR_INTERVAL,
+    LOOP_BLOCK_THRESHOLD=LOOP_BLOCK_THRESHOLD,
+    BUSY_REPLY_TEXT=BUSY_REPLY_TEXT,
+    FILLER_ENABLED=FILLER_ENABLED,
+    FILLER_DELAY=FILLER_DELAY,
+    FILLER_PHRASES=FILLER_PHRASES,
+    PRELOAD_COMPONENTS=PRELOAD_COMPONENTS,
     MAX_HISTORY_LENGTH=MAX_HISTORY_LENGTH,
+    VOICE_REPLY_CONTROL=VOICE_REPLY_CONTROL,
+    VOICE_REPLY_TARGET_SECONDS=VOICE_REPLY_TARGET_SECONDS,
+    VOICE_CHARS_PER_SECOND=VOICE_CHARS_PER_SECOND,
+    VOICE_MIN_TOKENS=VOICE_MIN_TOKENS,
+    VOICE_MAX_TOKENS=VOICE_MAX_TOKENS,
     TEMPERATURE=TEMPERATURE
 )
\ No newline at end of file
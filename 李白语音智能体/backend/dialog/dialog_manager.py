@@ -1,6 +1,8 @@
 # backend/dialog/dialog_manager.py
 from typing import List, Dict, Any
-from backend.models.load_model import model
+from backend.config import settings
+from backend.models.load_model import get_model
+from backend.dialog.generation_controller import generation_controller
 from backend.dialog.prompt_templates import SYSTEM_PROMPT
 from backend.dialog.conversation_history import ConversationHistory
 
@@ -31,8 +33,11 @@ class DialogManager:
         # 获取完整对话历史（包括系统提示）
         messages = self.get_initial_messages() + self.conversation_history.get_history()
         
-        # 调用模型生成回复
-        response = model.generate_response(messages, temperature)
+        # 调用模型生成回复；语音回复由生成控制器限制长度，历史中记录的是截断后的文本
+        if settings.VOICE_REPLY_CONTROL:
+            response = generation_controller.generate(messages, temperature)
+        else:
+            response = get_model().generate_response(messages, temperature)
         
         # 将AI回复添加到对话历史
         self.conversation_history.add_message("assistant", response)
@@ -0,0 +1,134 @@
+# backend/dialog/generation_controller.py
+"""
+语音回复的生成控制
+
+提示词要求回复简短，但模型偶尔仍会长篇大论，LLM 和 TTS 都要为多出来的部分付出时间。这里在语音路径上：
+    - 以流式方式生成，估算的朗读时长达到目标后，在下一个句末处停止并中止上游生成
+    - max_tokens 按近期回复长度自适应，而不是固定 2048
+    - 模型因 max_tokens 截断时，去掉末尾不完整的半句
+返回的是截断后的文本，由 DialogManager 写入对话历史，保证历史与用户实际听到的一致。
+"""
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.models.load_model import FALLBACK_REPLY, get_model
+from backend.utils.text_utils import complete_sentences, sentence_end, spoken_length
+
+# 中文回复约 1 字 1 token（偏保守的估计）
+TOKENS_PER_CHAR = 1.0
+# 至少积累这么多轮回复后才按近期长度调整 max_tokens
+MIN_SAMPLES = 10
+
+
+class GenerationController:
+    def __init__(self, target_seconds: float, chars_per_second: float, min_tokens: int, max_tokens: int,
+                 window: int = 50):
+        """
+        Args:
+            target_seconds: 目标朗读时长（秒），达到后在下一个句末停止
+            chars_per_second: 朗读语速（字/秒）
+            min_tokens: max_tokens 的下限
+            max_tokens: max_tokens 的上限
+            window: 统计近期回复长度的轮数
+        """
+        self.target_chars = max(1, int(target_seconds * chars_per_second))
+        self.chars_per_second = chars_per_second
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.recent_lengths = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.truncated = 0
+        self.length_capped = 0
+        self.failed = 0
+        self.spoken_chars = 0
+
+    def token_cap(self) -> int:
+        """
+        本轮的 max_tokens：
+            - 上限为目标字数的 1.5 倍（越过目标后还需要说完当前这句），且不超过 max_tokens
+            - 近期回复普遍较短时，收紧到近期长度 95 分位数的 2 倍，模型跑题时尽早被截住
+        """
+        ceiling = self.target_chars * TOKENS_PER_CHAR * 1.5
+        with self._lock:
+            lengths = list(self.recent_lengths)
+        if len(lengths) >= MIN_SAMPLES:
+            ceiling = min(ceiling, float(np.percentile(lengths, 95)) * TOKENS_PER_CHAR * 2)
+        return int(min(self.max_tokens, max(self.min_tokens, ceiling)))
+
+    async def agenerate(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+        """流式生成一轮语音回复，返回（可能被截断的）回复文本"""
+        text = ""
+        crossed_at = -1   # 预计朗读时长越过目标时文本的长度
+        finish_reason = None
+        cap = self.token_cap()
+        stream = get_model().stream_response(messages, temperature, cap)
+        try:
+            async for delta, finish_reason in stream:
+                text += delta
+                if crossed_at < 0 and spoken_length(text) >= self.target_chars:
+                    crossed_at = len(text) - len(delta)
+                if crossed_at >= 0:
+                    end = sentence_end(text, crossed_at)
+                    # 句末标点恰好在末尾时，下一个增量可能还有闭合引号，等下一个增量再截
+                    if 0 < end < len(text):
+                        self._record(text[:end], natural_length=spoken_length(text), truncated=True)
+                        return text[:end].strip()
+        except Exception as e:
+            print(f"LLM流式生成中断: {e}")
+            # 中途失败：只保留已完整说完的句子，一句都没有时用兜底回复；
+            # 不计入近期长度，失败不应放宽下一轮的 max_tokens
+            kept = complete_sentences(text).strip() if sentence_end(text) > 0 else ""
+            with self._lock:
+                self.failed += 1
+            self._record(kept or FALLBACK_REPLY, natural_length=None, truncated=bool(kept))
+            return kept or FALLBACK_REPLY
+        finally:
+            await stream.aclose()
+
+        natural_length = spoken_length(text)
+        if finish_reason == "length":
+            # 被 max_tokens 截断：只保留完整的句子；
+            # 按上限的两倍记录长度，使下一轮的上限回升，而不是越截越短
+            with self._lock:
+                self.length_capped += 1
+            natural_length = int(cap / TOKENS_PER_CHAR * 2)
+            text = complete_sentences(text)
+        text = text.strip() or FALLBACK_REPLY
+        self._record(text, natural_length=natural_length, truncated=False)
+        return text
+
+    def generate(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+        """agenerate 的同步版本，在线程池线程中调用"""
+        return get_model().run_sync(self.agenerate(messages, temperature))
+
+    def _record(self, reply: str, natural_length: Optional[int], truncated: bool) -> None:
+        """natural_length 为 None 时（生成中途失败）不计入近期长度"""
+        with self._lock:
+            self.turns += 1
+            self.truncated += truncated
+            self.spoken_chars += spoken_length(reply)
+            if natural_length is not None:
+                self.recent_lengths.append(natural_length)
+
+    def stats(self) -> Dict[str, Any]:
+        token_cap = self.token_cap()
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "truncated": self.truncated,
+                "length_capped": self.length_capped,
+                "failed": self.failed,
+                "target_seconds": round(self.target_chars / self.chars_per_second, 1),
+                "avg_reply_seconds": round(self.spoken_chars / max(self.turns, 1) / self.chars_per_second, 2),
+                "token_cap": token_cap,
+            }
+
+
+# 进程内共享：近期回复长度在所有会话间统计
+generation_controller = GenerationController(settings.VOICE_REPLY_TARGET_SECONDS, settings.VOICE_CHARS_PER_SECOND,
+                                             settings.VOICE_MIN_TOKENS, settings.VOICE_MAX_TOKENS)
@@ -1,8 +1,18 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 import uvicorn
 import asyncio
 from backend.websocket_server import RealTimeWebSocketServer
+from backend.components import components
+from backend.dialog.generation_controller import generation_controller
+from backend.utils.admission import admission_stats
+from backend.speech.call_archive import call_archive
+from backend.speech.traffic_trace import traffic_recorder
+from backend.models.load_model import llm_stats
+from backend.speech.asr import asr_stats
+from backend.utils.loop_monitor import loop_monitor
+from backend.utils.thread_utils import executor_stats
+from backend.config import settings
 
 app = FastAPI(title="李白语音智能体")
 
@@ -33,35 +43,50 @@ html = """
     let sourceNode;
     let isPlaying = false;
     let currentAudioBuffer = null;
+    // 下行音频按顺序排队播放；向服务器回报已播完（或已丢弃）的累计时长，服务器据此限速
+    let nextPlayTime = 0;
+    let receivedSeconds = 0;
+    let doneSeconds = 0;
+    let scheduledSources = [];
     
     document.getElementById("start").onclick = async () => {
         document.getElementById("status").textContent = "正在连接...";
         
+        // 先创建AudioContext，连接建立后向服务器声明上行采样率
+        if (!audioContext) {
+            audioContext = new (window.AudioContext || window.webkitAudioContext)();
+        }
+        
         // 创建WebSocket连接
         ws = new WebSocket("ws://localhost:8000/ws");
         ws.binaryType = 'arraybuffer';
 
         ws.onopen = () => {
             console.log("WebSocket 已连接");
+            ws.send(JSON.stringify({ type: "start", sample_rate: audioContext.sampleRate }));
+            nextPlayTime = 0;
+            receivedSeconds = 0;
+            doneSeconds = 0;
+            scheduledSources = [];
             document.getElementById("status").textContent = "已连接，开始录音...";
         };
         
-        ws.onmessage = async (e) => {
+        ws.onmessage = (e) => {
+            if (typeof e.data === "string") {
+                const message = JSON.parse(e.data);
+                if (message.type === "stop_audio") {
+                    stopPlayback();
+                }
+                return;
+            }
             if (e.data instanceof ArrayBuffer) {
-                document.getElementById("status").textContent = "收到语音，正在解码...";
-                
                 try {
                     // 初始化AudioContext（如果尚未初始化）
                     if (!audioContext) {
                         audioContext = new (window.AudioContext || window.webkitAudioContext)();
                     }
-                    
-                    // 解码WAV音频数据
-                    const audioBuffer = await audioContext.decodeAudioData(e.data);
-                    
-                    // 播放音频
-                    playAudio(audioBuffer);
-                    
+                    // 每块是 16kHz 单声道 16bit 的 WAV，直接解析 PCM（同步、保持顺序）
+                    playAudio(wavChunkToBuffer(e.data));
                 } catch (error) {
                     console.error("解码音频失败:", error);
                     document.getElementById("status").textContent = "播放失败: " + error.message;
@@ -151,23 +176,58 @@ html = """
         document.getElementById("status").textContent = "已停止";
     };
 
+    function wavChunkToBuffer(arrayBuffer) {
+        const view = new DataView(arrayBuffer);
+        const sampleRate = view.getUint32(24, true);
+        const pcm = new Int16Array(arrayBuffer, 44, (arrayBuffer.byteLength - 44) >> 1);
+        const audioBuffer = audioContext.createBuffer(1, pcm.length, sampleRate);
+        const channel = audioBuffer.getChannelData(0);
+        for (let i = 0; i < pcm.length; i++) {
+            channel[i] = pcm[i] / 32768;
+        }
+        return audioBuffer;
+    }
+
+    function sendPlayed() {
+        if (ws && ws.readyState === WebSocket.OPEN) {
+            ws.send(JSON.stringify({ type: "played", seconds: doneSeconds }));
+        }
+    }
+
+    function stopPlayback() {
+        // 丢弃尚未播放的音频，全部计为已完成
+        scheduledSources.forEach(source => { source.onended = null; source.stop(); });
+        scheduledSources = [];
+        nextPlayTime = 0;
+        doneSeconds = receivedSeconds;
+        isPlaying = false;
+        sendPlayed();
+    }
+
     function playAudio(audioBuffer) {
         document.getElementById("status").textContent = "正在播放...";
         currentAudioBuffer = audioBuffer;
         isPlaying = true;
+        receivedSeconds += audioBuffer.duration;
         
-        // 创建AudioBufferSourceNode播放音频
+        // 创建AudioBufferSourceNode，接在上一块之后播放
         const source = audioContext.createBufferSource();
         source.buffer = audioBuffer;
         source.connect(audioContext.destination);
+        nextPlayTime = Math.max(nextPlayTime, audioContext.currentTime);
+        source.start(nextPlayTime);
+        nextPlayTime += audioBuffer.duration;
+        scheduledSources.push(source);
         
-        // 开始播放
-        source.start();
-        
-        // 监听播放结束事件
+        // 监听播放结束事件，回报播放进度
         source.onended = () => {
-            isPlaying = false;
-            document.getElementById("status").textContent = "播放完成，等待输入...";
+            scheduledSources = scheduledSources.filter(s => s !== source);
+            doneSeconds += audioBuffer.duration;
+            sendPlayed();
+            if (scheduledSources.length === 0) {
+                isPlaying = false;
+                document.getElementById("status").textContent = "播放完成，等待输入...";
+            }
         };
     }
 
@@ -190,6 +250,34 @@ html = """
 
 server = RealTimeWebSocketServer()
 
+@app.on_event("startup")
+async def warm_up():
+    # 后台加载并预热，不阻塞服务启动；完成前 /ready 返回 503
+    asyncio.create_task(components.startup())
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def close_clients():
+    # 只关闭已加载的 LLM 客户端，不为关闭而触发加载
+    llm = components.get_loaded("llm")
+    if llm is not None:
+        await llm.aclose()
+
+@app.get("/ready")
+async def ready():
+    """就绪检查：预加载的组件全部预热完成后返回 200"""
+    report = components.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/stats")
+async def stats():
+    """运行统计：准入控制、LLM请求策略、归档与流量录制、事件循环延迟与线程池，以及各会话的内存占用"""
+    return {**admission_stats(), "llm_requests": llm_stats(),
+            "voice_replies": generation_controller.stats(), "asr_cascade": asr_stats(),
+            "archive": call_archive.stats(), "traffic_trace": traffic_recorder.stats(),
+            "event_loop": loop_monitor.stats(), "executors": executor_stats(), "sessions": server.session_stats()}
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await server.handle_connection(websocket, None)
@@ -1,35 +1,76 @@
-import io
-import torch
-import whisper
-import numpy as np
-import ffmpeg
 from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import HTMLResponse
-from backend.speech.asr import ASR
-from backend.speech.tts import TTSGenerator
+from fastapi.responses import HTMLResponse, JSONResponse
+from backend.components import components
+from backend.dialog.generation_controller import generation_controller
 from backend.dialog.dialog_manager import DialogManager
+from backend.utils.admission import AdmissionRejected, admission_stats, llm_admission
+from backend.utils.loop_monitor import loop_monitor
+from backend.utils.thread_utils import executor_stats, llm_executor
+from backend.speech.call_archive import call_archive, AI
+from backend.models.load_model import llm_stats
+from backend.speech.asr import asr_stats
+from backend.speech.asr_scheduler import asr_scheduler, END_OF_TURN
+from backend.config import settings
 import uvicorn
 import asyncio
 import os
+import uuid
 
 app = FastAPI(title="与李白聊天")
 
-# 初始化组件
-asr = ASR()
-tts = TTSGenerator()
+# ASR/TTS/LLM 由 backend.components 延迟加载，导入本模块不加载任何模型
 dialog_manager = DialogManager()
 
 # 历史对话记录
 history = []
 
+@app.on_event("startup")
+async def warm_up():
+    # 后台加载并预热，不阻塞服务启动；完成前 /ready 返回 503
+    asyncio.create_task(components.startup())
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def close_clients():
+    # 只关闭已加载的 LLM 客户端，不为关闭而触发加载
+    llm = components.get_loaded("llm")
+    if llm is not None:
+        await llm.aclose()
+
+@app.get("/ready")
+async def ready():
+    """就绪检查：预加载的组件全部预热完成后返回 200"""
+    report = components.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/stats")
+async def stats():
+    """准入控制统计：执行中、排队、接纳和降级拒绝的请求数，LLM对冲/重试计数，以及事件循环延迟与线程池"""
+    return {**admission_stats(), "llm_requests": llm_stats(),
+            "voice_replies": generation_controller.stats(), "asr_cascade": asr_stats(),
+            "archive": call_archive.stats(),
+            "event_loop": loop_monitor.stats(), "executors": executor_stats()}
+
+def _generate_reply(text: str) -> str:
+    with llm_admission.admit():
+        dialog_manager.add_user_message(text)
+        return dialog_manager.generate_response()
+
 # API端点 - 处理文件上传并进行语音识别
 @app.post("/api/transcribe")
 async def transcribe_audio(file: UploadFile = File(...)):
     """接收音频文件并返回识别结果"""
     audio_data = await file.read()
-    text = asr.transcribe(audio_data)
+    try:
+        # 上传的是编码后的音频，按 16kHz 16bit 单声道的字节率粗略估计时长，仅用于调度排序
+        future = asr_scheduler.submit(lambda: components.get("asr").transcribe(audio_data),
+                                      duration=len(audio_data) / 32000, priority=END_OF_TURN)
+        text = await asyncio.wrap_future(future)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后再试",
+                            headers={"Retry-After": str(int(e.retry_after + 0.5))})
     if text:
-        history.append({"user": text})
         return {"text": text}
     else:
         raise HTTPException(status_code=500, detail="语音识别失败")
@@ -38,12 +79,19 @@ async def transcribe_audio(file: UploadFile = File(...)):
 @app.websocket("/ws/tts")
 async def websocket_tts(websocket: WebSocket):
     await websocket.accept()
+    session_id = uuid.uuid4().hex
     try:
         while True:
             text = await websocket.receive_text()
-            dialog_manager.add_user_message(text)
-            output_text = dialog_manager.generate_response()
-            history[-1]["li_bai"] = output_text
+            tts = await components.aget("tts")
+            try:
+                output_text = await llm_executor.run(_generate_reply, text)
+            except AdmissionRejected:
+                # 过载降级：回复预先合成的“忙碌”语音，不写入对话历史
+                await websocket.send_json({"text": settings.BUSY_REPLY_TEXT, "busy": True})
+                await websocket.send_bytes(await tts.cached_audio(settings.BUSY_REPLY_TEXT))
+                continue
+            history.append({"user": text, "li_bai": output_text})
             
             # 生成完整音频
             wav_data = await tts.synthesize_full_audio(output_text)
@@ -51,12 +99,15 @@ async def websocket_tts(websocket: WebSocket):
             # 发送完整音频数据
             await websocket.send_json({"text": output_text})
             await websocket.send_bytes(wav_data)
+            call_archive.record(session_id, AI, wav_data[44:])
             
     except WebSocketDisconnect:
         print("客户端断开连接")
     except Exception as e:
         print(f"WebSocket错误: {e}")
         await websocket.close(code=1011)
+    finally:
+        call_archive.close_session(session_id)
 
 # 主页 - 返回聊天界面
 @app.get("/", response_class=HTMLResponse)
@@ -68,6 +119,10 @@ async def index():
         if "li_bai" in chat:
             history_html += f"<p>李白：{chat['li_bai']}</p>"
 
+    # 多 worker 部署时，对话 websocket 直连渲染本页的 worker 的独占端口，保证会话始终落在同一 worker
+    worker_port = os.getenv("LIBAI_WORKER_PORT")
+    ws_host = f"${{location.hostname}}:{worker_port}" if worker_port else "${location.host}"
+
     return f"""
 <!DOCTYPE html>
 <html lang="zh-CN">
@@ -251,7 +306,7 @@ async def index():
             }}
             
             function connectWebSocket(text) {{
-                wsConnection = new WebSocket(`ws://${{location.host}}/ws/tts`);
+                wsConnection = new WebSocket(`ws://{ws_host}/ws/tts`);
                 wsConnection.binaryType = "arraybuffer";
                 
                 wsConnection.onopen = () => {{
@@ -0,0 +1,364 @@
+# backend/models/llm_policy.py
+"""
+LLM 请求策略：截止时间、对冲请求（hedging）与带预算的重试
+
+    - 每次调用有总截止时间（LLM_TIMEOUT），超时不再等待
+    - 主请求在近期延迟的 LLM_HEDGE_PERCENTILE 分位数（样本不足时用 LLM_HEDGE_MIN_DELAY）内未返回时，
+      向备用端点/模型再发一份相同的请求，取先成功返回的结果，另一份立即取消
+    - 失败（网络错误、429、5xx）后按指数退避加随机抖动重试，最多 LLM_MAX_ATTEMPTS 轮
+    - 对冲和重试都从全局预算中扣除：每个请求为预算存入 LLM_RETRY_BUDGET 个令牌，每次对冲/重试消耗 1 个，
+      上游整体故障时额外请求量不会超过正常流量的这一比例，避免放大故障
+"""
+import asyncio
+import json
+import random
+import threading
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+# 流式增量：(增量文本, finish_reason)，finish_reason 只在最后一个增量中出现（如 "stop"、"length"）
+StreamChunk = Tuple[str, Optional[str]]
+
+# 请求超时发生在距截止时刻不到该时长（秒）时，视为整个调用超过截止时间，而不是可重试的失败
+DEADLINE_SLACK = 0.05
+
+
+class LLMEndpoint:
+    def __init__(self, name: str, url: str, api_key: Optional[str], model: str):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+
+
+class RetryableError(Exception):
+    """可重试的失败（网络错误、限流、服务端错误）"""
+
+
+class RetryBudget:
+    """全局重试预算（令牌桶）：对冲和重试的总量不超过请求量的固定比例"""
+
+    def __init__(self, ratio: float, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class LatencyTracker:
+    """最近若干次成功请求的延迟，用于确定对冲时机"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        return float(np.percentile(list(self.samples), p))
+
+
+class HedgedLLMClient:
+    """
+    对冲 + 重试的 LLM 客户端
+
+    内部使用 aiohttp 以便真正取消落后的请求。同步调用方（线程池中的 generate_response）
+    通过 complete_sync() 使用，每个线程持有一个事件循环和连接池，连接在同一线程的多次调用间复用；
+    这些循环与连接池在服务关闭时由 aclose() 统一关闭。计数器会被多个线程同时更新，通过 _count() 加锁累加。
+    """
+
+    def __init__(self, endpoints: List[LLMEndpoint], timeout: float, hedge_percentile: float,
+                 hedge_min_delay: float, max_attempts: int, backoff: float, retry_budget: float):
+        """
+        Args:
+            endpoints: [主端点, 备用端点]；只有一个时对冲请求也发往主端点
+            timeout: 单次调用（含对冲与重试）的总截止时间（秒）
+            hedge_percentile: 对冲时机取近期延迟的该分位数
+            hedge_min_delay: 延迟样本不足时的对冲等待时间（秒），也是对冲等待的下限
+            max_attempts: 最多尝试轮数（首轮 + 重试）
+            backoff: 重试退避的基数（秒），第 n 次重试等待 [0, backoff * 2^n) 内的随机时长
+            retry_budget: 每个请求为重试预算存入的令牌数
+        """
+        self.endpoints = endpoints
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.budget = RetryBudget(retry_budget)
+        self.latency = LatencyTracker()
+        self.first_token_latency = LatencyTracker()
+        self.counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "retries": 0,
+                         "failures": 0, "timeouts": 0, "budget_exhausted": 0}
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_loops: List[asyncio.AbstractEventLoop] = []
+        self._loops_lock = threading.Lock()
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = \
+            weakref.WeakKeyDictionary()
+
+    def _count(self, name: str) -> None:
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    @property
+    def hedge_endpoint(self) -> LLMEndpoint:
+        return self.endpoints[1] if len(self.endpoints) > 1 else self.endpoints[0]
+
+    def hedge_delay(self, latency: Optional[LatencyTracker] = None) -> float:
+        observed = (latency or self.latency).percentile(self.hedge_percentile)
+        return self.hedge_min_delay if observed is None else max(self.hedge_min_delay, observed)
+
+    async def _session(self) -> aiohttp.ClientSession:
+        # aiohttp 会话绑定创建它的事件循环：线程池线程各自的循环与服务主循环分别持有一个
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = self._sessions[loop] = aiohttp.ClientSession()
+        return session
+
+    @staticmethod
+    async def _check_status(resp: aiohttp.ClientResponse, endpoint: LLMEndpoint) -> None:
+        if resp.status == 429 or resp.status >= 500:
+            raise RetryableError(f"{endpoint.name} 返回 {resp.status}")
+        if resp.status >= 400:
+            text = await resp.text()
+            raise ValueError(f"{endpoint.name} 返回 {resp.status}: {text[:200]}")
+
+    @staticmethod
+    def _failure(endpoint: LLMEndpoint, error: Exception, deadline: float, what: str) -> Exception:
+        """把请求异常分为截止时间到期（asyncio.TimeoutError）和可重试的失败"""
+        if isinstance(error, asyncio.TimeoutError) and \
+                asyncio.get_running_loop().time() >= deadline - DEADLINE_SLACK:
+            return asyncio.TimeoutError(f"{endpoint.name} {what}超过截止时间")
+        return RetryableError(f"{endpoint.name} {what}失败: {error!r}")
+
+    async def _call(self, endpoint: LLMEndpoint, payload: Dict[str, Any], deadline: float) -> str:
+        loop = asyncio.get_running_loop()
+        body = dict(payload, model=endpoint.model)
+        session = await self._session()
+        start = loop.time()
+        try:
+            async with session.post(endpoint.url, json=body, headers=endpoint.headers,
+                                    timeout=aiohttp.ClientTimeout(total=max(0.01, deadline - start))) as resp:
+                await self._check_status(resp, endpoint)
+                result = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise self._failure(endpoint, e, deadline, "请求") from e
+        if endpoint is self.endpoints[0]:
+            self.latency.add(loop.time() - start)
+        return result.get("choices", [{}])[0].get("message", {}).get("content", "回复为空")
+
+    async def _stream_chunks(self, endpoint: LLMEndpoint, payload: Dict[str, Any],
+                             deadline: float) -> AsyncIterator[StreamChunk]:
+        """流式请求（SSE），逐个产出 (增量文本, finish_reason)"""
+        body = dict(payload, model=endpoint.model, stream=True)
+        session = await self._session()
+        timeout = aiohttp.ClientTimeout(total=max(0.01, deadline - asyncio.get_running_loop().time()))
+        try:
+            async with session.post(endpoint.url, json=body, headers=endpoint.headers, timeout=timeout) as resp:
+                await self._check_status(resp, endpoint)
+                async for raw in resp.content:
+                    line = raw.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        return
+                    choice = (json.loads(data).get("choices") or [{}])[0]
+                    delta = (choice.get("delta") or {}).get("content") or ""
+                    if delta or choice.get("finish_reason"):
+                        yield delta, choice.get("finish_reason")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise self._failure(endpoint, e, deadline, "流式请求") from e
+
+    async def _open_stream(self, endpoint: LLMEndpoint, payload: Dict[str, Any],
+                           deadline: float) -> Tuple[AsyncIterator[StreamChunk], StreamChunk]:
+        """发起流式请求并等到第一个增量，返回 (后续增量的迭代器, 第一个增量)"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        chunks = self._stream_chunks(endpoint, payload, deadline)
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = ("", "stop")
+        if endpoint is self.endpoints[0]:
+            self.first_token_latency.add(loop.time() - start)
+        return chunks, first
+
+    async def _hedged_round(self, start: Callable[[LLMEndpoint], Awaitable[Any]], deadline: float,
+                            latency: LatencyTracker, discard: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        发出主请求，必要时对冲，返回先成功的结果并取消另一份
+
+        Args:
+            start: 以端点为参数发起一次请求的协程函数
+            deadline: 截止时刻（事件循环时间）
+            latency: 决定对冲时机的延迟统计
+            discard: 两份请求同时成功时，用于释放未采用结果的函数
+        """
+        loop = asyncio.get_running_loop()
+        primary = asyncio.create_task(start(self.endpoints[0]))
+        tasks = {primary}
+        hedge_at = loop.time() + self.hedge_delay(latency)
+        hedged = False
+        errors = []
+        try:
+            while tasks:
+                wait_until = deadline if hedged else min(hedge_at, deadline)
+                done, tasks = await asyncio.wait(tasks, timeout=max(0.0, wait_until - loop.time()),
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    if winners[0] is not primary:
+                        self._count("hedge_wins")
+                    for extra in winners[1:]:
+                        if discard is not None:
+                            discard(extra.result())
+                    return winners[0].result()
+                errors.extend(task.exception() for task in done)
+                if done:
+                    continue
+                if loop.time() >= deadline:
+                    raise asyncio.TimeoutError()
+                # 到达对冲时机且主请求仍在进行
+                hedged = True
+                if self.budget.try_spend():
+                    self._count("hedged")
+                    tasks.add(asyncio.create_task(start(self.hedge_endpoint)))
+                else:
+                    self._count("budget_exhausted")
+            # 有一份请求超过截止时间时整体按超时处理，即使另一份先以其他错误结束
+            timeouts = [e for e in errors if isinstance(e, asyncio.TimeoutError)]
+            raise timeouts[-1] if timeouts else errors[-1]
+        finally:
+            for task in tasks:
+                task.cancel()
+                # 截止时刻落后的请求可能与取消同时以异常结束，取走异常避免“未获取”的告警
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _with_retries(self, attempt_round: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        """执行一轮（可能对冲的）请求，可重试的失败按抖动退避重试，受全局重试预算约束"""
+        loop = asyncio.get_running_loop()
+        self._count("requests")
+        self.budget.on_request()
+        attempt = 0
+        while True:
+            try:
+                return await attempt_round()
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                self._count("failures")
+                raise
+            except RetryableError as e:
+                attempt += 1
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                if attempt >= self.max_attempts or loop.time() + delay >= deadline:
+                    self._count("failures")
+                    raise
+                if not self.budget.try_spend():
+                    self._count("budget_exhausted")
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                print(f"LLM请求失败，{delay:.2f} 秒后重试（第 {attempt} 次）: {e}")
+                await asyncio.sleep(delay)
+            except Exception:
+                self._count("failures")
+                raise
+
+    async def complete(self, payload: Dict[str, Any]) -> str:
+        """非流式请求，返回完整回复"""
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        return await self._with_retries(
+            lambda: self._hedged_round(lambda ep: self._call(ep, payload, deadline), deadline, self.latency),
+            deadline)
+
+    async def stream(self, payload: Dict[str, Any]) -> AsyncIterator[StreamChunk]:
+        """
+        流式请求，逐个产出 (增量文本, finish_reason)
+
+        对冲与重试只作用于首个增量到达之前（按首字延迟决定对冲时机）；开始输出后中途失败直接抛出，
+        由调用方决定如何使用已收到的部分。调用方提前停止迭代时连接随即关闭，上游不再继续生成。
+        """
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        chunks, first = await self._with_retries(
+            lambda: self._hedged_round(lambda ep: self._open_stream(ep, payload, deadline), deadline,
+                                       self.first_token_latency,
+                                       discard=lambda result: asyncio.ensure_future(result[0].aclose())),
+            deadline)
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    def run_sync(self, coro: Awaitable[Any]) -> Any:
+        """在当前线程的事件循环中执行协程（供同步代码在线程池中调用）"""
+        loop = getattr(self._local, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = self._local.loop = asyncio.new_event_loop()
+            with self._loops_lock:
+                self._thread_loops.append(loop)
+        return loop.run_until_complete(coro)
+
+    def complete_sync(self, payload: Dict[str, Any]) -> str:
+        return self.run_sync(self.complete(payload))
+
+    def _close_thread_loops(self) -> None:
+        """关闭 run_sync 创建的各线程事件循环及其连接池（服务关闭、线程池空闲时调用）"""
+        with self._loops_lock:
+            loops, self._thread_loops = self._thread_loops, []
+        for loop in loops:
+            if loop.is_closed():
+                continue
+            if loop.is_running():
+                # 仍有请求在该线程中执行：留给下次关闭
+                with self._loops_lock:
+                    self._thread_loops.append(loop)
+                continue
+            session = self._sessions.pop(loop, None)
+            if session is not None and not session.closed:
+                loop.run_until_complete(session.close())
+            loop.close()
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的连接池，并在工作线程中关闭 run_sync 创建的各线程循环"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+        # 其他循环不能在正在运行的循环所在线程中驱动，交给独立线程
+        await asyncio.to_thread(self._close_thread_loops)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counter_lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3),
+            "stream_hedge_delay_seconds": round(self.hedge_delay(self.first_token_latency), 3),
+            "retry_tokens": round(self.budget.tokens, 2),
+            "endpoints": [e.name for e in self.endpoints],
+        }
@@ -1,63 +1,112 @@
 # backend/models/load_model.py
-import os
-import requests
-import json
-from typing import List, Dict, Any
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
 from backend.config import settings
+from backend.models.llm_policy import HedgedLLMClient, LLMEndpoint, StreamChunk
+
+FALLBACK_REPLY = "抱歉，方才思绪有些飘远，未能听清你的问题。"
+
 
 class QwenModel:
     def __init__(self):
-        """初始化Qwen模型API客户端"""
-        self.api_base_url = settings.QWEN_API_URL
-        self.api_key = settings.QWEN_API_KEY
-        self.headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
+        """初始化Qwen模型API客户端（主端点 + 可选的备用端点，请求策略见 llm_policy）"""
+        endpoints = [LLMEndpoint("primary", settings.QWEN_API_URL, settings.QWEN_API_KEY, settings.QWEN_MODEL_NAME)]
+        fallback = (settings.QWEN_FALLBACK_API_URL, settings.QWEN_FALLBACK_MODEL_NAME)
+        if fallback != (settings.QWEN_API_URL, settings.QWEN_MODEL_NAME):
+            endpoints.append(LLMEndpoint("fallback", settings.QWEN_FALLBACK_API_URL,
+                                         settings.QWEN_FALLBACK_API_KEY, settings.QWEN_FALLBACK_MODEL_NAME))
+        self.client = HedgedLLMClient(
+            endpoints,
+            timeout=settings.LLM_TIMEOUT,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY,
+            max_attempts=settings.LLM_MAX_ATTEMPTS,
+            backoff=settings.LLM_RETRY_BACKOFF,
+            retry_budget=settings.LLM_RETRY_BUDGET,
+        )
+
+    @staticmethod
+    def _payload(messages: List[Dict[str, str]], temperature: float, max_tokens: int = 2048) -> Dict[str, Any]:
+        return {
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": False
         }
-        
+
     def generate_response(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
         """
-        调用Qwen API生成回复
+        调用Qwen API生成回复（同步，供线程池调用）
         
         Args:
             messages: 对话历史，格式为[{"role": "user", "content": "你好"}, {"role": "assistant", "content": "幸会"}]
             temperature: 控制生成的随机性，值越高越随机
         
         Returns:
-            模型生成的回复文本
+            模型生成的回复文本；超过截止时间或重试后仍失败时返回兜底回复
         """
         try:
-            payload = {
-                "model": settings.QWEN_MODEL_NAME,  
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": 2048,
-                "stream": False
-            }
-            
-            response = requests.post(
-                self.api_base_url,
-                headers=self.headers,
-                data=json.dumps(payload)
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            return result.get("choices", [{}])[0].get("message", {}).get("content", "回复为空")
-            
+            return self.client.complete_sync(self._payload(messages, temperature))
+        except asyncio.TimeoutError:
+            print(f"Error: LLM请求超过 {settings.LLM_TIMEOUT} 秒未返回")
         except Exception as e:
             print(f"Error: {e}")
-            print(f"Response: {response.content.decode('utf-8')}")
-            return "抱歉，方才思绪有些飘远，未能听清你的问题。"
+        return FALLBACK_REPLY
+
+    async def agenerate_response(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+        """generate_response 的协程版本，可直接在事件循环中调用"""
+        try:
+            return await self.client.complete(self._payload(messages, temperature))
+        except asyncio.TimeoutError:
+            print(f"Error: LLM请求超过 {settings.LLM_TIMEOUT} 秒未返回")
+        except Exception as e:
+            print(f"Error: {e}")
+        return FALLBACK_REPLY
+
+    async def stream_response(self, messages: List[Dict[str, str]], temperature: float = 0.7,
+                              max_tokens: int = 2048) -> AsyncIterator[StreamChunk]:
+        """
+        流式生成回复，逐个产出 (增量文本, finish_reason)；提前停止迭代即中止生成
+
+        失败时直接抛出异常，由调用方处理已收到的部分
+        """
+        async for chunk in self.client.stream(self._payload(messages, temperature, max_tokens)):
+            yield chunk
+
+    def run_sync(self, coro: Awaitable[Any]) -> Any:
+        """在线程池线程中同步执行协程（复用该线程的事件循环与连接）"""
+        return self.client.run_sync(coro)
+
+    async def aclose(self) -> None:
+        """关闭连接池与线程池线程中的事件循环（服务关闭时调用）"""
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.client.stats()
+
+def get_model() -> QwenModel:
+    """获取进程内共享的模型客户端（首次调用时创建）"""
+    from backend.components import components
+    return components.get("llm")
+
+
+def llm_stats() -> Optional[dict]:
+    """已加载的 LLM 客户端的请求统计（不触发加载）"""
+    from backend.components import components
+    llm = components.get_loaded("llm")
+    return llm.stats() if llm is not None else None
+
 
-# 单例模式初始化模型
-model = QwenModel()
+def __getattr__(name):
+    # 兼容旧的 `from backend.models.load_model import model` 用法，访问时才创建
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     messages = [
         {"role": "system", "content": "你是唐代诗人李白，以诗酒为伴，豪放不羁。"},
         {"role": "user", "content": "阁下何人？为何在此独酌？"}
     ] 
-    reply = model.generate_response(messages)
+    reply = get_model().generate_response(messages)
     print("李白回复:", reply)
\ No newline at end of file
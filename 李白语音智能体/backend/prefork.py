@@ -0,0 +1,161 @@
+# backend/prefork.py
+"""
+预派生（pre-fork）多进程部署
+
+主进程导入应用模块，ASR/TTS/LLM 等组件和模型权重在主进程中加载一次，
+然后 fork 出多个 worker。worker 与主进程以写时复制方式共享只读的模型内存，
+各自运行独立的事件循环和 uvicorn 服务，彼此不共享任何可变状态。
+
+会话路由：
+    - 所有 worker 共同监听主端口，新连接由内核分配给其中一个 worker；
+      实时通话（/ws）是单条长连接，整个会话天然归属于接受它的 worker
+    - 每个 worker 另外监听独占端口（--affinity-port-base + worker 序号），
+      并通过环境变量 LIBAI_WORKER_PORT 告知应用；需要跨多次请求保持会话的
+      页面（如静态对话页）把后续连接指向该端口，从而始终回到同一个 worker
+
+模型需在 CPU 上运行：fork 之后子进程无法继续使用父进程中已初始化的 CUDA。
+未设置 ASR_DEVICE 时，主进程在预加载前把它设为 cpu（即使机器上有 GPU）；
+显式设置 ASR_DEVICE=cuda 会在预加载后报错退出。
+
+用法（仅支持 Linux/macOS 等提供 fork 的平台）:
+    python -m backend.prefork backend.main_realtime:app --workers 4 --port 8000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+
+def _listen(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    def __init__(self, app_path: str, host: str = "127.0.0.1", port: int = 8000,
+                 workers: Optional[int] = None, affinity_port_base: Optional[int] = None):
+        """
+        Args:
+            app_path: 应用导入路径，如 "backend.main_realtime:app"
+            host: 监听地址
+            port: 所有 worker 共享的主端口
+            workers: worker 数量，默认等于 CPU 核数
+            affinity_port_base: worker 独占端口起点，第 i 个 worker 监听 affinity_port_base + i；
+                                默认为 port + 1
+        """
+        self.app_path = app_path
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.affinity_port_base = affinity_port_base or port + 1
+        self.children: Dict[int, int] = {}  # pid -> worker 序号
+        self.shutting_down = False
+
+    def _preload(self):
+        """在主进程中导入应用并加载模型，fork 后由各 worker 共享"""
+        start = time.perf_counter()
+        app = import_from_string(self.app_path)
+        # 只加载不预热：预热会运行推理、创建线程和网络连接，留给各 worker 在启动时完成
+        from backend.components import components
+        from backend.config import settings
+        if not settings.ASR_DEVICE:
+            settings.ASR_DEVICE = "cpu"
+        components.preload()
+
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_initialized():
+            raise RuntimeError("CUDA 已在主进程中初始化，无法安全 fork；多 worker 模式请设置 ASR_DEVICE=cpu")
+
+        # 冻结当前所有对象，避免 worker 中的 GC 遍历改写对象头，导致共享页被复制
+        gc.collect()
+        gc.freeze()
+        print(f"主进程预加载完成，耗时 {time.perf_counter() - start:.2f} 秒")
+        return app
+
+    def _spawn(self, index: int, app, shared_sock: socket.socket) -> None:
+        affinity_port = self.affinity_port_base + index
+        affinity_sock = _listen(self.host, affinity_port)
+        pid = os.fork()
+        if pid:
+            affinity_sock.close()
+            self.children[pid] = index
+            return
+
+        # ---- worker 进程 ----
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.environ["LIBAI_WORKER_ID"] = str(index)
+        os.environ["LIBAI_WORKER_PORT"] = str(affinity_port)
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            # 各 worker 平分 CPU，避免计算线程数超过核数
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // self.workers))
+        print(f"worker {index} (pid {os.getpid()}) 已启动，独占端口 {affinity_port}")
+        try:
+            server = uvicorn.Server(uvicorn.Config(app, host=self.host, port=self.port))
+            server.run(sockets=[shared_sock, affinity_sock])
+        finally:
+            os._exit(0)
+
+    def _handle_signal(self, signum, frame) -> None:
+        self.shutting_down = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        if not hasattr(os, "fork"):
+            print("当前平台不支持 fork，退回单进程模式")
+            uvicorn.run(self.app_path, host=self.host, port=self.port)
+            return
+
+        app = self._preload()
+        shared_sock = _listen(self.host, self.port)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        for i in range(self.workers):
+            self._spawn(i, app, shared_sock)
+        print(f"已启动 {self.workers} 个 worker，监听 {self.host}:{self.port}")
+
+        # 监控 worker：异常退出时用同一份预加载状态重新 fork
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self.children.pop(pid, None)
+            if index is not None and not self.shutting_down:
+                print(f"worker {index} (pid {pid}) 异常退出（状态 {status}），正在重启")
+                self._spawn(index, app, shared_sock)
+        shared_sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="预派生多 worker 部署")
+    parser.add_argument("app", help="应用导入路径，如 backend.main_realtime:app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="worker 数量，默认等于 CPU 核数")
+    parser.add_argument("--affinity-port-base", type=int, default=None,
+                        help="worker 独占端口起点，默认为主端口 + 1")
+    args = parser.parse_args(argv)
+    PreforkServer(args.app, args.host, args.port, args.workers, args.affinity_port_base).run()
+
+
+if __name__ == "__main__":
+    main()
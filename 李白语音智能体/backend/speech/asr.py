@@ -1,35 +1,77 @@
 import io
-import torch
-import whisper
 import numpy as np
 import ffmpeg
-from typing import Optional
+from typing import Optional, Union
 from backend.config import settings
+from backend.speech.asr_engines import SAMPLE_RATE, create_asr_engine
+
+def decode_audio(audio_data: Union[bytes, np.ndarray], is_raw_pcm: bool = False) -> np.ndarray:
+    """
+    把任意格式音频（或16kHz裸PCM）解码为 16kHz 单声道 float32 数组
+
+    裸PCM（bytes 或 int16 数组/视图）直接在内存中换算，不经过 ffmpeg 子进程
+    """
+    if is_raw_pcm:
+        samples = audio_data if isinstance(audio_data, np.ndarray) else np.frombuffer(audio_data, dtype='<i2')
+        return samples.astype(np.float32) / 32768.0
+    out, _ = (
+        ffmpeg
+        .input('pipe:0')
+        .output('pipe:1', format='f32le', ac=1, ar='16000')
+        .run(input=audio_data, capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, np.float32)
 
 class ASR:
-    def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = whisper.load_model(settings.ASR_MODEL, device=self.device)
+    def __init__(self, engine: Optional[str] = None):
+        """
+        Args:
+            engine: ASR 引擎名称（whisper / faster-whisper），默认取 settings.ASR_ENGINE
+        """
+        self.engine = create_asr_engine(engine)
 
-    def transcribe(self, audio_data: bytes, is_raw_pcm: bool = False) -> Optional[str]:
+    def transcribe(self, audio_data: Union[bytes, np.ndarray], is_raw_pcm: bool = False,
+                   short_utterance: Optional[bool] = None) -> Optional[str]:
+        """
+        Args:
+            audio_data: 音频数据（任意格式，或 is_raw_pcm=True 时的16kHz裸PCM bytes / int16 数组）
+            is_raw_pcm: 是否为裸PCM
+            short_utterance: 是否使用短句模式；None 时按 settings.ASR_SHORT_MODE 和时长自动选择
+        """
         try:
-            input_kwargs = {'format': 's16le', 'ac': 1, 'ar': '16000'} if is_raw_pcm else {}
-            out, _ = (
-                ffmpeg
-                .input('pipe:0', **input_kwargs)
-                .output('pipe:1', format='f32le', ac=1, ar='16000')
-                .run(input=audio_data, capture_stdout=True, capture_stderr=True)
-            )
-            audio = np.frombuffer(out, np.float32)
-            result = self.model.transcribe(audio, fp16=torch.cuda.is_available())
+            audio = decode_audio(audio_data, is_raw_pcm)
+            if short_utterance is None:
+                short_utterance = (settings.ASR_SHORT_MODE
+                                   and len(audio) <= settings.ASR_SHORT_MAX_SECONDS * SAMPLE_RATE)
+            if short_utterance:
+                result = self.engine.transcribe_short(audio)
+            else:
+                result = self.engine.transcribe(audio)
             return result["text"].strip()
         except Exception as e:
             print(f"ASR错误: {e}")
             return None
 
+    def warm_up(self) -> None:
+        """识别一段静音，触发推理内核的首次初始化；级联识别时每一级模型都预热"""
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        for engine in getattr(self.engine, "tiers", (self.engine,)):
+            engine.transcribe_short(silence)
+
+    def stats(self) -> Optional[dict]:
+        """级联识别时返回各级的采用率与延迟统计，单模型时返回 None"""
+        stats = getattr(self.engine, "stats", None)
+        return stats() if stats else None
+
+def asr_stats() -> Optional[dict]:
+    """已加载的 ASR 组件的级联统计（不触发加载）"""
+    from backend.components import components
+    asr = components.get_loaded("asr")
+    return asr.stats() if asr is not None else None
+
 if __name__ == "__main__":
     audio_file_path = r'E:\李白语音智能体\audio_files\test16000_你是谁_是不是李白.wav'
-    
+
     with open(audio_file_path, 'rb') as f:
         audio_data = f.read()
 
@@ -38,4 +80,4 @@ if __name__ == "__main__":
     if text:
         print(f"识别结果: {text}")
     else:
-        print("语音识别失败")
\ No newline at end of file
+        print("语音识别失败")
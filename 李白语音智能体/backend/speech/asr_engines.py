@@ -0,0 +1,323 @@
+# backend/speech/asr_engines.py
+import threading
+import time
+import types
+import numpy as np
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+
+SAMPLE_RATE = 16000
+
+# 短句模式下判定“置信度已足够好”的阈值，与 whisper.transcribe 的默认值一致
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class ASREngine:
+    """
+    ASR 引擎基类
+
+    所有引擎共享同一输入输出约定：
+        输入: 16kHz 单声道 float32 音频（取值范围 [-1, 1]）
+        输出: {"text": str, "language": str, "segments": [{"start", "end", "text",
+               "avg_logprob", "no_speech_prob", "compression_ratio"}, ...]}
+    """
+    name = "base"
+
+    def transcribe(self, audio: np.ndarray, **options) -> Dict[str, Any]:
+        """
+        识别一段音频
+
+        Args:
+            audio: 16kHz 单声道 float32 音频
+            options: 解码参数（language、temperature、beam_size、initial_prompt 等）
+
+        Returns:
+            识别结果字典，结构见类说明
+        """
+        raise NotImplementedError
+
+    def transcribe_short(self, audio: np.ndarray, language: Optional[str] = None, **options) -> Dict[str, Any]:
+        """
+        短句模式：固定语言、贪心解码一次，只有置信度不达标时才回退到带温度回退的完整识别
+
+        Args:
+            audio: 16kHz 单声道 float32 音频
+            language: 识别语言，默认取 settings.ASR_LANGUAGE，跳过语种检测
+            options: 其余解码参数
+
+        Returns:
+            识别结果字典，结构见类说明
+        """
+        language = language or settings.ASR_LANGUAGE
+        result = self._decode_greedy(audio, language, **options)
+        if not _needs_fallback(result):
+            return result
+        return self.transcribe(audio, language=language, **options)
+
+    def _decode_greedy(self, audio: np.ndarray, language: str, **options) -> Dict[str, Any]:
+        """单次 temperature=0 解码，子类可覆盖以缩短编码器输入"""
+        return self.transcribe(audio, language=language, temperature=0.0,
+                               condition_on_previous_text=False, without_timestamps=True, **options)
+
+
+def _needs_fallback(result: Dict[str, Any]) -> bool:
+    """判断贪心解码结果是否需要温度回退重解码"""
+    segments = result.get("segments") or []
+    if not segments:
+        return False
+    for s in segments:
+        if s["no_speech_prob"] > NO_SPEECH_THRESHOLD and s["avg_logprob"] < LOGPROB_THRESHOLD:
+            continue  # 静音段，回退也不会有更好的结果
+        if s["compression_ratio"] > COMPRESSION_RATIO_THRESHOLD or s["avg_logprob"] < LOGPROB_THRESHOLD:
+            return True
+    return False
+
+
+def pick_bucket(duration: float, buckets: Optional[List[int]] = None) -> int:
+    """把音频时长（秒）向上取整到支持的编码器输入长度档位"""
+    buckets = sorted(buckets or settings.ASR_SHORT_BUCKETS)
+    for bucket in buckets:
+        if duration <= bucket:
+            return bucket
+    return buckets[-1]
+
+
+def _make_segment(start, end, text, avg_logprob, no_speech_prob, compression_ratio) -> Dict[str, Any]:
+    return {
+        "start": float(start),
+        "end": float(end),
+        "text": text,
+        "avg_logprob": float(avg_logprob),
+        "no_speech_prob": float(no_speech_prob),
+        "compression_ratio": float(compression_ratio),
+    }
+
+
+class WhisperEngine(ASREngine):
+    """openai-whisper 引擎（PyTorch，GPU 可用时使用 fp16）"""
+    name = "whisper"
+
+    def __init__(self, model_name: Optional[str] = None, device: Optional[str] = None):
+        # 延迟导入：只用 faster-whisper 的部署无需安装 torch
+        import torch
+        import whisper
+
+        self.device = device or settings.ASR_DEVICE or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.fp16 = self.device == "cuda"
+        self.model = whisper.load_model(model_name or settings.ASR_MODEL, device=self.device)
+        self._variable_length_encoder = False
+
+    def transcribe(self, audio: np.ndarray, **options) -> Dict[str, Any]:
+        options.setdefault("fp16", self.fp16)
+        result = self.model.transcribe(audio, **options)
+        segments = [
+            _make_segment(s["start"], s["end"], s["text"], s["avg_logprob"],
+                          s["no_speech_prob"], s["compression_ratio"])
+            for s in result.get("segments", [])
+        ]
+        return {"text": result["text"], "language": result.get("language"), "segments": segments}
+
+    def _decode_greedy(self, audio: np.ndarray, language: str, **options) -> Dict[str, Any]:
+        """
+        只对实际音频长度（取整到档位）计算 mel 和编码器，而不是固定的 30 秒窗口
+        """
+        import whisper
+
+        self._enable_variable_length_encoder()
+        duration = len(audio) / SAMPLE_RATE
+        bucket = pick_bucket(duration)
+        audio = whisper.pad_or_trim(audio, bucket * SAMPLE_RATE)
+        mel = whisper.log_mel_spectrogram(audio, n_mels=self.model.dims.n_mels).to(self.device)
+
+        decode_options = whisper.DecodingOptions(
+            language=language, temperature=0.0, fp16=self.fp16, without_timestamps=True, **options
+        )
+        r = whisper.decode(self.model, mel, decode_options)
+        segment = _make_segment(0.0, min(duration, bucket), r.text, r.avg_logprob,
+                                r.no_speech_prob, r.compression_ratio)
+        return {"text": r.text, "language": r.language, "segments": [segment]}
+
+    def _enable_variable_length_encoder(self) -> None:
+        """
+        whisper 的编码器断言输入必须是 3000 帧；替换 forward，按实际帧数截取位置编码。
+        输入恰为 30 秒时与原实现完全等价，因此不影响完整识别。
+        """
+        if self._variable_length_encoder:
+            return
+        import torch.nn.functional as F
+
+        def forward(encoder, x):
+            x = F.gelu(encoder.conv1(x))
+            x = F.gelu(encoder.conv2(x))
+            x = x.permute(0, 2, 1)
+            x = (x + encoder.positional_embedding[: x.shape[1]]).to(x.dtype)
+            for block in encoder.blocks:
+                x = block(x)
+            return encoder.ln_post(x)
+
+        self.model.encoder.forward = types.MethodType(forward, self.model.encoder)
+        self._variable_length_encoder = True
+
+
+class FasterWhisperEngine(ASREngine):
+    """CTranslate2 / faster-whisper 引擎，默认在 CPU 上以 int8 量化推理"""
+    name = "faster-whisper"
+
+    def __init__(self, model_name: Optional[str] = None, device: Optional[str] = None,
+                 compute_type: Optional[str] = None, cpu_threads: Optional[int] = None,
+                 num_workers: Optional[int] = None):
+        from faster_whisper import WhisperModel
+
+        self.device = device or settings.ASR_DEVICE or "cpu"
+        self.model = WhisperModel(
+            model_name or settings.ASR_MODEL,
+            device=self.device,
+            compute_type=compute_type or settings.ASR_COMPUTE_TYPE,
+            cpu_threads=settings.ASR_CPU_THREADS if cpu_threads is None else cpu_threads,
+            num_workers=settings.ASR_NUM_WORKERS if num_workers is None else num_workers,
+        )
+
+    def transcribe(self, audio: np.ndarray, **options) -> Dict[str, Any]:
+        # faster-whisper 没有 fp16 开关，精度由 compute_type 决定
+        options.pop("fp16", None)
+        segments_iter, info = self.model.transcribe(audio, **options)
+        segments: List[Dict[str, Any]] = [
+            _make_segment(s.start, s.end, s.text, s.avg_logprob,
+                          s.no_speech_prob, s.compression_ratio)
+            for s in segments_iter  # 生成器，遍历时才真正解码
+        ]
+        text = "".join(s["text"] for s in segments)
+        return {"text": text, "language": info.language, "segments": segments}
+
+
+class CascadeEngine(ASREngine):
+    """
+    小模型优先的级联识别
+
+    先用常驻的小模型识别，各段的平均对数概率与无语音概率都达标时直接采用；
+    否则用同样常驻的大模型重新识别。大部分简单语句只付出小模型的延迟，难句仍由大模型保证准确率。
+    """
+    name = "cascade"
+
+    def __init__(self, small: ASREngine, large: ASREngine, logprob_threshold: Optional[float] = None,
+                 no_speech_threshold: Optional[float] = None):
+        """
+        Args:
+            small: 第一级（小模型）引擎
+            large: 第二级（大模型）引擎
+            logprob_threshold: 小模型结果各段 avg_logprob 的下限，默认取 settings.ASR_CASCADE_LOGPROB
+            no_speech_threshold: 小模型结果各段 no_speech_prob 的上限，默认取 settings.ASR_CASCADE_NO_SPEECH
+        """
+        self.small = small
+        self.large = large
+        self.tiers = (small, large)
+        self.logprob_threshold = settings.ASR_CASCADE_LOGPROB if logprob_threshold is None else logprob_threshold
+        self.no_speech_threshold = (settings.ASR_CASCADE_NO_SPEECH if no_speech_threshold is None
+                                    else no_speech_threshold)
+        self._lock = threading.Lock()
+        self._stats = {tier: {"calls": 0, "seconds": 0.0, "audio_seconds": 0.0} for tier in ("small", "large")}
+        self.accepted = 0
+        self.silence = 0      # 小模型判为整段静音（无分段或全部为静音段）而直接采用的请求数
+        self.total_seconds = 0.0
+
+    @staticmethod
+    def _silent(segment: Dict[str, Any]) -> bool:
+        return segment["no_speech_prob"] > NO_SPEECH_THRESHOLD and segment["avg_logprob"] < LOGPROB_THRESHOLD
+
+    def accept(self, result: Dict[str, Any]) -> bool:
+        """小模型结果是否可以直接采用"""
+        segments = result.get("segments") or []
+        if not segments:
+            return True
+        for s in segments:
+            if self._silent(s):
+                continue  # 静音段，大模型也不会识别出更多内容
+            if (s["avg_logprob"] < self.logprob_threshold or s["no_speech_prob"] > self.no_speech_threshold
+                    or s["compression_ratio"] > COMPRESSION_RATIO_THRESHOLD):
+                return False
+        return True
+
+    def _timed(self, tier: str, fn, audio: np.ndarray) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = fn(audio)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats = self._stats[tier]
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            stats["audio_seconds"] += len(audio) / SAMPLE_RATE
+        return result
+
+    def _cascade(self, audio: np.ndarray, small_fn, large_fn) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = self._timed("small", small_fn, audio)
+        accepted = self.accept(result)
+        silence = accepted and all(self._silent(s) for s in result.get("segments") or [])
+        if not accepted:
+            result = self._timed("large", large_fn, audio)
+        with self._lock:
+            self.accepted += accepted
+            self.silence += silence
+            self.total_seconds += time.perf_counter() - start
+        result["tier"] = "small" if accepted else "large"
+        return result
+
+    def transcribe(self, audio: np.ndarray, **options) -> Dict[str, Any]:
+        return self._cascade(audio, lambda a: self.small.transcribe(a, **options),
+                             lambda a: self.large.transcribe(a, **options))
+
+    def transcribe_short(self, audio: np.ndarray, language: Optional[str] = None, **options) -> Dict[str, Any]:
+        # 小模型只做一次贪心解码：置信度不达标时直接交给大模型，不在小模型上做温度回退
+        language = language or settings.ASR_LANGUAGE
+        return self._cascade(audio, lambda a: self.small._decode_greedy(a, language, **options),
+                             lambda a: self.large.transcribe_short(a, language, **options))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self._stats["small"]["calls"]
+            tiers = {}
+            for tier, s in self._stats.items():
+                tiers[tier] = {
+                    "calls": s["calls"],
+                    "avg_latency_ms": round(s["seconds"] / s["calls"] * 1000, 1) if s["calls"] else None,
+                    "rtf": round(s["seconds"] / s["audio_seconds"], 3) if s["audio_seconds"] else None,
+                }
+            return {
+                "requests": requests,
+                "accepted_small": self.accepted,
+                "accepted_silence": self.silence,
+                "acceptance_rate": round(self.accepted / requests, 3) if requests else None,
+                "avg_latency_ms": round(self.total_seconds / requests * 1000, 1) if requests else None,
+                "tiers": tiers,
+            }
+
+
+# 可选引擎注册表：名称 -> 引擎类
+ASR_ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+def create_asr_engine(name: Optional[str] = None, **kwargs) -> ASREngine:
+    """
+    按名称创建 ASR 引擎
+
+    Args:
+        name: 引擎名称，默认取 settings.ASR_ENGINE
+        kwargs: 透传给引擎构造函数的参数
+
+    Returns:
+        ASR 引擎实例
+    """
+    name = name or settings.ASR_ENGINE
+    if name not in ASR_ENGINES:
+        raise ValueError(f"未知的ASR引擎: {name}，可选: {', '.join(ASR_ENGINES)}")
+    engine = ASR_ENGINES[name](**kwargs)
+    # 配置了级联小模型且未显式指定模型时，组成“小模型 -> 大模型”级联，两个模型都常驻内存
+    if settings.ASR_CASCADE_MODEL and "model_name" not in kwargs:
+        small = ASR_ENGINES[name](model_name=settings.ASR_CASCADE_MODEL, **kwargs)
+        return CascadeEngine(small, engine)
+    return engine
@@ -0,0 +1,203 @@
+# backend/speech/asr_scheduler.py
+"""
+ASR 任务调度器：按优先级和音频时长排序，取代先到先服务
+
+排序规则（每次有 worker 空闲时从队列中选出一个任务）：
+    1. 等待时间超过老化上限（ASR_AGING_SECONDS）的任务最先执行，彼此按提交顺序，保证长任务不被饿死
+    2. 其余按优先级：用户说完一句话（END_OF_TURN） > 中间结果（PARTIAL） > 后台任务（BACKGROUND）
+    3. 同一优先级内，预计耗时短的先执行（短指令不被长篇发言堵住）
+
+过载保护（与 backend.utils.admission 的语义一致，被拒绝时抛出 AdmissionRejected）：
+    - 提交时预估排在其前面的任务总耗时，超出排队预算的立即拒绝
+    - 出队时已超出排队预算的任务不再执行
+会话被打断（用户重新开口）时，可取消该会话尚未开始执行的任务。
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.config import settings
+from backend.utils.admission import AdmissionRejected
+
+END_OF_TURN = 0
+PARTIAL = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {END_OF_TURN: "end_of_turn", PARTIAL: "partial", BACKGROUND: "background"}
+
+_DEFAULT = object()
+
+
+class ASRJob:
+    def __init__(self, fn: Callable[[], Any], duration: float, priority: int,
+                 session_id: Optional[str], budget: Optional[float], seq: int):
+        self.fn = fn
+        self.duration = duration
+        self.priority = priority
+        self.session_id = session_id
+        self.budget = budget
+        self.seq = seq
+        self.submitted = time.monotonic()
+        self.future: Future = Future()
+
+
+class ASRScheduler:
+    def __init__(self, workers: Optional[int] = None, queue_budget: Optional[float] = None,
+                 aging_seconds: Optional[float] = None):
+        """
+        Args:
+            workers: 并发执行的 ASR 任务数，默认 settings.ASR_MAX_CONCURRENCY
+            queue_budget: END_OF_TURN 任务的排队时间预算（秒），默认 settings.ASR_QUEUE_BUDGET
+            aging_seconds: 老化上限（秒），等待超过该时长的任务优先执行，默认 settings.ASR_AGING_SECONDS
+        """
+        self.workers = max(1, workers or settings.ASR_MAX_CONCURRENCY)
+        self.queue_budget = settings.ASR_QUEUE_BUDGET if queue_budget is None else queue_budget
+        self.aging_seconds = settings.ASR_AGING_SECONDS if aging_seconds is None else aging_seconds
+        self._cond = threading.Condition()
+        self._queue: List[ASRJob] = []
+        self._threads: List[threading.Thread] = []
+        self._seq = 0
+        self.running = 0
+        self.rtf = 0.0   # 每秒音频的处理耗时（指数滑动平均），用于预估任务耗时
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "aged": 0}
+        self.shed = {"predicted": 0, "timeout": 0}
+        self.max_wait = {name: 0.0 for name in PRIORITY_NAMES.values()}
+
+    def _ensure_started(self) -> None:
+        # 线程在第一次提交时才创建：多 worker 部署时主进程 fork 前不应有后台线程
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker_loop, name=f"asr-scheduler-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _expected_service(self, job: ASRJob) -> float:
+        return self.rtf * max(job.duration, 1.0)
+
+    def _sort_key(self, job: ASRJob, now: float):
+        if now - job.submitted >= self.aging_seconds:
+            return (-1, 0.0, job.seq)
+        return (job.priority, self._expected_service(job), job.seq)
+
+    def _reject(self, job: ASRJob, reason: str, wait: float) -> AdmissionRejected:
+        self.shed[reason] += 1
+        print(f"ASR过载降级（{reason}）：执行中 {self.running}，排队 {len(self._queue)}")
+        return AdmissionRejected("ASR", reason, retry_after=max(1.0, wait))
+
+    def submit(self, fn: Callable[[], Any], duration: float, priority: int = END_OF_TURN,
+               session_id: Optional[str] = None, budget: Any = _DEFAULT) -> Future:
+        """
+        提交一个 ASR 任务
+
+        Args:
+            fn: 执行识别的函数（在调度器线程中调用）
+            duration: 音频时长（秒），用于按预计耗时排序
+            priority: END_OF_TURN / PARTIAL / BACKGROUND
+            session_id: 所属会话，用于打断时取消
+            budget: 排队时间预算（秒），None 表示不限；默认 END_OF_TURN 使用 queue_budget，其余不限
+
+        Returns:
+            concurrent.futures.Future，被降级时其异常为 AdmissionRejected，被取消时为 CancelledError
+        """
+        if budget is _DEFAULT:
+            budget = self.queue_budget if priority == END_OF_TURN else None
+        with self._cond:
+            self._ensure_started()
+            self._seq += 1
+            job = ASRJob(fn, duration, priority, session_id, budget, self._seq)
+            if budget is not None and self.running >= self.workers:
+                now = time.monotonic()
+                key = self._sort_key(job, now)
+                ahead = sum(self._expected_service(j) for j in self._queue if self._sort_key(j, now) < key)
+                predicted = ahead / self.workers
+                if predicted > budget:
+                    job.future.set_exception(self._reject(job, "predicted", predicted))
+                    return job.future
+            self.counters["submitted"] += 1
+            self._queue.append(job)
+            self._cond.notify()
+        return job.future
+
+    def run(self, fn: Callable[[], Any], duration: float, priority: int = END_OF_TURN,
+            session_id: Optional[str] = None, budget: Any = _DEFAULT) -> Any:
+        """提交并阻塞等待结果（在会话的音频处理线程中调用）"""
+        return self.submit(fn, duration, priority, session_id, budget).result()
+
+    def cancel_session(self, session_id: str) -> int:
+        """取消某会话所有尚未开始执行的任务，返回取消的个数"""
+        with self._cond:
+            cancelled = [j for j in self._queue if j.session_id == session_id]
+            self._queue = [j for j in self._queue if j.session_id != session_id]
+            self.counters["cancelled"] += len(cancelled)
+        for job in cancelled:
+            job.future.cancel()
+        return len(cancelled)
+
+    def _next_job(self) -> ASRJob:
+        with self._cond:
+            while True:
+                while not self._queue:
+                    self._cond.wait()
+                now = time.monotonic()
+                job = min(self._queue, key=lambda j: self._sort_key(j, now))
+                self._queue.remove(job)
+                waited = now - job.submitted
+                if job.budget is not None and waited > job.budget:
+                    job.future.set_exception(self._reject(job, "timeout", waited))
+                    continue
+                if waited >= self.aging_seconds:
+                    self.counters["aged"] += 1
+                name = PRIORITY_NAMES.get(job.priority, str(job.priority))
+                self.max_wait[name] = max(self.max_wait.get(name, 0.0), waited)
+                self.running += 1
+                return job
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._next_job()
+            if not job.future.set_running_or_notify_cancel():
+                with self._cond:
+                    self.running -= 1
+                continue
+            start = time.monotonic()
+            ok = False
+            try:
+                job.future.set_result(job.fn())
+                ok = True
+            except Exception as e:
+                job.future.set_exception(e)
+            finally:
+                elapsed = time.monotonic() - start
+                with self._cond:
+                    self.running -= 1
+                    if ok:
+                        # 失败的任务耗时不代表正常识别速度，不计入 rtf，以免扭曲排队时间预估
+                        self.counters["completed"] += 1
+                        ratio = elapsed / max(job.duration, 1.0)
+                        self.rtf = ratio if self.rtf == 0.0 else 0.8 * self.rtf + 0.2 * ratio
+                    else:
+                        self.counters["failed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for job in self._queue:
+                queued[PRIORITY_NAMES.get(job.priority, str(job.priority))] += 1
+            return {
+                "workers": self.workers,
+                "queue_budget": self.queue_budget,
+                "aging_seconds": self.aging_seconds,
+                "running": self.running,
+                "queued": queued,
+                **self.counters,
+                "shed": dict(self.shed),
+                "shed_total": sum(self.shed.values()),
+                "rtf": round(self.rtf, 3),
+                "max_wait_seconds": {k: round(v, 3) for k, v in self.max_wait.items()},
+            }
+
+
+# 进程内共享的 ASR 调度器（所有会话和接口的 ASR 任务都经由它执行）
+asr_scheduler = ASRScheduler()
@@ -1,16 +1,17 @@
 import io
+import struct
 import wave
+import numpy as np
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 from pydub.utils import mediainfo
 
-def is_speaking(audio_chunk: bytes, silence_thresh: int = -40, sample_rate=16000, channels=1) -> bool:
+def is_speaking(audio_chunk: Union[bytes, np.ndarray], silence_thresh: int = -40, sample_rate=16000, channels=1) -> bool:
     """
     判断音频 chunk 中是否有明显讲话信号（非静音）。
     
     Args:
-        audio_chunk: 一段裸 PCM 音频数据 bytes
+        audio_chunk: 一段裸 PCM 音频数据 bytes，或 int16 数组/只读视图（不拷贝）
         silence_thresh: 静音阈值，单位 dBFS，默认 -40dBFS
         sample_rate: 采样率，默认16000 Hz
         channels: 声道数，默认单声道
@@ -19,17 +20,37 @@ def is_speaking(audio_chunk: bytes, silence_thresh: int = -40, sample_rate=16000
         bool: 是否为“正在说话”
     """
     try:
-        audio = AudioSegment.from_raw(
-            io.BytesIO(audio_chunk),
-            sample_width=2,  # 16-bit PCM = 2 bytes
-            frame_rate=sample_rate,
-            channels=channels
-        )
-        return audio.dBFS > silence_thresh
+        samples = audio_chunk if isinstance(audio_chunk, np.ndarray) else np.frombuffer(audio_chunk, dtype="<i2")
+        if len(samples) == 0:
+            return False
+        # 与 pydub 的 AudioSegment.dBFS 一致：RMS 相对 16bit 满幅 32768 的分贝值
+        mean_square = np.dot(samples, samples.astype(np.float64)) / len(samples)
+        if mean_square == 0:
+            return False
+        return 10 * np.log10(mean_square / 32768.0 ** 2) > silence_thresh
     except Exception as e:
         print(f"判断是否说话时出错: {e}")
         return False
 
+def frame_energies(samples: np.ndarray, frame_size: int = 320) -> np.ndarray:
+    """
+    一次性计算每帧的均方能量（不足一帧的尾部忽略）
+
+    Args:
+        samples: int16 数组或只读视图
+        frame_size: 帧长（样本数），默认 320 即 16kHz 下 20ms
+    """
+    n = len(samples) // frame_size
+    frames = samples[:n * frame_size].reshape(n, frame_size).astype(np.float32)
+    return np.einsum("ij,ij->i", frames, frames) / frame_size
+
+def quietest_frame_offset(samples: np.ndarray, frame_size: int = 320) -> int:
+    """返回能量最低的一帧的中点位置（样本下标），用于在持续说话的音频中选择切分点"""
+    energies = frame_energies(samples, frame_size)
+    if len(energies) == 0:
+        return len(samples)
+    return int(np.argmin(energies)) * frame_size + frame_size // 2
+
 def pcm_to_wav_bytes(pcm_bytes: bytes, sample_rate=16000, channels=1, sampwidth=2) -> bytes:
     """
     把裸 PCM 数据封装成 WAV 格式字节流
@@ -43,6 +64,17 @@ def pcm_to_wav_bytes(pcm_bytes: bytes, sample_rate=16000, channels=1, sampwidth=
         wav_file.writeframes(pcm_bytes)
     return buf.getvalue()
 
+def wav_header(data_len: int, sample_rate=16000, channels=1, sampwidth=2) -> bytes:
+    """标准 44 字节 PCM WAV 头"""
+    byte_rate = sample_rate * channels * sampwidth
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_len, b"WAVE", b"fmt ", 16, 1, channels,
+                       sample_rate, byte_rate, channels * sampwidth, sampwidth * 8, b"data", data_len)
+
+def join_pcm_to_wav(parts: List[bytes], sample_rate=16000, channels=1, sampwidth=2) -> bytes:
+    """按顺序拼接多段裸 PCM 并封装为 WAV；只为最终结果分配一次内存"""
+    data_len = sum(len(p) for p in parts)
+    return b"".join([wav_header(data_len, sample_rate, channels, sampwidth), *parts])
+
 def wav_to_pcm_bytes(wav_path: str) -> bytes:
     with wave.open(wav_path, 'rb') as wav_file:
         # 检查基本信息（可选）
@@ -141,7 +173,88 @@ def get_audio_duration(audio_file_path: str) -> float:
         duration = frames / float(rate)
         return duration
 
-def split_audio_on_silence(audio_file_path: str, min_silence_len: int = 500, silence_thresh: int = -40) -> list:
+def load_pcm(audio_file_path: str) -> Tuple[np.ndarray, int]:
+    """
+    读取音频文件为单声道 int16 数组
+
+    16bit WAV 直接用 wave 模块读取（多声道取平均），其他格式经 pydub 解码
+
+    Returns:
+        (samples, sample_rate)
+    """
+    try:
+        with wave.open(audio_file_path, 'rb') as wf:
+            if wf.getsampwidth() == 2:
+                channels = wf.getnchannels()
+                samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+                if channels > 1:
+                    samples = samples.reshape(-1, channels).mean(axis=1).astype("<i2")
+                return samples, wf.getframerate()
+    except wave.Error:
+        pass
+    audio = AudioSegment.from_file(audio_file_path).set_channels(1).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype="<i2"), audio.frame_rate
+
+def find_speech_segments(samples: np.ndarray, sample_rate: int = 16000, min_silence_len: int = 500,
+                         silence_thresh: int = -40, keep_silence: int = 500, frame_ms: int = 10) -> List[Tuple[int, int]]:
+    """
+    按静音切分，返回各段语音的 [start, end) 样本区间
+
+    与 pydub 的 split_on_silence 规则相同：连续 min_silence_len 毫秒的平均能量低于阈值即为静音，
+    非静音部分两侧各保留 keep_silence 毫秒（相邻两段的保留部分重叠时从中间分开）。
+    但以 frame_ms 为步长一次性计算所有帧的能量，静音窗口用累加和求滑动平均，
+    静音区间的起止用差分定位，全程没有逐毫秒的 Python 循环。
+
+    Args:
+        samples: 单声道 int16 数组
+        sample_rate: 采样率
+        min_silence_len: 最小静音长度，单位毫秒
+        silence_thresh: 静音阈值，单位dBFS
+        keep_silence: 每段两侧保留的静音，单位毫秒
+        frame_ms: 能量计算的帧长，单位毫秒（即切分点的精度）
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    energies = frame_energies(samples, frame).astype(np.float64)
+    n = len(energies)
+    if n == 0:
+        return []
+    window = max(1, min_silence_len // frame_ms)
+    threshold = 32768.0 ** 2 * 10 ** (silence_thresh / 10)
+
+    # 以第 i 帧开头、长 window 帧的窗口平均能量低于阈值，则这些帧都属于静音
+    if n >= window:
+        csum = np.concatenate(([0.0], np.cumsum(energies)))
+        silent_start = (csum[window:] - csum[:-window]) / window < threshold
+        cover = np.zeros(n + 1, dtype=np.int32)
+        starts = np.flatnonzero(silent_start)
+        np.add.at(cover, starts, 1)
+        np.add.at(cover, starts + window, -1)
+        silent = np.cumsum(cover[:-1]) > 0
+    else:
+        silent = np.zeros(n, dtype=bool)
+
+    # 非静音区间的起止帧
+    edges = np.diff(np.concatenate(([0], (~silent).astype(np.int8), [0])))
+    seg_starts = np.flatnonzero(edges == 1)
+    seg_ends = np.flatnonzero(edges == -1)
+    if len(seg_starts) == 0:
+        return []
+
+    total = len(samples)
+    keep = sample_rate * keep_silence // 1000
+    starts = seg_starts * frame
+    ends = np.minimum(seg_ends * frame, total)
+    padded_starts = np.maximum(starts - keep, 0)
+    padded_ends = np.minimum(ends + keep, total)
+    # 相邻两段的保留部分重叠时，在两段之间的静音中点分开
+    mid = (ends[:-1] + starts[1:]) // 2
+    overlap = padded_ends[:-1] > padded_starts[1:]
+    padded_ends[:-1] = np.where(overlap, mid, padded_ends[:-1])
+    padded_starts[1:] = np.where(overlap, mid, padded_starts[1:])
+    return list(zip(padded_starts.tolist(), padded_ends.tolist()))
+
+def split_audio_on_silence(audio_file_path: str, min_silence_len: int = 500, silence_thresh: int = -40,
+                           as_wav: bool = True, keep_silence: int = 500) -> list:
     """
     根据静音分割音频
     
@@ -149,20 +262,20 @@ def split_audio_on_silence(audio_file_path: str, min_silence_len: int = 500, sil
         audio_file_path: 音频文件路径
         min_silence_len: 最小静音长度，单位毫秒
         silence_thresh: 静音阈值，单位dBFS
+        as_wav: True 时每段编码为单声道 WAV 字节流；False 时直接返回原始数组的只读视图（不拷贝）
+        keep_silence: 每段两侧保留的静音，单位毫秒
         
     Returns:
-        分割后的音频片段字节流列表
+        分割后的音频片段列表（WAV 字节流或 int16 数组视图）
     """
     try:
-        audio = AudioSegment.from_file(audio_file_path)
-        segments = split_on_silence(
-            audio,
-            min_silence_len=min_silence_len,
-            silence_thresh=silence_thresh,
-            keep_silence=500
-        )
-        # 导出每段为bytes
-        return [segment.export(io.BytesIO(), format="wav").getvalue() for segment in segments]
+        samples, sample_rate = load_pcm(audio_file_path)
+        samples.flags.writeable = False
+        bounds = find_speech_segments(samples, sample_rate, min_silence_len, silence_thresh, keep_silence)
+        segments = [samples[start:end] for start, end in bounds]
+        if as_wav:
+            return [pcm_to_wav_bytes(segment.tobytes(), sample_rate=sample_rate) for segment in segments]
+        return segments
     except Exception as e:
         print(f"分割音频错误: {e}")
         return []
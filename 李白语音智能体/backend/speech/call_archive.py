@@ -0,0 +1,212 @@
+# backend/speech/call_archive.py
+"""
+通话录音归档（可选，ARCHIVE_ENABLED=true 开启）
+
+请求路径只把 16kHz PCM 帧放入有界队列（满时丢弃并计数，从不阻塞）；后台线程按
+ARCHIVE_FLUSH_INTERVAL 批量取出，按“会话 + 音轨”合并后一次性编码写入，
+每个会话的用户音轨和李白音轨各一个 FLAC（或 Opus）文件。文件在会话结束时关闭并 fsync 一次，
+同时向归档目录下的 manifest.jsonl 追加一条记录（文件、时长、各段回复的时间位置）。
+
+目录结构:
+    ARCHIVE_DIR/YYYYMMDD/{USER_AUDIO_PREFIX}{会话ID}.flac
+    ARCHIVE_DIR/YYYYMMDD/{AI_AUDIO_PREFIX}{会话ID}.flac
+    ARCHIVE_DIR/manifest.jsonl
+"""
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.utils.file_utils import create_dir_if_not_exists
+
+SAMPLE_RATE = 16000
+
+USER = "user"
+AI = "ai"
+
+# 编码格式 -> (soundfile 容器, 编码, 扩展名)
+ARCHIVE_FORMATS = {
+    "flac": ("FLAC", "PCM_16", "flac"),
+    "opus": ("OGG", "OPUS", "opus"),
+}
+
+_CLOSE = object()
+
+
+class _SessionRecording:
+    """一个会话的归档状态，只在后台线程中访问"""
+
+    def __init__(self, session_id: str, started: float):
+        self.session_id = session_id
+        self.started = started                  # 会话开始的墙钟时间
+        self.files: Dict[str, Any] = {}         # 音轨 -> 打开的 SoundFile
+        self.paths: Dict[str, str] = {}
+        self.samples: Dict[str, int] = {USER: 0, AI: 0}
+        self.segments: List[Dict[str, float]] = []  # 李白各段回复在会话时间轴上的位置
+
+
+class CallArchiver:
+    def __init__(self, directory: Optional[str] = None, codec: Optional[str] = None,
+                 flush_interval: Optional[float] = None, max_pending: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        """
+        Args:
+            directory: 归档目录，默认 settings.ARCHIVE_DIR
+            codec: flac / opus，默认 settings.ARCHIVE_FORMAT
+            flush_interval: 批量写入间隔（秒），默认 settings.ARCHIVE_FLUSH_INTERVAL
+            max_pending: 队列上限（帧数），默认 settings.ARCHIVE_QUEUE_SIZE
+            enabled: 是否开启，默认 settings.ARCHIVE_ENABLED
+        """
+        self.enabled = settings.ARCHIVE_ENABLED if enabled is None else enabled
+        self.directory = directory or settings.ARCHIVE_DIR
+        self.codec = codec or settings.ARCHIVE_FORMAT
+        if self.codec not in ARCHIVE_FORMATS:
+            raise ValueError(f"未知的归档格式: {self.codec}，可选: {', '.join(ARCHIVE_FORMATS)}")
+        self.flush_interval = settings.ARCHIVE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._queue: "queue.Queue[Tuple[str, Any, Any, float]]" = queue.Queue(
+            maxsize=settings.ARCHIVE_QUEUE_SIZE if max_pending is None else max_pending)
+        self._sessions: Dict[str, _SessionRecording] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.counters = {"frames": 0, "dropped": 0, "batches": 0, "sessions": 0, "errors": 0}
+
+    # ---------- 请求路径（任意线程 / 事件循环中调用，均不阻塞） ----------
+
+    def _put(self, item) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.counters["dropped"] += 1
+
+    def record(self, session_id: str, track: str, pcm: bytes) -> None:
+        """记录一帧 16kHz 16bit 单声道 PCM（track 为 USER 或 AI）"""
+        if not self.enabled or not pcm:
+            return
+        self.counters["frames"] += 1
+        self._put((session_id, track, pcm, time.time()))
+
+    def close_session(self, session_id: str) -> None:
+        """会话结束：写完剩余帧后关闭文件并写入 manifest"""
+        if not self.enabled:
+            return
+        self._put((session_id, _CLOSE, None, time.time()))
+
+    def _ensure_started(self) -> None:
+        # 第一次使用时启动后台线程；fork 出的子进程中重新启动
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="call-archive", daemon=True)
+            self._thread.start()
+
+    # ---------- 后台线程 ----------
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"通话归档写入失败: {e}")
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch) -> None:
+        """把一批帧按（会话, 音轨）合并，每个文件只做一次编码写入"""
+        pending: Dict[Tuple[str, str], List[bytes]] = {}
+        closing: List[str] = []
+        for session_id, track, pcm, ts in batch:
+            rec = self._sessions.get(session_id)
+            if rec is None:
+                rec = self._sessions[session_id] = _SessionRecording(session_id, ts)
+            if track is _CLOSE:
+                closing.append(session_id)
+                continue
+            if track == AI:
+                # 记录每段回复在会话时间轴上的位置和在李白音轨文件中的偏移
+                offset = rec.samples[AI] + sum(len(p) for p in pending.get((session_id, AI), [])) // 2
+                rec.segments.append({"at": round(ts - rec.started, 3), "offset": offset, "samples": len(pcm) // 2})
+            pending.setdefault((session_id, track), []).append(pcm)
+
+        for (session_id, track), parts in pending.items():
+            rec = self._sessions[session_id]
+            samples = np.frombuffer(b"".join(parts), dtype="<i2")
+            self._open(rec, track).write(samples)
+            rec.samples[track] += len(samples)
+        self.counters["batches"] += 1
+
+        for session_id in closing:
+            self._finish(self._sessions.pop(session_id))
+
+    def _open(self, rec: _SessionRecording, track: str):
+        if track not in rec.files:
+            import soundfile as sf
+            fmt, subtype, ext = ARCHIVE_FORMATS[self.codec]
+            day_dir = os.path.join(self.directory, datetime.fromtimestamp(rec.started).strftime("%Y%m%d"))
+            create_dir_if_not_exists(day_dir)
+            prefix = settings.USER_AUDIO_PREFIX if track == USER else settings.AI_AUDIO_PREFIX
+            path = os.path.join(day_dir, f"{prefix or track + '_'}{rec.session_id}.{ext}")
+            rec.files[track] = sf.SoundFile(path, mode="w", samplerate=SAMPLE_RATE, channels=1,
+                                            format=fmt, subtype=subtype)
+            rec.paths[track] = path
+        return rec.files[track]
+
+    def _finish(self, rec: _SessionRecording) -> None:
+        for f in rec.files.values():
+            f.close()
+        if not rec.files:
+            return
+        entry = {
+            "session_id": rec.session_id,
+            "started": datetime.fromtimestamp(rec.started).isoformat(timespec="seconds"),
+            "codec": self.codec,
+            "sample_rate": SAMPLE_RATE,
+            "files": {track: os.path.relpath(path, self.directory) for track, path in rec.paths.items()},
+            "seconds": {track: round(n / SAMPLE_RATE, 3) for track, n in rec.samples.items()},
+            "bytes": {track: os.path.getsize(path) for track, path in rec.paths.items()},
+            "ai_segments": rec.segments,
+        }
+        # 每个会话只 fsync 一次：文件关闭后同步，再追加 manifest
+        for path in rec.paths.values():
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        with open(os.path.join(self.directory, "manifest.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.counters["sessions"] += 1
+
+    def flush(self) -> None:
+        """等待队列中的帧全部写入（测试和进程退出时使用）"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "codec": self.codec, "pending": self._queue.qsize(),
+                "open_sessions": len(self._sessions), **self.counters}
+
+
+# 进程内共享的归档器
+call_archive = CallArchiver()
@@ -0,0 +1,132 @@
+# backend/speech/filler.py
+import asyncio
+import random
+from typing import List, Optional
+
+import numpy as np
+
+from backend.config import settings
+
+SAMPLE_RATE = 16000
+
+# 默认的李白口吻垫话，LLM 迟迟未出结果时先播放一句
+DEFAULT_FILLER_PHRASES = [
+    "且容我思量……",
+    "嗯，此问甚妙，待我细想。",
+    "容我斟酒一杯，再与君细说。",
+    "妙哉，让我想一想。",
+    "君莫急，诗思正来。",
+]
+
+
+def apply_fade(pcm: np.ndarray, fade_in_ms: int = 10, fade_out_ms: int = 30) -> np.ndarray:
+    """首尾加线性淡入淡出，避免播放开始和结束时的爆音"""
+    out = pcm.astype(np.float32)
+    n_in = min(len(out), SAMPLE_RATE * fade_in_ms // 1000)
+    n_out = min(len(out), SAMPLE_RATE * fade_out_ms // 1000)
+    if n_in:
+        out[:n_in] *= np.linspace(0.0, 1.0, n_in, dtype=np.float32)
+    if n_out:
+        out[-n_out:] *= np.linspace(1.0, 0.0, n_out, dtype=np.float32)
+    return out.astype("<i2")
+
+
+class FillerBank:
+    """
+    预先合成的垫话音频库
+
+    启动时用当前 TTS 引擎把每句垫话合成一次，以 16kHz int16 PCM 常驻内存；
+    轮次中只是取出已有音频发送，不在关键路径上做任何合成。
+    """
+
+    def __init__(self, phrases: Optional[List[str]] = None):
+        self.phrases = phrases or settings.FILLER_PHRASES or DEFAULT_FILLER_PHRASES
+        self.clips: List[np.ndarray] = []
+        self._last = -1
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.clips)
+
+    async def prepare(self, tts) -> None:
+        """用 TTSGenerator 的引擎合成全部垫话（只在启动时调用一次）"""
+        parts = await tts.engine.synthesize_batch(self.phrases)
+        self.clips = [apply_fade(np.frombuffer(pcm, dtype="<i2")) for pcm in parts if pcm]
+        print(f"垫话音频已就绪：{len(self.clips)} 句，"
+              f"共 {sum(c.nbytes for c in self.clips) / 1024:.0f} KB")
+
+    def pick(self) -> Optional[np.ndarray]:
+        """随机取一句，不与上一次重复"""
+        if not self.clips:
+            return None
+        choices = [i for i in range(len(self.clips)) if i != self._last] or [0]
+        self._last = random.choice(choices)
+        return self.clips[self._last]
+
+
+class FillerPlayer:
+    """
+    按实时速率逐帧发送一句垫话，可随时停止
+
+    停止时（真正的回复已就绪，或用户开口打断）不是直接断掉，而是把接下来的一小段做淡出后发出，
+    听感上是自然收尾而不是突然截断。
+    """
+
+    def __init__(self, pcm: np.ndarray, send, interrupted=lambda: False, frame_ms: int = 64, fade_ms: int = 30):
+        """
+        Args:
+            pcm: 垫话音频（16kHz int16）
+            send: 发送一帧 PCM bytes 的协程函数
+            interrupted: 返回 True 时立即停止（如用户开始说话）
+            frame_ms: 每帧时长（毫秒）
+            fade_ms: 停止时淡出的时长（毫秒）
+        """
+        self.pcm = pcm
+        self.send = send
+        self.interrupted = interrupted
+        self.frame = SAMPLE_RATE * frame_ms // 1000
+        self.fade = SAMPLE_RATE * fade_ms // 1000
+        self.sent: List[bytes] = []
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止播放并等待淡出帧发出"""
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception as e:
+                print(f"垫话发送失败: {e}")
+
+    async def _emit(self, pcm: np.ndarray) -> None:
+        data = pcm.tobytes()
+        await self.send(data)
+        self.sent.append(data)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        pos = 0
+        while pos < len(self.pcm):
+            if self._stop.is_set() or self.interrupted():
+                tail = self.pcm[pos:pos + self.fade]
+                if len(tail):
+                    await self._emit(apply_fade(tail, fade_in_ms=0, fade_out_ms=len(tail) * 1000 // SAMPLE_RATE))
+                return
+            chunk = self.pcm[pos:pos + self.frame]
+            await self._emit(chunk)
+            pos += len(chunk)
+            # 按播放时长等待下一帧；期间一旦收到停止信号立即醒来
+            next_at += len(chunk) / SAMPLE_RATE
+            try:
+                await asyncio.wait_for(self._stop.wait(), max(0.0, next_at - loop.time()))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,201 @@
+# backend/speech/neural_vad.py
+"""
+所有会话共享的批量神经网络 VAD（Silero VAD ONNX 模型，CPU 推理）
+
+能量门限（is_speaking）分不清人声和背景噪声，噪声会误触发打断和无效识别。这里改用小型神经网络 VAD：
+    - 每个会话持有一个 VADStream，事件循环收到上行音频时只把它追加进去（不做推理）
+    - 调度线程每个 tick 从所有有新音频的会话各取最新一帧（512 个采样，32ms），
+      连同各自的循环状态拼成一个 batch，一次推理算出全部会话的语音概率，再写回各会话
+    - 每次推理的固定开销由 batch 内所有会话分摊，并发越高，单个会话的成本越低
+
+依赖 onnxruntime（可选）；未安装或模型文件不存在时加载失败，调用方回退到能量门限。
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import settings
+
+SAMPLE_RATE = 16000
+FRAME = 512      # 模型每帧的采样数（16kHz 下 32ms）
+CONTEXT = 64     # 每帧前需拼接的上一段音频的采样数
+STATE_SIZE = 128
+
+
+class SileroVADModel:
+    """Silero VAD ONNX 模型：输入 (batch, CONTEXT + FRAME) 的音频与 (2, batch, 128) 的循环状态"""
+
+    def __init__(self, model_path: str, threads: int = 1):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._sr = np.array(SAMPLE_RATE, dtype=np.int64)
+
+    def __call__(self, frames: np.ndarray, state: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            frames: (batch, CONTEXT + FRAME) float32，取值 [-1, 1]
+            state: (2, batch, 128) float32
+
+        Returns:
+            (每个样本的语音概率 (batch,), 新的循环状态)
+        """
+        probs, state = self.session.run(None, {"input": frames, "state": state, "sr": self._sr})
+        return probs[:, 0], state
+
+
+class VADStream:
+    """单个会话在共享 VAD 中的状态：最近的音频、循环状态和平滑后的说话判断"""
+
+    def __init__(self, threshold: float, min_silence: float):
+        """
+        Args:
+            threshold: 语音概率阈值，超过即判为开始说话
+            min_silence: 概率低于 threshold - 0.15 持续这么久（秒）才判为停止说话，避免句中停顿被切断
+        """
+        self.threshold = threshold
+        self.min_silence = min_silence
+        self.tail = np.zeros(CONTEXT + FRAME, dtype=np.float32)
+        self.state = np.zeros((2, STATE_SIZE), dtype=np.float32)
+        self.new_samples = 0
+        self.probability = 0.0
+        self.speaking = False
+        self.frames_scored = 0
+        self._last_speech = 0.0
+        self._lock = threading.Lock()
+
+    def push(self, pcm: bytes) -> None:
+        """追加 16kHz int16 PCM（在事件循环中调用，只做拷贝）"""
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        with self._lock:
+            self.tail = np.concatenate((self.tail, samples))[-(CONTEXT + FRAME):]
+            self.new_samples += len(samples)
+
+    def take_newest(self) -> Optional[np.ndarray]:
+        """取出最新一帧（连同前面的 CONTEXT 个采样）；自上次以来不足一帧新音频时返回 None"""
+        with self._lock:
+            if self.new_samples < FRAME:
+                return None
+            self.new_samples = 0
+            return self.tail.copy()
+
+    def update(self, probability: float, now: float) -> None:
+        """写回推理结果，按阈值和最短静音时长更新说话状态"""
+        self.probability = probability
+        self.frames_scored += 1
+        if probability >= self.threshold:
+            self.speaking = True
+            self._last_speech = now
+        elif self.speaking and probability < self.threshold - 0.15 and now - self._last_speech >= self.min_silence:
+            self.speaking = False
+
+
+class BatchedVAD:
+    """
+    共享 VAD 调度器：后台线程按固定 tick 对所有会话做批量推理
+
+    每个 tick 每个会话最多评估一帧（最新的一帧），处理不过来时跳过较旧的音频而不是积压。
+    """
+
+    def __init__(self, model, tick_ms: int = 32, threshold: float = 0.5, min_silence_ms: int = 300,
+                 max_batch: int = 256):
+        """
+        Args:
+            model: 可调用对象 (frames, state) -> (probs, state)，如 SileroVADModel
+            tick_ms: 调度间隔（毫秒）
+            threshold: 语音概率阈值
+            min_silence_ms: 判为停止说话所需的最短静音（毫秒）
+            max_batch: 单次推理的最大 batch，会话更多时分多次推理
+        """
+        self.model = model
+        self.tick_seconds = tick_ms / 1000
+        self.threshold = threshold
+        self.min_silence = min_silence_ms / 1000
+        self.max_batch = max_batch
+        self.streams: Dict[str, VADStream] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.ticks = 0
+        self.batches = 0
+        self.frames = 0
+        self.infer_seconds = 0.0
+        self.max_batch_seen = 0
+        self.late_ticks = 0
+
+    def register(self, session_id: str) -> VADStream:
+        stream = VADStream(self.threshold, self.min_silence)
+        with self._lock:
+            self.streams[session_id] = stream
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batched-vad", daemon=True)
+                self._thread.start()
+        return stream
+
+    def unregister(self, session_id: str) -> None:
+        with self._lock:
+            self.streams.pop(session_id, None)
+
+    def _run(self) -> None:
+        next_tick = time.monotonic()
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"VAD 推理失败: {e}")
+            next_tick += self.tick_seconds
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 推理耗时超过一个 tick：不补跑错过的 tick，从当前时刻重新计时
+                self.late_ticks += 1
+                next_tick = time.monotonic()
+
+    def tick(self) -> int:
+        """对所有有新音频的会话做一次批量推理，返回本次评估的会话数"""
+        with self._lock:
+            streams = list(self.streams.values())
+        ready: List[Tuple[VADStream, np.ndarray]] = []
+        for stream in streams:
+            frame = stream.take_newest()
+            if frame is not None:
+                ready.append((stream, frame))
+        self.ticks += 1
+        for i in range(0, len(ready), self.max_batch):
+            batch = ready[i:i + self.max_batch]
+            frames = np.stack([frame for _, frame in batch])
+            state = np.stack([stream.state for stream, _ in batch], axis=1)
+            start = time.perf_counter()
+            probs, state = self.model(frames, state)
+            self.infer_seconds += time.perf_counter() - start
+            now = time.monotonic()
+            for j, (stream, _) in enumerate(batch):
+                stream.state = state[:, j]
+                stream.update(float(probs[j]), now)
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.frames += len(ready)
+        return len(ready)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.streams),
+            "ticks": self.ticks,
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": round(self.frames / self.batches, 1) if self.batches else 0,
+            "max_batch": self.max_batch_seen,
+            "avg_infer_ms": round(self.infer_seconds / self.batches * 1000, 3) if self.batches else None,
+            "per_frame_us": round(self.infer_seconds / self.frames * 1e6, 1) if self.frames else None,
+            "late_ticks": self.late_ticks,
+        }
+
+
+def create_batched_vad() -> BatchedVAD:
+    """按配置加载模型并创建共享 VAD（由 backend.components 注册为 "vad" 组件）"""
+    model = SileroVADModel(settings.VAD_MODEL_PATH, settings.VAD_THREADS)
+    return BatchedVAD(model, settings.VAD_TICK_MS, settings.VAD_THRESHOLD, settings.VAD_MIN_SILENCE_MS)
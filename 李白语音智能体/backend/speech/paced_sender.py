@@ -0,0 +1,149 @@
+# backend/speech/paced_sender.py
+"""
+按播放进度限速的下行音频发送
+
+不再按 socket 能接受的最快速度推送整段回复，而是只让客户端领先播放进度 lead_ms 的音频：
+    - 时钟模型：按已发送音频的时长推算客户端何时播完（playback_end），领先量 = playback_end - 当前时刻
+    - 客户端确认：客户端定期回报已播完（或已丢弃）的累计时长 {"type": "played", "seconds": x}，
+      领先量取 已发送时长 - 已确认时长；确认超过 ack_timeout 秒未更新时退回时钟模型
+两者取较大值，超过 lead_ms 就等待。客户端在有缓冲的情况下播放累计落后实时超过阈值时记为慢消费者。
+
+打断时发送 {"type": "stop_audio"}，客户端丢弃尚未播放的音频；由于最多只领先 lead_ms，打断几乎立即生效。
+"""
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from backend.config import settings
+from backend.speech.audio_processing import wav_header
+
+SAMPLE_RATE = 16000
+
+
+class PacedSender:
+    def __init__(self, send_bytes: Callable[[bytes], Awaitable[None]], send_text: Callable[[str], Awaitable[None]],
+                 lead_ms: Optional[int] = None, slow_consumer_ms: Optional[int] = None, ack_timeout: float = 2.0):
+        """
+        Args:
+            send_bytes: 发送二进制消息的协程函数
+            send_text: 发送文本消息的协程函数
+            lead_ms: 允许领先客户端播放进度的音频时长（毫秒），默认取 settings.AUDIO_SEND_LEAD_MS
+            slow_consumer_ms: 客户端播放累计落后实时超过该值（毫秒）时记为慢消费者，
+                              默认取 settings.AUDIO_SLOW_CONSUMER_MS
+            ack_timeout: 客户端确认超过该时长（秒）未更新时只按时钟模型限速
+        """
+        self.send_bytes = send_bytes
+        self.send_text = send_text
+        self.lead = (settings.AUDIO_SEND_LEAD_MS if lead_ms is None else lead_ms) / 1000
+        self.slow_threshold = (settings.AUDIO_SLOW_CONSUMER_MS if slow_consumer_ms is None else slow_consumer_ms) / 1000
+        self.ack_timeout = ack_timeout
+        self.playback_end = 0.0    # 时钟模型：已发送音频预计播完的时刻（time.monotonic）
+        self.sent_seconds = 0.0    # 累计发送的音频时长
+        self.acked_seconds: Optional[float] = None
+        self.acked_at = 0.0
+        self._interrupted = asyncio.Event()
+        self.ack_lag = 0.0         # 客户端播放相对实时的累计落后量（秒）
+        self.slow = False
+        self.slow_events = 0
+        self.max_ack_lag = 0.0
+        self.waited_seconds = 0.0
+        self.interruptions = 0
+
+    def _ack_fresh(self, now: float) -> bool:
+        return self.acked_seconds is not None and now - self.acked_at <= self.ack_timeout
+
+    def current_lead(self, now: Optional[float] = None) -> float:
+        """客户端尚未播放的音频时长（秒）"""
+        now = time.monotonic() if now is None else now
+        clock_lead = max(0.0, self.playback_end - now)
+        if not self._ack_fresh(now):
+            return clock_lead
+        return max(clock_lead, self.sent_seconds - self.acked_seconds)
+
+    def on_ack(self, played_seconds: float) -> None:
+        """客户端回报已播完（或已丢弃）的累计音频时长，同时累计客户端相对实时播放的落后量"""
+        now = time.monotonic()
+        if self.acked_seconds is not None:
+            elapsed = now - self.acked_at
+            # 客户端缓冲足够时，两次确认之间本应播放 elapsed 秒；少播的部分累计为落后量，播得够快时逐渐抵消
+            if self.sent_seconds - self.acked_seconds >= elapsed:
+                self.ack_lag = max(0.0, self.ack_lag + elapsed - (played_seconds - self.acked_seconds))
+                self._check_slow()
+        self.acked_seconds = played_seconds
+        self.acked_at = now
+
+    def _check_slow(self) -> None:
+        self.max_ack_lag = max(self.max_ack_lag, self.ack_lag)
+        if self.ack_lag > self.slow_threshold and not self.slow:
+            self.slow = True
+            self.slow_events += 1
+            print(f"⚠️客户端播放落后实时 {self.ack_lag * 1000:.0f} ms（慢消费者），按客户端确认限速")
+        elif self.ack_lag <= self.slow_threshold / 2:
+            self.slow = False
+
+    def begin(self) -> None:
+        """开始发送新的一段回复（清除上一次的打断状态）"""
+        self._interrupted.clear()
+
+    @property
+    def interrupted(self) -> bool:
+        return self._interrupted.is_set()
+
+    async def interrupt(self) -> None:
+        """打断：停止等待中的发送，并通知客户端丢弃尚未播放的音频"""
+        self._interrupted.set()
+        if self.current_lead() <= 0:
+            return
+        self.interruptions += 1
+        # 客户端丢弃全部已收到的音频，时钟模型随之清零；确认值会由客户端追平 sent_seconds
+        self.playback_end = time.monotonic()
+        try:
+            await self.send_text(json.dumps({"type": "stop_audio"}))
+        except Exception as e:
+            print(f"发送停止播放消息失败: {e}")
+
+    async def _wait_for_room(self) -> bool:
+        """等待领先量降到 lead 以内；被打断时返回 False"""
+        start = time.monotonic()
+        try:
+            while not self._interrupted.is_set():
+                excess = self.current_lead() - self.lead
+                if excess <= 0:
+                    return True
+                try:
+                    await asyncio.wait_for(self._interrupted.wait(), max(excess, 0.01))
+                except asyncio.TimeoutError:
+                    pass
+            return False
+        finally:
+            self.waited_seconds += time.monotonic() - start
+
+    async def send(self, pcm: bytes) -> bool:
+        """
+        发送一段 16kHz int16 PCM（带 WAV 头，客户端可独立解码），必要时先等待播放进度
+
+        Returns:
+            是否已发送（被打断时为 False）
+        """
+        if not await self._wait_for_room():
+            return False
+        await self.send_bytes(wav_header(len(pcm)) + pcm)
+        now = time.monotonic()
+        duration = len(pcm) / 2 / SAMPLE_RATE
+        self.playback_end = max(self.playback_end, now) + duration
+        self.sent_seconds += duration
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lead_ms": round(self.current_lead() * 1000),
+            "sent_seconds": round(self.sent_seconds, 2),
+            "acked_seconds": round(self.acked_seconds, 2) if self.acked_seconds is not None else None,
+            "slow_consumer": self.slow,
+            "slow_events": self.slow_events,
+            "ack_lag_ms": round(self.ack_lag * 1000),
+            "max_ack_lag_ms": round(self.max_ack_lag * 1000),
+            "paced_wait_seconds": round(self.waited_seconds, 2),
+            "interruptions": self.interruptions,
+        }
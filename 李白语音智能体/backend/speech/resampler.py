@@ -0,0 +1,84 @@
+# backend/speech/resampler.py
+from math import gcd
+from typing import Union
+
+import numpy as np
+
+TARGET_SAMPLE_RATE = 16000
+
+
+class StreamingResampler:
+    """
+    流式多相（polyphase）重采样器：int16 PCM 输入，int16 PCM 输出
+
+    每个会话一个实例，逐块调用 process()。滤波器历史在块之间保留，
+    因此分块处理与整段处理的结果一致，且每块只计算新到的数据。
+    每块的全部输出样本通过一次向量化的 gather + 点积求得，没有逐样本的 Python 循环。
+    """
+
+    def __init__(self, source_rate: int, target_rate: int = TARGET_SAMPLE_RATE,
+                 taps_per_phase: int = 32, beta: float = 8.0):
+        """
+        Args:
+            source_rate: 输入采样率，如 44100、48000
+            target_rate: 输出采样率，默认 16000
+            taps_per_phase: 每个相位的滤波器抽头数，越大过渡带越窄、计算量越大
+            beta: Kaiser 窗参数，越大阻带衰减越强
+        """
+        g = gcd(source_rate, target_rate)
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.up = target_rate // g
+        self.down = source_rate // g
+        self.taps = taps_per_phase
+
+        # 在上采样后的速率上设计低通滤波器，截止频率取两者奈奎斯特频率中较低者的 90%
+        n = self.taps * self.up
+        cutoff = 0.9 * 0.5 / max(self.up, self.down)
+        t = np.arange(n) - (n - 1) / 2
+        h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n, beta)
+        h *= self.up / h.sum()  # 每个相位的直流增益为 1
+        # 多相分解：第 p 个相位使用 h[p], h[p+up], h[p+2up], ...
+        self.phases = h.reshape(self.taps, self.up).T.copy()
+
+        # 输入历史，前面补 taps-1 个零，使流开头也能按完整窗口计算
+        self._history = np.zeros(self.taps - 1, dtype=np.float64)
+        self._consumed = 0   # 已输入的样本总数
+        self._produced = 0   # 已输出的样本总数
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    def process(self, chunk: Union[bytes, np.ndarray]) -> bytes:
+        """
+        重采样一块 PCM
+
+        Args:
+            chunk: int16 小端裸 PCM（bytes）或 int16 数组
+
+        Returns:
+            目标采样率下的 int16 小端裸 PCM
+        """
+        samples = np.frombuffer(chunk, dtype="<i2") if isinstance(chunk, (bytes, bytearray, memoryview)) else chunk
+        if self.passthrough:
+            return samples.astype("<i2", copy=False).tobytes()
+        if len(samples) == 0:
+            return b""
+
+        buffer = np.concatenate((self._history, samples.astype(np.float64)))
+        buffer_start = self._consumed - (self.taps - 1)  # buffer[0] 对应的全局输入下标
+        self._consumed += len(samples)
+
+        # 第 m 个输出样本对应上采样序列中的位置 m*down，只要其所需的输入样本已到达即可输出
+        end = (self._consumed * self.up + self.down - 1) // self.down
+        m = np.arange(self._produced, end, dtype=np.int64)
+        pos = m * self.down
+        phase = pos % self.up
+        last = pos // self.up - buffer_start  # 窗口中最新一个输入样本在 buffer 中的位置
+        window = buffer[last[:, None] - np.arange(self.taps)[None, :]]
+        out = np.einsum("ij,ij->i", window, self.phases[phase])
+        self._produced = end
+
+        self._history = buffer[-(self.taps - 1):]
+        return np.clip(np.rint(out), -32768, 32767).astype("<i2").tobytes()
@@ -0,0 +1,209 @@
+# backend/speech/traffic_trace.py
+"""
+会话流量录制（可选，TRACE_ENABLED=true 开启）
+
+把每个会话客户端发来的原始消息（上行 PCM 帧和文本控制消息）连同到达时刻写成紧凑的二进制 trace，
+供 backend.benchmarks.traffic_replay 按真实的停顿、打断和话语长度回放压测。
+与通话归档相同，请求路径只把消息放入有界队列（满时丢弃并计数），由后台线程批量写盘。
+
+trace 文件格式（小端）:
+    文件头: MAGIC(4) 版本 u8 保留 u8×3 会话开始的墙钟时间 f64
+    记录:   类型 u8 距上一条记录的间隔（微秒） u32 负载长度 u32 负载
+类型为 AUDIO（上行 PCM16，客户端声明的采样率）或 TEXT（UTF-8 文本控制消息）。
+
+目录结构:
+    TRACE_DIR/YYYYMMDD/{会话ID}.lbtr
+"""
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from backend.config import settings
+from backend.utils.file_utils import create_dir_if_not_exists
+
+MAGIC = b"LBTR"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xd")
+RECORD = struct.Struct("<BII")
+
+AUDIO = 0
+TEXT = 1
+
+TRACE_EXT = ".lbtr"
+MAX_GAP_US = 2 ** 32 - 1
+
+_CLOSE = object()
+
+
+class _SessionTrace:
+    """一个会话的 trace 文件，只在后台线程中访问"""
+
+    def __init__(self, file: BinaryIO, path: str, started: float):
+        self.file = file
+        self.path = path
+        self.last = started      # 上一条记录的到达时刻（time.monotonic）
+        self.records = 0
+
+
+class TrafficRecorder:
+    def __init__(self, directory: Optional[str] = None, flush_interval: Optional[float] = None,
+                 max_pending: Optional[int] = None, enabled: Optional[bool] = None):
+        """
+        Args:
+            directory: trace 目录，默认 settings.TRACE_DIR
+            flush_interval: 批量写入间隔（秒），默认 settings.ARCHIVE_FLUSH_INTERVAL
+            max_pending: 队列上限（消息数），默认 settings.TRACE_QUEUE_SIZE
+            enabled: 是否开启，默认 settings.TRACE_ENABLED
+        """
+        self.enabled = settings.TRACE_ENABLED if enabled is None else enabled
+        self.directory = directory or settings.TRACE_DIR
+        self.flush_interval = settings.ARCHIVE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._queue: "queue.Queue[Tuple[str, Any, Any, float]]" = queue.Queue(
+            maxsize=settings.TRACE_QUEUE_SIZE if max_pending is None else max_pending)
+        self._sessions: Dict[str, _SessionTrace] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.counters = {"records": 0, "dropped": 0, "bytes": 0, "sessions": 0, "errors": 0}
+
+    # ---------- 请求路径（事件循环中调用，不阻塞） ----------
+
+    def _put(self, item) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.counters["dropped"] += 1
+
+    def record_audio(self, session_id: str, pcm: bytes) -> None:
+        """记录一帧客户端原始上行 PCM（重采样之前）"""
+        if not self.enabled or not pcm:
+            return
+        self.counters["records"] += 1
+        self._put((session_id, AUDIO, pcm, time.monotonic()))
+
+    def record_text(self, session_id: str, text: str) -> None:
+        """记录一条客户端文本控制消息"""
+        if not self.enabled:
+            return
+        self.counters["records"] += 1
+        self._put((session_id, TEXT, text.encode("utf-8"), time.monotonic()))
+
+    def close_session(self, session_id: str) -> None:
+        """会话结束：写完剩余记录后关闭文件"""
+        if not self.enabled:
+            return
+        self._put((session_id, _CLOSE, None, time.monotonic()))
+
+    def _ensure_started(self) -> None:
+        # 第一次使用时启动后台线程；fork 出的子进程中重新启动
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="traffic-trace", daemon=True)
+            self._thread.start()
+
+    # ---------- 后台线程 ----------
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"流量录制写入失败: {e}")
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch) -> None:
+        touched = set()
+        for session_id, kind, payload, ts in batch:
+            trace = self._sessions.get(session_id)
+            if kind is _CLOSE:
+                if trace is not None:
+                    trace.file.close()
+                    del self._sessions[session_id]
+                    self.counters["sessions"] += 1
+                    touched.discard(session_id)
+                continue
+            if trace is None:
+                trace = self._sessions[session_id] = self._open(session_id, ts)
+            gap = min(MAX_GAP_US, max(0, round((ts - trace.last) * 1e6)))
+            trace.file.write(RECORD.pack(kind, gap, len(payload)))
+            trace.file.write(payload)
+            trace.last = ts
+            trace.records += 1
+            self.counters["bytes"] += RECORD.size + len(payload)
+            touched.add(session_id)
+        # 每批结束时把缓冲写入文件，进程异常退出最多丢失一个批次
+        for session_id in touched:
+            self._sessions[session_id].file.flush()
+
+    def _open(self, session_id: str, started: float) -> _SessionTrace:
+        now = time.time()
+        day_dir = os.path.join(self.directory, datetime.fromtimestamp(now).strftime("%Y%m%d"))
+        create_dir_if_not_exists(day_dir)
+        path = os.path.join(day_dir, f"{session_id}{TRACE_EXT}")
+        f = open(path, "wb")
+        f.write(HEADER.pack(MAGIC, VERSION, now))
+        self.counters["bytes"] += HEADER.size
+        return _SessionTrace(f, path, started)
+
+    def flush(self) -> None:
+        """等待队列中的记录全部写入（测试和进程退出时使用）"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "pending": self._queue.qsize(),
+                "open_sessions": len(self._sessions), **self.counters}
+
+
+def read_trace(path: str) -> Tuple[float, Iterator[Tuple[float, int, bytes]]]:
+    """
+    读取 trace 文件
+
+    Returns:
+        (会话开始的墙钟时间, 记录迭代器)；每条记录为 (距第一条记录的秒数, 类型, 负载)。
+        会话仍在录制或进程异常退出时，末尾不完整的记录被忽略。
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"不是有效的 trace 文件: {path}")
+    magic, version, started = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"不支持的 trace 文件: {path}（magic={magic!r}, version={version}）")
+
+    def records() -> Iterator[Tuple[float, int, bytes]]:
+        offset = HEADER.size
+        elapsed_us = 0
+        while offset + RECORD.size <= len(data):
+            kind, gap, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if offset + length > len(data):
+                break
+            elapsed_us += gap
+            yield elapsed_us / 1e6, kind, data[offset:offset + length]
+            offset += length
+
+    return started, records()
+
+
+# 进程内共享的录制器
+traffic_recorder = TrafficRecorder()
@@ -1,59 +1,62 @@
 import os
 import asyncio
-import edge_tts
-from typing import AsyncGenerator
-from backend.utils.file_utils import clean_directory
-from backend.speech.audio_processing import pcm_to_wav_bytes
+from typing import AsyncGenerator, Optional
+from backend.utils.audio_store import get_audio_store
+from backend.utils.text_utils import split_sentences, split_for_synthesis
+from backend.speech.audio_processing import pcm_to_wav_bytes, join_pcm_to_wav
+from backend.speech.tts_engines import create_tts_engine
 from backend.config import settings
-import io
-import wave
 
 class TTSGenerator:
-    def __init__(self):
-        self.voice = "zh-CN-YunjianNeural"
-        self.rate = "+0%"
-        self.sample_rate = 16000  # 固定采样率为16000Hz
+    def __init__(self, engine: Optional[str] = None):
+        """
+        Args:
+            engine: TTS 引擎名称（edge / local），默认取 settings.TTS_ENGINE
+        """
+        self.engine = create_tts_engine(engine)
+        self.sample_rate = self.engine.sample_rate  # 固定采样率为16000Hz
         self.audio_dir = settings.AUDIO_DIR
-        clean_directory(self.audio_dir)
+        self._cached_audio = {}  # 文本 -> 预先合成的 WAV（如过载时的“忙碌”回复）
+        # 目录的扫描、过期清理和写盘都在后台线程中进行，构造时不访问磁盘
+        self.audio_store = get_audio_store(self.audio_dir)
+
+    def preload(self) -> None:
+        """同步加载本地模型（多 worker 部署时在 fork 前调用，使各 worker 共享模型内存）"""
+        self.engine.preload()
+
+    async def warm_up(self) -> None:
+        """预热TTS引擎（建立长连接 / 加载本地模型），避免第一句回复承担初始化耗时"""
+        self.audio_store.start()
+        await self.engine.warm_up()
+        # 预先合成“忙碌”回复，过载降级时无需再调用TTS
+        await self.cached_audio(settings.BUSY_REPLY_TEXT)
 
     async def synthesize_full_audio(self, text: str) -> bytes:
-        """生成完整的WAV格式音频"""
-        communicate = edge_tts.Communicate(text, self.voice, rate=self.rate)
-        stream = communicate.stream()
+        """
+        生成完整的WAV格式音频
 
-        pcm_data = bytearray()
-        async for chunk in stream:
-            if chunk["type"] == "audio":
-                pcm_data.extend(chunk["data"])
-        
-        # 将PCM数据封装为WAV格式
-        return pcm_to_wav_bytes(pcm_data)
+        长文本按句切分后由引擎并发合成（并发数受引擎限制，如 TTS_MAX_PARALLEL），
+        多句回复的耗时接近其中最慢的一句；各段按顺序拼接，只分配一次最终结果的内存
+        """
+        chunks = split_for_synthesis(text)
+        if len(chunks) <= 1:
+            return pcm_to_wav_bytes(await self.engine.synthesize(text))
+        parts = await self.engine.synthesize_batch(chunks)
+        return join_pcm_to_wav(parts, sample_rate=self.sample_rate)
     
+    async def cached_audio(self, text: str) -> bytes:
+        """返回固定文本的WAV，只在第一次调用时合成"""
+        if text not in self._cached_audio:
+            self._cached_audio[text] = await self.synthesize_full_audio(text)
+        return self._cached_audio[text]
+
     async def generate_pcm_chunks_async(self, text: str) -> AsyncGenerator[bytes, None]:
+        """按句切分后并行合成，按顺序逐块返回16kHz 16bit单声道PCM"""
         try:
-            communicate = edge_tts.Communicate(text, self.voice, rate=self.rate)
-            stream = communicate.stream()
-
-            raw_audio = bytearray()
-            async for chunk in stream:
-                if chunk["type"] == "audio":
-                    raw_audio.extend(chunk["data"])
-
-            # 裸PCM数据，直接封装成WAV
-            wav_bytes = pcm_to_wav_bytes(bytes(raw_audio))
-
-            # 从wav_bytes中用 wave 读取 PCM 分块返回
-            wav_buffer = io.BytesIO(wav_bytes)
-            with wave.open(wav_buffer, "rb") as wav_file:
-                if wav_file.getsampwidth() != 2 or wav_file.getnchannels() != 1:
-                    raise ValueError("仅支持16bit单声道音频")
-
-                frame_size = 3200
-                while True:
-                    pcm_chunk = wav_file.readframes(frame_size // 2)
-                    if not pcm_chunk:
-                        break
-                    yield pcm_chunk
+            frame_size = 3200
+            async for pcm in self.engine.stream(split_sentences(text)):
+                for i in range(0, len(pcm), frame_size):
+                    yield pcm[i:i + frame_size]
         except Exception as e:
             print(f"TTS错误: {e}")
 
@@ -66,7 +69,7 @@ async def test_wav_save():
     tts = TTSGenerator()
     text = "你是谁，是不是李白？"
     wav_bytes = await tts.synthesize_full_audio(text)
-    path = os.path.join(tts.audio_dir, "test16000_你是谁_是不是李白.wav")
+    path = os.path.join(tts.audio_store.directory, "test16000_你是谁_是不是李白.wav")
     with open(path, "wb") as f:
         f.write(wav_bytes)
     print(f"✅ 成功保存 WAV 文件: {path}")
@@ -0,0 +1,159 @@
+# backend/speech/tts_engines.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from math import gcd
+from typing import AsyncGenerator, Dict, List, Optional
+
+import numpy as np
+from backend.config import settings
+from backend.speech.tts_pool import TTSConnectionPool
+
+SAMPLE_RATE = 16000
+
+
+class TTSEngine:
+    """
+    TTS 引擎基类
+
+    所有引擎输出 16kHz 16bit 单声道裸 PCM，供 TTSGenerator 封装为 WAV 或分块发送。
+    """
+    name = "base"
+    sample_rate = SAMPLE_RATE
+
+    def preload(self) -> None:
+        """同步加载模型等与事件循环无关的资源（可在 fork 前的主进程中调用），默认无操作"""
+
+    async def warm_up(self) -> None:
+        """预热（建立连接 / 加载模型），默认无操作"""
+
+    async def synthesize(self, text: str) -> bytes:
+        """合成一段文本，返回完整 PCM"""
+        raise NotImplementedError
+
+    async def synthesize_batch(self, texts: List[str]) -> List[bytes]:
+        """合成多段文本，结果按输入顺序返回"""
+        return [await self.synthesize(t) for t in texts]
+
+    async def stream(self, texts: List[str]) -> AsyncGenerator[bytes, None]:
+        """按顺序逐段返回多段文本的 PCM，每段合成完即返回"""
+        for t in texts:
+            yield await self.synthesize(t)
+
+
+class EdgeTTSEngine(TTSEngine):
+    """edge-tts 在线服务，经由预热的长连接池访问"""
+    name = "edge"
+
+    def __init__(self, voice: str = "zh-CN-YunjianNeural", rate: str = "+0%"):
+        self.voice = voice
+        self.rate = rate
+        self.pool = TTSConnectionPool()
+
+    async def warm_up(self) -> None:
+        await self.pool.warm_up()
+
+    async def synthesize(self, text: str) -> bytes:
+        return await self.pool.synthesize(text, self.voice, self.rate)
+
+    async def synthesize_batch(self, texts: List[str]) -> List[bytes]:
+        return await self.pool.synthesize_many(texts, self.voice, self.rate)
+
+    async def stream(self, texts: List[str]) -> AsyncGenerator[bytes, None]:
+        async for pcm in self.pool.stream_many(texts, self.voice, self.rate):
+            yield pcm
+
+
+class LocalTTSEngine(TTSEngine):
+    """
+    本地离线 TTS（coqui-tts，CPU 推理）
+
+    模型在进程内只加载一次并在实例间共享；推理是阻塞的且模型非线程安全，
+    因此所有合成都放在同一个单线程执行器里排队执行，不阻塞事件循环。
+    """
+    name = "local"
+
+    _models: Dict[str, object] = {}
+    _load_lock = threading.Lock()
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-tts")
+
+    def __init__(self, model_name: Optional[str] = None, device: str = "cpu"):
+        self.model_name = model_name or settings.TTS_MODEL or "tts_models/zh-CN/baker/tacotron2-DDC-GST"
+        self.device = device
+
+    def _load(self):
+        with self._load_lock:
+            if self.model_name not in self._models:
+                from TTS.api import TTS
+                print(f"加载本地TTS模型: {self.model_name}")
+                self._models[self.model_name] = TTS(self.model_name).to(self.device)
+            return self._models[self.model_name]
+
+    def _synthesize_sync(self, text: str) -> bytes:
+        tts = self._load()
+        wav = np.asarray(tts.tts(text=text), dtype=np.float32)
+        source_rate = tts.synthesizer.output_sample_rate
+        if source_rate != SAMPLE_RATE:
+            from scipy.signal import resample_poly
+            g = gcd(SAMPLE_RATE, source_rate)
+            wav = resample_poly(wav, SAMPLE_RATE // g, source_rate // g)
+        return (np.clip(wav, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    def _synthesize_batch_sync(self, texts: List[str]) -> List[bytes]:
+        """
+        逐句顺序合成：coqui-tts 的 TTS.api 没有批量推理接口（Synthesizer.tts 内部也是逐句推理），
+        这里不是真正的 batched inference，只是把整段回复作为执行器里的一个任务
+        """
+        return [self._synthesize_sync(t) for t in texts]
+
+    def preload(self) -> None:
+        self._load()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def warm_up(self) -> None:
+        # 加载模型并合成一个字，触发首次推理的初始化开销
+        await self._run(self._synthesize_sync, "好")
+
+    async def synthesize(self, text: str) -> bytes:
+        return await self._run(self._synthesize_sync, text)
+
+    async def synthesize_batch(self, texts: List[str]) -> List[bytes]:
+        # 整批作为执行器里的一个任务：各句仍逐句推理，总耗时与逐句合成相同，
+        # 只是同一段回复的句子不会与其他请求的句子交错
+        return await self._run(self._synthesize_batch_sync, texts)
+
+    async def stream(self, texts: List[str]) -> AsyncGenerator[bytes, None]:
+        # 各句依次入队（单线程执行器保证顺序），前一句合成完即可返回，后续句子已在排队
+        futures = [asyncio.ensure_future(self.synthesize(t)) for t in texts]
+        try:
+            for fut in futures:
+                yield await fut
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+
+# 可选引擎注册表：名称 -> 引擎类
+TTS_ENGINES = {
+    EdgeTTSEngine.name: EdgeTTSEngine,
+    LocalTTSEngine.name: LocalTTSEngine,
+}
+
+
+def create_tts_engine(name: Optional[str] = None, **kwargs) -> TTSEngine:
+    """
+    按名称创建 TTS 引擎
+
+    Args:
+        name: 引擎名称，默认取 settings.TTS_ENGINE
+        kwargs: 透传给引擎构造函数的参数
+
+    Returns:
+        TTS 引擎实例
+    """
+    name = name or settings.TTS_ENGINE
+    if name not in TTS_ENGINES:
+        raise ValueError(f"未知的TTS引擎: {name}，可选: {', '.join(TTS_ENGINES)}")
+    return TTS_ENGINES[name](**kwargs)
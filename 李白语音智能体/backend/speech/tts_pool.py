@@ -0,0 +1,259 @@
+# backend/speech/tts_pool.py
+import asyncio
+import ssl
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import aiohttp
+from backend.config import settings
+
+
+def _timestamp() -> str:
+    """服务端要求的 JavaScript 风格时间戳"""
+    return time.strftime("%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)", time.gmtime())
+
+
+def _parse_headers(data: bytes) -> Dict[bytes, bytes]:
+    headers = {}
+    for line in data.split(b"\r\n"):
+        if b":" in line:
+            key, value = line.split(b":", 1)
+            headers[key] = value
+    return headers
+
+
+class EdgeTTSConnection:
+    """
+    一条到 edge-tts 服务（或本地替身服务）的长连接 websocket
+
+    与 edge_tts.Communicate 每次请求新建连接不同，这里的连接在一次合成结束
+    （收到 turn.end）后可以继续发送下一条 SSML 请求。
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, url: Optional[str] = None,
+                 output_format: Optional[str] = None):
+        self.session = session
+        self.url = url
+        self.output_format = output_format or settings.TTS_OUTPUT_FORMAT
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.in_turn = False
+        self.last_used = 0.0
+
+    @property
+    def closed(self) -> bool:
+        return self.ws is None or self.ws.closed
+
+    async def connect(self) -> None:
+        """建立 websocket 并发送 speech.config，之后即可直接发送合成请求"""
+        if self.url:
+            self.ws = await self.session.ws_connect(self.url)
+        else:
+            url, headers, ssl_ctx = self._edge_endpoint()
+            self.ws = await self.session.ws_connect(url, headers=headers, ssl=ssl_ctx, compress=15)
+        await self.ws.send_str(
+            f"X-Timestamp:{_timestamp()}\r\n"
+            "Content-Type:application/json; charset=utf-8\r\n"
+            "Path:speech.config\r\n\r\n"
+            '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+            '"sentenceBoundaryEnabled":"false","wordBoundaryEnabled":"false"},'
+            f'"outputFormat":"{self.output_format}"'
+            "}}}}\r\n"
+        )
+        self.last_used = time.monotonic()
+
+    @staticmethod
+    def _edge_endpoint() -> Tuple[str, Dict[str, str], ssl.SSLContext]:
+        # edge-tts 的鉴权参数（Sec-MS-GEC 等）随版本变化，直接复用其实现
+        from edge_tts.constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+        from edge_tts.drm import DRM
+
+        url = (f"{WSS_URL}&ConnectionId={uuid.uuid4().hex}"
+               f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}")
+        return url, DRM.headers_with_muid(WSS_HEADERS), ssl.create_default_context()
+
+    async def stream(self, text: str, voice: str, rate: str) -> AsyncGenerator[bytes, None]:
+        """
+        在当前连接上合成一段文本，逐块返回音频数据
+
+        Args:
+            text: 待合成文本
+            voice: 发音人
+            rate: 语速，如 "+0%"
+        """
+        ssml = (
+            "<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='en-US'>"
+            f"<voice name='{voice}'><prosody pitch='+0Hz' rate='{rate}' volume='+0%'>"
+            f"{escape(text)}</prosody></voice></speak>"
+        )
+        self.in_turn = True
+        await self.ws.send_str(
+            f"X-RequestId:{uuid.uuid4().hex}\r\n"
+            "Content-Type:application/ssml+xml\r\n"
+            f"X-Timestamp:{_timestamp()}Z\r\n"
+            "Path:ssml\r\n\r\n"
+            f"{ssml}"
+        )
+        async for msg in self.ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                header_end = msg.data.find("\r\n\r\n")
+                headers = _parse_headers(msg.data[:header_end].encode("utf-8"))
+                if headers.get(b"Path") == b"turn.end":
+                    self.in_turn = False
+                    self.last_used = time.monotonic()
+                    return
+            elif msg.type == aiohttp.WSMsgType.BINARY:
+                # 二进制消息：前两个字节为头部长度，随后是头部和音频数据
+                header_length = int.from_bytes(msg.data[:2], "big")
+                headers = _parse_headers(msg.data[2:2 + header_length])
+                data = msg.data[2 + header_length:]
+                if headers.get(b"Path") == b"audio" and data:
+                    yield data
+            else:
+                break
+        raise ConnectionError("TTS连接在合成完成前被关闭")
+
+    async def close(self) -> None:
+        if self.ws is not None and not self.ws.closed:
+            await self.ws.close()
+        self.ws = None
+
+
+class TTSConnectionPool:
+    """
+    预热的 TTS 长连接池
+
+    - 连接在请求之间复用，省去每次合成的 TLS/websocket 握手
+    - warm_up() 在启动时预先建立连接
+    - synthesize_many()/stream_many() 以有界并行度同时合成多个句子
+    """
+
+    def __init__(self, size: Optional[int] = None, url: Optional[str] = None,
+                 max_parallel: Optional[int] = None, idle_timeout: Optional[float] = None):
+        """
+        Args:
+            size: 连接池大小（同时在用的最大连接数）
+            url: 服务地址，为空时连接 edge-tts 官方服务；测试时可指向本地替身服务
+            max_parallel: 一次回复中并行合成的最大句子数
+            idle_timeout: 空闲超过该秒数的连接不再复用（服务端会主动断开空闲连接）
+        """
+        self.size = size or settings.TTS_POOL_SIZE
+        self.url = url if url is not None else settings.TTS_WS_URL
+        self.max_parallel = min(max_parallel or settings.TTS_MAX_PARALLEL, self.size)
+        self.idle_timeout = idle_timeout or settings.TTS_IDLE_TIMEOUT
+        self._idle: List[EdgeTTSConnection] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _bind_loop(self) -> None:
+        """asyncio 对象与事件循环绑定；换了事件循环（如多次 asyncio.run）时重建"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._idle = []
+            self._session = aiohttp.ClientSession(trust_env=True)
+            self._semaphore = asyncio.Semaphore(self.size)
+
+    async def _new_connection(self) -> EdgeTTSConnection:
+        conn = EdgeTTSConnection(self._session, self.url or None)
+        await conn.connect()
+        return conn
+
+    async def warm_up(self, count: Optional[int] = None) -> None:
+        """预先建立 count 条连接（默认填满连接池）"""
+        self._bind_loop()
+        count = min(count or self.size, self.size) - len(self._idle)
+        results = await asyncio.gather(*(self._new_connection() for _ in range(count)),
+                                       return_exceptions=True)
+        for r in results:
+            if isinstance(r, EdgeTTSConnection):
+                self._idle.append(r)
+            else:
+                print(f"TTS连接预热失败: {r}")
+
+    @asynccontextmanager
+    async def connection(self):
+        """从池中借出一条可用连接，用完归还；合成被中途打断的连接直接关闭"""
+        self._bind_loop()
+        async with self._semaphore:
+            conn = None
+            now = time.monotonic()
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.closed or now - candidate.last_used > self.idle_timeout:
+                    await candidate.close()
+                    continue
+                conn = candidate
+                break
+            if conn is None:
+                conn = await self._new_connection()
+            try:
+                yield conn
+            finally:
+                if conn.closed or conn.in_turn:
+                    await conn.close()
+                else:
+                    self._idle.append(conn)
+
+    async def stream(self, text: str, voice: str, rate: str) -> AsyncGenerator[bytes, None]:
+        """合成一段文本并逐块返回音频；复用的连接若已被服务端断开，则换新连接重试一次"""
+        for attempt in range(2):
+            received = False
+            try:
+                async with self.connection() as conn:
+                    async for data in conn.stream(text, voice, rate):
+                        received = True
+                        yield data
+                return
+            except (ConnectionError, aiohttp.ClientError):
+                if received or attempt == 1:
+                    raise
+
+    async def synthesize(self, text: str, voice: str, rate: str) -> bytes:
+        audio = bytearray()
+        async for data in self.stream(text, voice, rate):
+            audio.extend(data)
+        return bytes(audio)
+
+    async def synthesize_many(self, texts: List[str], voice: str, rate: str) -> List[bytes]:
+        """并行合成多段文本，结果按输入顺序返回"""
+        self._bind_loop()
+        limiter = asyncio.Semaphore(self.max_parallel)
+
+        async def run(text):
+            async with limiter:
+                return await self.synthesize(text, voice, rate)
+
+        return list(await asyncio.gather(*(run(t) for t in texts)))
+
+    async def stream_many(self, texts: List[str], voice: str, rate: str) -> AsyncGenerator[bytes, None]:
+        """
+        并行合成多段文本，按输入顺序依次返回每段的完整音频。
+        第一段合成完即可开始返回，后续各段同时在后台合成。
+        """
+        self._bind_loop()
+        limiter = asyncio.Semaphore(self.max_parallel)
+
+        async def run(text):
+            async with limiter:
+                return await self.synthesize(text, voice, rate)
+
+        tasks = [asyncio.create_task(run(t)) for t in texts]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def close(self) -> None:
+        for conn in self._idle:
+            await conn.close()
+        self._idle = []
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._loop = None
@@ -1,8 +1,3 @@
-import io
-import torch
-import whisper
-import numpy as np
-import ffmpeg
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.responses import HTMLResponse
 from backend.speech.asr import ASR
@@ -0,0 +1,129 @@
+# utils/admission.py
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from backend.config import settings
+
+
+class AdmissionRejected(Exception):
+    """请求被准入控制拒绝（过载降级）"""
+
+    def __init__(self, name: str, reason: str, retry_after: float):
+        super().__init__(f"{name} 过载，请求被拒绝（{reason}）")
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    并发上限 + 排队时间预算的准入控制
+
+    同时执行的请求不超过 max_concurrency；其余请求排队等待，但排队时间不超过 queue_budget 秒：
+        - 根据排队人数和平均处理时长预估等待时间，预计超出预算的请求立即拒绝（快速失败）
+        - 已排队但在预算内仍未轮到的请求超时拒绝
+    被接纳的请求排队时间有上界，因此其尾延迟可预期；超出部分由调用方降级处理（如返回“忙碌”回复）。
+    """
+
+    def __init__(self, name: str, max_concurrency: int, queue_budget: float, max_queue: int = 0):
+        """
+        Args:
+            name: 名称，用于日志和统计
+            max_concurrency: 最大并发数
+            queue_budget: 排队时间预算（秒）
+            max_queue: 最大排队数，0 表示只受时间预算限制
+        """
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_budget = queue_budget
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.avg_service_time = 0.0   # 处理时长的指数滑动平均（秒）
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "predicted": 0, "timeout": 0}
+        self.max_queue_wait = 0.0
+
+    def _estimated_wait(self) -> float:
+        if self.in_flight < self.max_concurrency:
+            return 0.0
+        return (self.waiting + 1) / self.max_concurrency * self.avg_service_time
+
+    def _reject(self, reason: str) -> None:
+        self.shed[reason] += 1
+        print(f"{self.name} 过载降级（{reason}）：执行中 {self.in_flight}，排队 {self.waiting}")
+        raise AdmissionRejected(self.name, reason, retry_after=max(1.0, self._estimated_wait()))
+
+    def acquire(self) -> float:
+        """
+        申请一个执行名额，被拒绝时抛出 AdmissionRejected
+
+        Returns:
+            实际排队时间（秒）
+        """
+        start = time.monotonic()
+        with self._cond:
+            if self.max_queue and self.waiting >= self.max_queue:
+                self._reject("queue_full")
+            if self._estimated_wait() > self.queue_budget:
+                self._reject("predicted")
+            deadline = start + self.queue_budget
+            self.waiting += 1
+            try:
+                while self.in_flight >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject("timeout")
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            waited = time.monotonic() - start
+            self.max_queue_wait = max(self.max_queue_wait, waited)
+            return waited
+
+    def release(self, service_time: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if self.avg_service_time == 0.0:
+                self.avg_service_time = service_time
+            else:
+                self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * service_time
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self):
+        """with controller.admit(): ...  在名额内执行，被拒绝时抛出 AdmissionRejected"""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "queue_budget": self.queue_budget,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "shed": dict(self.shed),
+                "shed_total": sum(self.shed.values()),
+                "avg_service_seconds": round(self.avg_service_time, 3),
+                "max_queue_wait_seconds": round(self.max_queue_wait, 3),
+            }
+
+
+# 进程内共享的 LLM 调用准入控制（ASR 由 backend.speech.asr_scheduler 调度并执行同样的降级策略）
+llm_admission = AdmissionController("LLM", settings.LLM_MAX_CONCURRENCY, settings.LLM_QUEUE_BUDGET)
+
+
+def admission_stats() -> Dict[str, Any]:
+    from backend.speech.asr_scheduler import asr_scheduler
+    return {"asr": asr_scheduler.stats(), "llm": llm_admission.stats()}
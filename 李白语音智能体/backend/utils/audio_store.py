@@ -0,0 +1,200 @@
+# utils/audio_store.py
+import heapq
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.utils.file_utils import create_dir_if_not_exists, generate_unique_filename
+
+
+class AudioStore:
+    """
+    音频目录的后台存储与保留管理
+
+    所有磁盘操作都在一个后台线程中完成，请求路径和启动流程不会因磁盘 I/O 阻塞：
+        - save() 只把数据放入有界队列并立即返回文件名，由后台线程写盘
+        - 启动后后台线程分批扫描已有文件建立索引（文件名 -> 修改时间、大小），写入优先于扫描
+        - 按最长保留时间和目录总大小两种配额淘汰最旧的文件，每轮最多删除 evict_batch 个，
+          超出的部分留到下一轮，避免一次大清理长时间占用磁盘
+    后台线程在第一次使用时才启动，并在 fork 出的子进程中自动重新启动。
+    """
+
+    def __init__(self, directory: str, max_age: Optional[float] = None, max_bytes: Optional[int] = None,
+                 sweep_interval: Optional[float] = None, evict_batch: Optional[int] = None, max_pending: int = 256):
+        """
+        Args:
+            directory: 音频目录
+            max_age: 文件最长保留时间（秒），默认 settings.AUDIO_MAX_AGE
+            max_bytes: 目录总大小上限（字节），默认 settings.AUDIO_MAX_BYTES
+            sweep_interval: 两轮淘汰之间的间隔（秒），默认 settings.AUDIO_SWEEP_INTERVAL
+            evict_batch: 每轮最多删除/每批最多扫描的文件数，默认 settings.AUDIO_EVICT_BATCH
+            max_pending: 等待写盘的最大文件数，队列满时丢弃新文件而不是阻塞调用方
+        """
+        self.directory = directory
+        self.max_age = settings.AUDIO_MAX_AGE if max_age is None else max_age
+        self.max_bytes = settings.AUDIO_MAX_BYTES if max_bytes is None else max_bytes
+        self.sweep_interval = settings.AUDIO_SWEEP_INTERVAL if sweep_interval is None else sweep_interval
+        self.evict_batch = settings.AUDIO_EVICT_BATCH if evict_batch is None else evict_batch
+        self._queue: "queue.Queue[Tuple[str, bytes]]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[float, int]] = {}   # 文件名 -> (修改时间, 大小)
+        self._heap: List[Tuple[float, str]] = []          # 按修改时间排序，惰性删除
+        self.total_bytes = 0
+        self.scanned = False
+        self.counters = {"written": 0, "evicted": 0, "dropped": 0, "errors": 0}
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def start(self) -> None:
+        """启动后台线程（幂等）"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="audio-store", daemon=True)
+            self._thread.start()
+
+    def save(self, audio_data: bytes, prefix: str, extension: str) -> Optional[str]:
+        """
+        异步保存音频文件
+
+        Returns:
+            文件名（后台写入完成后出现在目录中）；写盘队列已满时丢弃并返回 None
+        """
+        self.start()
+        filename = generate_unique_filename(prefix or "", extension or "wav")
+        try:
+            self._queue.put_nowait((filename, audio_data))
+        except queue.Full:
+            self.counters["dropped"] += 1
+            print(f"音频写盘队列已满，丢弃文件: {filename}")
+            return None
+        return filename
+
+    def flush(self) -> None:
+        """等待已提交的文件全部写盘"""
+        self.start()
+        self._queue.join()
+
+    def _index(self, name: str, mtime: float, size: int) -> None:
+        with self._lock:
+            old = self._files.get(name)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._files[name] = (mtime, size)
+            self.total_bytes += size
+        heapq.heappush(self._heap, (mtime, name))
+
+    def _write(self, filename: str, audio_data: bytes) -> None:
+        path = os.path.join(self.directory, filename)
+        try:
+            with open(path, "wb") as f:
+                f.write(audio_data)
+            self._index(filename, time.time(), len(audio_data))
+            self.counters["written"] += 1
+        except OSError as e:
+            self.counters["errors"] += 1
+            print(f"音频写盘失败: {path}: {e}")
+
+    def _scan_step(self, scanner) -> Optional[Any]:
+        """扫描最多 evict_batch 个已有文件加入索引，扫描完毕时返回 None"""
+        for _ in range(self.evict_batch):
+            try:
+                entry = next(scanner)
+            except StopIteration:
+                scanner.close()
+                self.scanned = True
+                return None
+            try:
+                if entry.is_file():
+                    st = entry.stat()
+                    self._index(entry.name, st.st_mtime, st.st_size)
+            except OSError:
+                continue
+        return scanner
+
+    def _evict(self) -> bool:
+        """
+        删除超龄或超出总大小配额的最旧文件，最多 evict_batch 个
+
+        Returns:
+            是否还有待删除的文件
+        """
+        now = time.time()
+        removed = 0
+        while self._heap and removed < self.evict_batch:
+            mtime, name = self._heap[0]
+            current = self._files.get(name)
+            if current is None or current[0] != mtime:
+                heapq.heappop(self._heap)  # 已删除或已被覆盖的旧记录
+                continue
+            if now - mtime <= self.max_age and self.total_bytes <= self.max_bytes:
+                return False
+            heapq.heappop(self._heap)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.counters["errors"] += 1
+                print(f"删除音频文件失败: {name}: {e}")
+            with self._lock:
+                self._files.pop(name, None)
+                self.total_bytes -= current[1]
+            self.counters["evicted"] += 1
+            removed += 1
+        return removed >= self.evict_batch
+
+    def _run(self) -> None:
+        try:
+            create_dir_if_not_exists(self.directory)
+            scanner = os.scandir(self.directory)
+        except OSError as e:
+            print(f"无法打开音频目录 {self.directory}: {e}")
+            scanner = None
+            self.scanned = True
+        next_sweep = time.monotonic()
+        while True:
+            # 写入优先；没有待写文件时，先分批完成扫描，再按间隔淘汰
+            busy = scanner is not None
+            timeout = 0.0 if busy else max(0.0, next_sweep - time.monotonic())
+            try:
+                task = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                task = None
+            if task is not None:
+                self._write(*task)
+                self._queue.task_done()
+                continue
+            if scanner is not None:
+                scanner = self._scan_step(scanner)
+                continue
+            more = self._evict()
+            next_sweep = time.monotonic() + (0.0 if more else self.sweep_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "files": len(self._files),
+                "bytes": self.total_bytes,
+                "scanned": self.scanned,
+                "pending": self._queue.qsize(),
+                **self.counters,
+            }
+
+
+_stores: Dict[str, AudioStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_audio_store(directory: Optional[str] = None) -> AudioStore:
+    """获取目录对应的共享 AudioStore（默认 settings.AUDIO_DIR）"""
+    directory = os.path.abspath(directory or settings.AUDIO_DIR or "audio_files")
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = AudioStore(directory)
+        return _stores[directory]
@@ -1,6 +1,4 @@
 import os
-import shutil
-import time
 from datetime import datetime
 from typing import Optional
 
@@ -14,26 +12,7 @@ def generate_unique_filename(prefix: str, extension: str) -> str:
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
     return f"{prefix}{timestamp}.{extension}"
 
-def clean_directory(directory: str, age_threshold: int = 3600) -> None:
-    """清理目录中超过指定时间的文件"""
-    if not os.path.exists(directory):
-        return
-    
-    current_time = time.time()
-    for filename in os.listdir(directory):
-        file_path = os.path.join(directory, filename)
-        if os.path.isfile(file_path):
-            file_age = current_time - os.path.getmtime(file_path)
-            if file_age > age_threshold:
-                os.remove(file_path)
-
 def save_audio_file(audio_data: bytes, directory: str, prefix: str, extension: str) -> str:
-    """保存音频文件并返回文件名"""
-    create_dir_if_not_exists(directory)
-    filename = generate_unique_filename(prefix, extension)
-    file_path = os.path.join(directory, filename)
-    
-    with open(file_path, "wb") as f:
-        f.write(audio_data)
-    
-    return filename    
\ No newline at end of file
+    """保存音频文件并返回文件名（由目录对应的 AudioStore 在后台线程写盘，不阻塞调用方）"""
+    from backend.utils.audio_store import get_audio_store
+    return get_audio_store(directory).save(audio_data, prefix, extension)    
\ No newline at end of file
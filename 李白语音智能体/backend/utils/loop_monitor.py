@@ -0,0 +1,122 @@
+# utils/loop_monitor.py
+"""
+事件循环延迟监控
+
+    - 探测协程每隔 interval 秒 sleep 一次，实际醒来时间比预期晚多少即为调度延迟，计入直方图
+    - 看门狗线程检查探测协程的心跳：超过 threshold 秒没有更新，说明某个回调正在阻塞事件循环，
+      此时（阻塞仍在进行中）抓取事件循环线程的调用栈并打印，直接定位到阻塞的代码
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, Optional
+
+from backend.config import settings
+
+# 直方图桶的上界（毫秒），最后一个桶收纳超出部分
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, threshold: float, max_reports: int = 20):
+        """
+        Args:
+            interval: 探测间隔（秒）
+            threshold: 阻塞告警阈值（秒）
+            max_reports: 保留的最近阻塞记录数
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked = 0
+        self.reports = deque(maxlen=max_reports)
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """在事件循环中调用：启动探测协程和看门狗线程"""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _observe(self, lag: float) -> None:
+        lag_ms = lag * 1000
+        for i, bound in enumerate(BUCKETS_MS):
+            if lag_ms <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+
+    async def _probe(self) -> None:
+        while True:
+            start = self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._observe(max(0.0, time.monotonic() - start - self.interval))
+
+    def _watchdog(self) -> None:
+        reported = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._heartbeat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled <= self.threshold or beat == reported:
+                continue
+            # 同一次阻塞只报告一次
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            self.blocked += 1
+            self.reports.append({"at": time.time(), "blocked_ms": round(stalled * 1000), "stack": stack})
+            print(f"⚠️事件循环已被阻塞 {stalled * 1000:.0f} ms，阻塞处调用栈:\n{stack}")
+
+    def percentile(self, p: float) -> Optional[float]:
+        """按直方图估算延迟分位数（返回所在桶的上界，毫秒）"""
+        if not self.samples:
+            return None
+        rank = self.samples * p / 100
+        max_ms = round(self.max_lag * 1000, 1)
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank and i < len(BUCKETS_MS):
+                return min(float(BUCKETS_MS[i]), max_ms)
+        return max_ms
+
+    def stats(self) -> Dict[str, Any]:
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "samples": self.samples,
+            "mean_lag_ms": round(self.total_lag / self.samples * 1000, 2) if self.samples else None,
+            "p99_lag_ms": self.percentile(99),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "histogram": dict(zip(labels, self.histogram)),
+            "blocked": self.blocked,
+            # 只返回最近几次阻塞调用栈的末尾几帧，完整调用栈见日志
+            "recent_blocks": [
+                {**r, "stack": r["stack"].strip().splitlines()[-6:]} for r in list(self.reports)[-5:]
+            ],
+        }
+
+
+# 进程内共享，由服务启动时在事件循环中 start()
+loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_BLOCK_THRESHOLD)
@@ -0,0 +1,94 @@
+# utils/ring_buffer.py
+from typing import Optional, Union
+
+import numpy as np
+
+
+class PCMRingBuffer:
+    """
+    预分配的 int16 PCM 环形缓冲区（镜像存储）
+
+    底层数组长度为容量的两倍，每个样本同时写入 i 和 i+capacity 两个位置，
+    因此任意不超过容量的区间在内存中都是连续的，可以直接返回只读视图而无需拼接拷贝。
+    总内存固定，不随通话时长增长。
+
+    位置均用单调递增的全局样本序号表示；当前“话语”为 [utterance_start, write_pos)。
+    返回的视图在其区间被新数据覆盖（即又写入超过 capacity 个样本）之前一直有效。
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: 容量（样本数），如 30 秒 16kHz 音频为 480000
+        """
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype="<i2")
+        self.write_pos = 0          # 已写入的样本总数
+        self.utterance_start = 0    # 当前话语起点
+        self.dropped = 0            # 因话语超出容量而被覆盖丢弃的样本数
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    @property
+    def utterance_length(self) -> int:
+        return self.write_pos - self.utterance_start
+
+    def write(self, pcm: Union[bytes, bytearray, memoryview, np.ndarray]) -> int:
+        """
+        原地写入一块 int16 小端 PCM
+
+        Returns:
+            写入的样本数
+        """
+        samples = np.frombuffer(pcm, dtype="<i2") if not isinstance(pcm, np.ndarray) else pcm
+        n = len(samples)
+        if n > self.capacity:
+            # 单块就超过容量时只保留最新部分
+            self.write_pos += n - self.capacity
+            samples = samples[-self.capacity:]
+        cap = self.capacity
+        pos = self.write_pos % cap
+        first = min(len(samples), cap - pos)
+        rest = len(samples) - first
+        self._data[pos:pos + first] = samples[:first]
+        self._data[pos + cap:pos + cap + first] = samples[:first]
+        if rest:
+            self._data[:rest] = samples[first:]
+            self._data[cap:cap + rest] = samples[first:]
+        self.write_pos += len(samples)
+
+        overflow = self.utterance_length - cap
+        if overflow > 0:
+            self.utterance_start += overflow
+            self.dropped += overflow
+        return n
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """
+        返回全局区间 [start, end) 的只读视图（不拷贝）
+        """
+        if end - start > self.capacity or start < self.write_pos - self.capacity or end > self.write_pos:
+            raise ValueError(f"区间 [{start}, {end}) 不在缓冲区中")
+        offset = start % self.capacity
+        view = self._data[offset:offset + (end - start)]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, n: int) -> np.ndarray:
+        """最新 n 个样本的只读视图"""
+        n = min(n, self.write_pos, self.capacity)
+        return self.view(self.write_pos - n, self.write_pos)
+
+    def utterance(self) -> np.ndarray:
+        """当前话语的只读视图"""
+        return self.view(self.utterance_start, self.write_pos)
+
+    def consume(self, end: Optional[int] = None) -> None:
+        """标记话语已处理，下一段话语从 end（默认当前写入位置）开始"""
+        self.utterance_start = self.write_pos if end is None else end
+
+    def clear(self) -> None:
+        self.write_pos = 0
+        self.utterance_start = 0
@@ -0,0 +1,72 @@
+# utils/text_utils.py
+import re
+from typing import List
+
+# 句末标点（中英文），以及可能紧跟在句末标点之后的闭合引号/括号
+SENTENCE_ENDINGS = "。！？；…!?;\n"
+CLOSING_MARKS = "”’」』）)\"'"
+
+_SENTENCE_PATTERN = re.compile(
+    rf"[^{re.escape(SENTENCE_ENDINGS)}]+(?:[{re.escape(SENTENCE_ENDINGS)}]+[{re.escape(CLOSING_MARKS)}]*|$)"
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    按句末标点切分文本，标点保留在句尾
+
+    Args:
+        text: 待切分的文本
+
+    Returns:
+        去除首尾空白后的非空句子列表
+    """
+    sentences = [s.strip() for s in _SENTENCE_PATTERN.findall(text)]
+    return [s for s in sentences if s]
+
+
+_SENTENCE_END_PATTERN = re.compile(rf"[{re.escape(SENTENCE_ENDINGS)}]+[{re.escape(CLOSING_MARKS)}]*")
+_NON_SPOKEN_PATTERN = re.compile(r"[\W_]+")
+
+
+def spoken_length(text: str) -> int:
+    """朗读时实际发音的字数（不计标点和空白），用于估算朗读时长"""
+    return len(_NON_SPOKEN_PATTERN.sub("", text))
+
+
+def sentence_end(text: str, start: int = 0) -> int:
+    """
+    查找 start 之后第一个句末位置（含句末标点及紧随的闭合引号/括号）
+
+    Returns:
+        句末之后的下标；没有句末标点时返回 -1
+    """
+    match = _SENTENCE_END_PATTERN.search(text, start)
+    return match.end() if match else -1
+
+
+def complete_sentences(text: str) -> str:
+    """去掉末尾不完整的半句；整段都没有句末标点时原样返回"""
+    ends = [m.end() for m in _SENTENCE_END_PATTERN.finditer(text)]
+    return text[:ends[-1]] if ends else text
+
+
+def split_for_synthesis(text: str, min_chars: int = 8) -> List[str]:
+    """
+    把文本切成适合逐段合成的片段：按句切分，过短的句子并入前一句，
+    避免为“好。”这类极短片段单独发起一次合成
+
+    Args:
+        text: 待切分的文本
+        min_chars: 片段的最小字数
+
+    Returns:
+        按原顺序排列的片段列表
+    """
+    chunks: List[str] = []
+    for sentence in split_sentences(text):
+        if chunks and (len(sentence) < min_chars or len(chunks[-1]) < min_chars):
+            chunks[-1] += sentence
+        else:
+            chunks.append(sentence)
+    return chunks
@@ -2,7 +2,12 @@
 import asyncio
 import threading
 import queue
-from typing import Callable, Optional, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Any, Dict
+
+from backend.config import settings
+from backend.utils.admission import AdmissionRejected
 
 class AsyncQueueProcessor:
     """异步队列处理器，用于在后台线程处理数据"""
@@ -67,4 +72,74 @@ class AsyncExecutor:
         if loop is None:
             loop = asyncio.get_event_loop()
             
-        return asyncio.run_coroutine_threadsafe(coro, loop)
\ No newline at end of file
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+class BoundedExecutor:
+    """
+    专用、有界的线程池：同步阻塞的处理阶段通过它在事件循环之外执行
+
+    线程数固定；在途任务（执行中 + 排队）超过 max_pending 时直接拒绝（AdmissionRejected），
+    不会无限堆积。统计排队等待时长，便于发现某个阶段成为瓶颈。
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int):
+        """
+        Args:
+            name: 名称，同时作为线程名前缀
+            workers: 线程数
+            max_pending: 在途任务上限
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{name}-exec")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_wait = 0.0
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """在本线程池中执行 fn(*args) 并等待结果"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise AdmissionRejected(self.name, "executor_full", retry_after=1.0)
+            self.pending += 1
+        submitted = time.monotonic()
+
+        def call():
+            waited = time.monotonic() - submitted
+            with self._lock:
+                self.max_queue_wait = max(self.max_queue_wait, waited)
+            return fn(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "max_queue_wait_seconds": round(self.max_queue_wait, 3),
+            }
+
+
+# 进程内共享的专用线程池：
+#   llm —— 阻塞的 LLM 调用（含 llm_admission 的排队等待，线程数需大于 LLM 并发上限）
+#   io  —— 模型加载等阻塞的读盘操作
+# ASR（含 ffmpeg 解码）由 asr_scheduler 的工作线程执行，音频写盘由 AudioStore / CallArchiver 的后台线程执行
+llm_executor = BoundedExecutor("llm", settings.EXECUTOR_LLM_WORKERS, settings.EXECUTOR_MAX_PENDING)
+io_executor = BoundedExecutor("io", settings.EXECUTOR_IO_WORKERS, settings.EXECUTOR_MAX_PENDING)
+
+
+def executor_stats() -> Dict[str, Any]:
+    return {"llm": llm_executor.stats(), "io": io_executor.stats()}
@@ -1,129 +1,418 @@
 import asyncio
+import json
+import math
+import queue
+import uuid
 import websockets
 import sys
-from backend.speech.asr import ASR
-from backend.speech.tts import TTSGenerator
+from backend.components import components
 from backend.dialog.dialog_manager import DialogManager
-from backend.utils.thread_utils import AsyncQueueProcessor, AsyncExecutor
-from backend.speech.audio_processing import is_speaking, pcm_to_wav_bytes
+from backend.utils.thread_utils import AsyncQueueProcessor, AsyncExecutor, llm_executor
+from backend.speech.audio_processing import is_speaking, pcm_to_wav_bytes, quietest_frame_offset
+from backend.speech.filler import FillerPlayer
+from backend.speech.paced_sender import PacedSender
+from backend.speech.resampler import StreamingResampler, TARGET_SAMPLE_RATE
+from backend.utils.ring_buffer import PCMRingBuffer
+from backend.utils.admission import AdmissionRejected, llm_admission
+from backend.speech.asr_scheduler import asr_scheduler, END_OF_TURN, PARTIAL
+from backend.speech.call_archive import call_archive, USER, AI
+from backend.speech.traffic_trace import traffic_recorder
+from concurrent.futures import CancelledError
+from backend.config import settings
+from typing import Dict, Optional
+
+# 客户端可声明的上行采样率范围（Hz）
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 192000
+# 客户端回报的已播放时长允许超出已发送时长的舍入误差（秒）
+ACK_TOLERANCE = 0.001
+
+class ClientSession:
+    """单个客户端连接的会话状态"""
+
+    def __init__(self, websocket):
+        self.id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.sample_rate = TARGET_SAMPLE_RATE
+        self.resampler = None
+        self.user_speaking = False
+        self.current_tts_task = None
+        self.audio_processor = None
+        self.vad = None  # 共享神经网络 VAD 中的 VADStream；为 None 时使用能量门限
+        # 下行音频按客户端播放进度限速发送，只领先 AUDIO_SEND_LEAD_MS
+        self.sender = PacedSender(websocket.send_bytes, websocket.send_text)
+        # 预分配的16kHz话语缓冲区，总内存固定
+        self.audio_buffer = PCMRingBuffer(int(settings.SESSION_BUFFER_SECONDS * TARGET_SAMPLE_RATE))
+        # 单句上限不超过缓冲区容量，强制切分前的音频不会被覆盖
+        self.max_utterance_samples = int(min(settings.MAX_UTTERANCE_SECONDS, settings.SESSION_BUFFER_SECONDS)
+                                         * TARGET_SAMPLE_RATE)
+        self.partial_texts = []  # 强制切分出的前半句识别结果，说完整句后与最后一段合并
+
+        # 内存统计：入队字节数只在事件循环线程累加，处理字节数只在音频处理线程累加，差值即为排队中的音频
+        self.memory_limit = int(settings.SESSION_MEMORY_LIMIT_MB * 1024 * 1024)
+        self.bytes_enqueued = 0
+        self.bytes_processed = 0
+        self.pending_tts_bytes = 0
+        self.dropped_chunks = 0
+        self.forced_segments = 0
+
+    def set_sample_rate(self, sample_rate: int) -> None:
+        """客户端声明上行音频采样率，非16kHz时为本会话创建流式重采样器"""
+        self.sample_rate = sample_rate
+        if sample_rate == TARGET_SAMPLE_RATE:
+            self.resampler = None
+        else:
+            self.resampler = StreamingResampler(sample_rate, TARGET_SAMPLE_RATE)
+
+    def to_target_rate(self, pcm: bytes) -> bytes:
+        """把上行 PCM 转为 16kHz"""
+        return self.resampler.process(pcm) if self.resampler else pcm
+
+    def memory_usage(self) -> Dict[str, int]:
+        """本会话当前占用的内存（字节）"""
+        usage = {
+            "audio_buffer": self.audio_buffer.nbytes,
+            "audio_queue": self.bytes_enqueued - self.bytes_processed,
+            "pending_tts": self.pending_tts_bytes,
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def memory_available(self) -> int:
+        """距离会话内存上限还剩多少字节"""
+        return self.memory_limit - self.memory_usage()["total"]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "sample_rate": self.sample_rate,
+            "memory": self.memory_usage(),
+            "memory_limit": self.memory_limit,
+            "dropped_chunks": self.dropped_chunks,
+            "forced_segments": self.forced_segments,
+            "dropped_samples": self.audio_buffer.dropped,
+            "vad_probability": round(self.vad.probability, 3) if self.vad else None,
+            "playback": self.sender.stats(),
+        }
 
 class RealTimeWebSocketServer:
     def __init__(self):
-        self.asr = ASR()
-        self.tts = TTSGenerator()
         self.dialog_manager = DialogManager()
         self.clients = set()
-        self.user_speaking = False
-        self.current_tts_task = None
-        self.audio_buffer = bytearray()
+        self.sessions: Dict[str, ClientSession] = {}
         self.loop = None
+        self.vad = None
+        self._vad_failed = False
         
         # 确保Python能够正确输出中文
         if sys.stdout.encoding != 'utf-8':
             import io
             sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+    @property
+    def asr(self):
+        """ASR 组件，首次访问时加载"""
+        return components.get("asr")
+
     async def handle_connection(self, websocket, path):
         await websocket.accept()
         print("客户端已连接")
         self.clients.add(websocket)
+        session = ClientSession(websocket)
+        self.sessions[session.id] = session
         self.loop = asyncio.get_running_loop()
-        self.audio_processor = AsyncQueueProcessor(
-            processor=lambda data: self._process_audio_chunk(data, websocket),
+        session.audio_processor = AsyncQueueProcessor(
+            processor=lambda data: self._process_audio_chunk(data, session),
             maxsize=100
         )
-        self.audio_processor.start()
+        session.audio_processor.start()
+        session.vad = await self._register_vad(session)
 
         try:
             while True:
-                audio_chunk = await websocket.receive_bytes()
-                audio_chunk = self._pad_audio(audio_chunk)
-                speaking = is_speaking(audio_chunk)
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    print("客户端关闭连接")
+                    break
+                if message.get("text") is not None:
+                    traffic_recorder.record_text(session.id, message["text"])
+                    self._handle_control_message(message["text"], session)
+                    continue
+
+                traffic_recorder.record_audio(session.id, message["bytes"])
+                audio_chunk = self._pad_audio(message["bytes"])
+                audio_chunk = session.to_target_rate(audio_chunk)
+                if not audio_chunk:
+                    continue
+                call_archive.record(session.id, USER, audio_chunk)
+                if session.vad is not None:
+                    # 只追加音频，推理由共享 VAD 的调度线程批量完成，这里读取最近一次的判断
+                    session.vad.push(audio_chunk)
+                    speaking = session.vad.speaking
+                else:
+                    speaking = is_speaking(audio_chunk)
 
-                if speaking and not self.user_speaking:
-                    self._interrupt_current_tts()
-                    self.user_speaking = True
-                elif not speaking and self.user_speaking:
-                    self.user_speaking = False
+                if speaking and not session.user_speaking:
+                    self._interrupt_current_tts(session)
+                    asr_scheduler.cancel_session(session.id)
+                    session.user_speaking = True
+                elif not speaking and session.user_speaking:
+                    session.user_speaking = False
 
-                self.audio_processor.put(audio_chunk)
+                self._enqueue_audio(audio_chunk, session)
         except websockets.exceptions.ConnectionClosedOK:
             print("客户端关闭连接")
         finally:
             self.clients.remove(websocket)
-            self.audio_processor.stop()
+            self.sessions.pop(session.id, None)
+            if session.vad is not None:
+                self.vad.unregister(session.id)
+            session.audio_processor.stop()
+            call_archive.close_session(session.id)
+            traffic_recorder.close_session(session.id)
+
+    async def _register_vad(self, session: ClientSession):
+        """VAD_ENGINE=neural 时在共享 VAD 中注册会话；模型加载失败则回退到能量门限（只尝试一次）"""
+        if settings.VAD_ENGINE != "neural" or self._vad_failed:
+            return None
+        try:
+            self.vad = await components.aget("vad")
+        except Exception as e:
+            self._vad_failed = True
+            print(f"神经网络VAD加载失败，回退到能量门限: {e}")
+            return None
+        return self.vad.register(session.id)
+
+    def _handle_control_message(self, text: str, session: ClientSession) -> None:
+        """
+        处理客户端文本控制消息，目前支持：
+            {"type": "start", "sample_rate": 48000}  声明上行 PCM16 的采样率
+            {"type": "played", "seconds": 12.3}      已播完（或已丢弃）的下行音频累计时长
+        """
+        try:
+            message = json.loads(text)
+        except json.JSONDecodeError:
+            print(f"无法解析的控制消息: {text}")
+            return
+        if not isinstance(message, dict):
+            print(f"无法解析的控制消息: {text}")
+            return
+        if message.get("type") == "start":
+            try:
+                sample_rate = int(message.get("sample_rate", TARGET_SAMPLE_RATE))
+            except (TypeError, ValueError, OverflowError):
+                sample_rate = 0
+            if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+                print(f"会话 {session.id} 声明的采样率无效，已忽略: {message.get('sample_rate')!r}")
+                return
+            session.set_sample_rate(sample_rate)
+            print(f"会话 {session.id} 上行采样率: {sample_rate}Hz")
+        elif message.get("type") == "played":
+            try:
+                played = float(message.get("seconds"))
+            except (TypeError, ValueError):
+                played = math.nan
+            # 只接受 [0, 已发送时长] 内的有限值（容许客户端累加时长的舍入误差），否则落后量和领先量的计算会被污染
+            sent = session.sender.sent_seconds
+            if not 0 <= played <= sent + ACK_TOLERANCE:
+                print(f"会话 {session.id} 播放确认无效，已忽略: {message.get('seconds')!r}")
+                return
+            session.sender.on_ack(min(played, sent))
+
+    def _enqueue_audio(self, audio_chunk: bytes, session: ClientSession) -> None:
+        """把上行音频交给会话的处理线程；超出会话内存上限或队列已满时丢弃，不阻塞事件循环"""
+        if len(audio_chunk) > session.memory_available():
+            self._drop_chunk(session, "超出会话内存上限")
+            return
+        try:
+            session.audio_processor.put(audio_chunk, block=False)
+        except queue.Full:
+            self._drop_chunk(session, "音频处理队列已满")
+            return
+        session.bytes_enqueued += len(audio_chunk)
+
+    def _drop_chunk(self, session: ClientSession, reason: str) -> None:
+        if session.dropped_chunks % 100 == 0:
+            print(f"会话 {session.id} 丢弃上行音频（{reason}），累计 {session.dropped_chunks + 1} 块")
+        session.dropped_chunks += 1
+
+    def _process_audio_chunk(self, audio_chunk: bytes, session: ClientSession):
+        session.bytes_processed += len(audio_chunk)
+        buffer = session.audio_buffer
+        buffer.write(audio_chunk)
 
-    def _process_audio_chunk(self, audio_chunk: bytes, websocket):
-        self.audio_buffer.extend(audio_chunk)
+        if buffer.utterance_length >= session.max_utterance_samples:
+            self._force_segment(session)
 
-        if not self.user_speaking and len(self.audio_buffer) >= 32000:
-            text = self.asr.transcribe(bytes(self.audio_buffer), is_raw_pcm=True)
-            self.audio_buffer.clear()
+        if not session.user_speaking and buffer.utterance_length >= TARGET_SAMPLE_RATE:
+            try:
+                text = self._transcribe(session, buffer.write_pos, END_OF_TURN)
+            except CancelledError:
+                # 排队期间用户又开口了：保留这段音频，与接下来的话合并为同一句再识别
+                return
+            except AdmissionRejected:
+                text = None
+                session.partial_texts.clear()
+                self._submit(self._send_busy_reply(session))
+            buffer.consume()
 
+            if session.partial_texts:
+                text = "".join(session.partial_texts) + (text or "")
+                session.partial_texts.clear()
             if text:
-                future = asyncio.run_coroutine_threadsafe(
-                    self._handle_user_input(text, websocket),
-                    self.loop
-                )
+                self._submit(self._handle_user_input(text, session))
 
-                def callback(fut):
-                    try:
-                        fut.result()
-                    except Exception as e:
-                        print("❗_handle_user_input 执行失败:", e)
+    def _force_segment(self, session: ClientSession) -> None:
+        """
+        话语超过最大时长仍未静音（如嘈杂环境）：在最近一段音频中能量最低的帧处切开，
+        先识别前半段并暂存结果，后半段留在缓冲区继续累积，避免一次识别过长的音频
+        """
+        buffer = session.audio_buffer
+        search = min(int(settings.UTTERANCE_SPLIT_SEARCH_SECONDS * TARGET_SAMPLE_RATE), buffer.utterance_length)
+        tail_start = buffer.write_pos - search
+        cut = tail_start + quietest_frame_offset(buffer.view(tail_start, buffer.write_pos))
+        try:
+            text = self._transcribe(session, cut, PARTIAL)
+        except CancelledError:
+            return
+        except AdmissionRejected:
+            text = None  # 用户仍在说话，不插入忙碌回复，只丢弃这一段
+        buffer.consume(cut)
+        session.forced_segments += 1
+        if text:
+            session.partial_texts.append(text)
+
+    def _transcribe(self, session: ClientSession, end: int, priority: int) -> Optional[str]:
+        """
+        识别当前话语中 [utterance_start, end) 的部分，阻塞等待调度器返回结果
+
+        只读视图直接交给ASR，话语数据不做任何拷贝；等待结果期间本线程不再写入缓冲区，视图保持有效
+        """
+        buffer = session.audio_buffer
+        utterance = buffer.view(buffer.utterance_start, end)
+        return asr_scheduler.run(lambda: self.asr.transcribe(utterance, is_raw_pcm=True),
+                                 duration=len(utterance) / TARGET_SAMPLE_RATE,
+                                 priority=priority, session_id=session.id)
 
-                future.add_done_callback(callback)
+    def _submit(self, coro) -> None:
+        """从音频处理线程把协程提交到事件循环执行"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
 
-    async def _handle_user_input(self, text: str, websocket):
+        def callback(fut):
+            try:
+                fut.result()
+            except Exception as e:
+                print("❗协程执行失败:", e)
+
+        future.add_done_callback(callback)
+
+    def _generate_reply(self, text: str) -> str:
+        """在线程池中调用LLM（阻塞），受准入控制；被拒绝时不写入对话历史"""
+        with llm_admission.admit():
+            self.dialog_manager.add_user_message(text)
+            return self.dialog_manager.generate_response()
+
+    async def _handle_user_input(self, text: str, session: ClientSession):
         print(f"识别到用户输入: {text}")
-        self.dialog_manager.add_user_message(text)
-        response_text = self.dialog_manager.generate_response()
+        reply = asyncio.create_task(llm_executor.run(self._generate_reply, text))
+        filler = await self._maybe_start_filler(reply, session)
+        try:
+            response_text = await reply
+        except AdmissionRejected:
+            await self._stop_filler(filler, session)
+            await self._send_busy_reply(session)
+            return
+        except Exception:
+            await self._stop_filler(filler, session)
+            raise
 
-        self.current_tts_task = asyncio.create_task(
-            self._synthesize_and_send(response_text, websocket)
+        session.current_tts_task = asyncio.create_task(
+            self._synthesize_and_send(response_text, session, filler)
         )
-        await self.current_tts_task
+        await session.current_tts_task
+
+    async def _maybe_start_filler(self, reply, session: ClientSession) -> Optional[FillerPlayer]:
+        """LLM 超过 FILLER_DELAY 秒仍未返回时，开始播放一句预先合成的垫话"""
+        if not settings.FILLER_ENABLED:
+            return None
+        done, _ = await asyncio.wait({reply}, timeout=settings.FILLER_DELAY)
+        bank = await components.aget("filler")
+        if done or not bank.ready or session.user_speaking:
+            return None
+        session.sender.begin()
+        filler = FillerPlayer(bank.pick(), session.sender.send, interrupted=lambda: session.user_speaking)
+        filler.start()
+        return filler
+
+    async def _stop_filler(self, filler: Optional[FillerPlayer], session: ClientSession) -> None:
+        """停止垫话（淡出收尾），并归档实际播放的部分"""
+        if filler is None or filler.stopped:
+            return
+        await filler.stop()
+        call_archive.record(session.id, AI, b"".join(filler.sent))
 
-    async def _synthesize_and_send(self, text: str, websocket):
+    async def _synthesize_and_send(self, text: str, session: ClientSession,
+                                   filler: Optional[FillerPlayer] = None):
         print(f"🧠 开始生成完整WAV语音并分段发送：{text}")
         try:
-            wav_bytes = await self.tts.synthesize_full_audio(text)
-            async for chunk in self._async_chunk_generator(wav_bytes):
-                if self.user_speaking:
-                    print("🔇 用户说话中，停止TTS发送")
-                    break
-                await websocket.send_bytes(chunk)
+            tts = await components.aget("tts")
+            wav_bytes = await tts.synthesize_full_audio(text)
+            # 真正的回复已就绪：垫话淡出后紧接着发送回复
+            await self._stop_filler(filler, session)
+            await self._send_wav(wav_bytes, session)
         except Exception as e:
             print(f"❗TTS发送失败: {e}")
+        finally:
+            await self._stop_filler(filler, session)
 
-    async def _async_chunk_generator(self, wav_bytes: bytes):
-        for chunk in self.split_wav_bytes_into_chunks(wav_bytes):
-            yield chunk
-            await asyncio.sleep(0)  # 让出事件循环
+    async def _send_busy_reply(self, session: ClientSession):
+        """过载降级：发送预先合成的“忙碌”回复"""
+        try:
+            tts = await components.aget("tts")
+            wav_bytes = await tts.cached_audio(settings.BUSY_REPLY_TEXT)
+            await self._send_wav(wav_bytes, session)
+        except Exception as e:
+            print(f"❗忙碌回复发送失败: {e}")
 
-    def split_wav_bytes_into_chunks(self, wav_bytes: bytes, chunk_size: int = 2048):
-        """
-        将完整 WAV 数据按块切分，每一块都是合法的 WAV 文件（包含头部 + 数据）。
-        每个 chunk 可以独立被 decodeAudioData 解码。
-        """
-        if len(wav_bytes) < 44:
-            raise ValueError("WAV 数据太短，缺失头部")
-
-        header = wav_bytes[:44]
-        data = wav_bytes[44:]
-
-        for i in range(0, len(data), chunk_size):
-            chunk_data = data[i:i + chunk_size]
-            chunk_len = len(chunk_data)
-            new_header = bytearray(header)
-            new_header[4:8] = (chunk_len + 36).to_bytes(4, byteorder='little')
-            new_header[40:44] = chunk_len.to_bytes(4, byteorder='little')
-            yield bytes(new_header) + chunk_data
-
-    def _interrupt_current_tts(self):
-        if self.current_tts_task and not self.current_tts_task.done():
-            self.current_tts_task.cancel()
+    async def _send_wav(self, wav_bytes: bytes, session: ClientSession):
+        allowance = session.memory_available()
+        if len(wav_bytes) > allowance:
+            # 回复音频超出会话内存上限：截断，多余部分不发送
+            wav_bytes = wav_bytes[:44 + max(0, allowance - 44) // 2 * 2]
+            print(f"会话 {session.id} 回复音频超出内存上限，截断至 {len(wav_bytes)} 字节")
+        session.pending_tts_bytes = len(wav_bytes)
+        session.sender.begin()
+        pcm = wav_bytes[44:]
+        chunk_size = settings.AUDIO_CHUNK_MS * TARGET_SAMPLE_RATE // 1000 * 2
+        sent = 0
+        try:
+            # 每块都带 WAV 头，客户端可独立解码；发送节奏由 PacedSender 按播放进度控制
+            for i in range(0, len(pcm), chunk_size):
+                if session.user_speaking or not await session.sender.send(pcm[i:i + chunk_size]):
+                    print("🔇 用户说话中，停止TTS发送")
+                    break
+                sent += len(pcm[i:i + chunk_size])
+        finally:
+            session.pending_tts_bytes = 0
+            # 只归档实际发出的部分（被打断时截断）
+            call_archive.record(session.id, AI, wav_bytes[44:44 + sent])
+
+    def session_stats(self) -> Dict[str, object]:
+        """所有会话的内存占用与丢弃统计"""
+        sessions = [s.stats() for s in list(self.sessions.values())]
+        return {
+            "count": len(sessions),
+            "memory_total": sum(s["memory"]["total"] for s in sessions),
+            "vad": self.vad.stats() if self.vad else None,
+            "sessions": sessions,
+        }
+
+    def _interrupt_current_tts(self, session: ClientSession):
+        if session.current_tts_task and not session.current_tts_task.done():
+            session.current_tts_task.cancel()
             print("当前TTS任务已中断")
+        # 客户端最多只缓存了 AUDIO_SEND_LEAD_MS 的音频，通知其丢弃，打断立即生效
+        asyncio.create_task(session.sender.interrupt())
 
     def _pad_audio(self, audio: bytes, frame_size: int = 2) -> bytes:
         remainder = len(audio) % frame_size